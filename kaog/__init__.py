@@ -10,3 +10,5 @@ Desenvolvido para o projeto de Iniciação Científica.
 __author__ = 'Ariel Tadeu da Silva'
 
 from .kaog import KAOG, KAssociado
+from .fora_de_memoria import KAOGForaDeMemoria
+from .comite import ComiteKAOG
@@ -0,0 +1,272 @@
+"""
+Interface de linha de comando do KAOG, instalada como o comando `kaog`.
+
+Subcomandos
+    treinar (ou fit)
+        Lê um arquivo CSV ou Parquet em blocos, cria o KAOG e escreve, no diretório de saída, o modelo serializado
+        (`modelo.pkl`), as tabelas de :func:`kaog.exportacao.exportar` e um relatório de tempos (`relatorio.json`).
+    planejar
+        Estima a memória e o tempo de criação e mostra a estratégia escolhida por :func:`kaog.planejamento.planejar`.
+    classificar (ou predict)
+        Carrega um modelo salvo e classifica um arquivo CSV ou Parquet bloco a bloco, escrevendo cada bloco no arquivo
+        de saída assim que é classificado.
+
+Exemplo::
+
+    kaog planejar treino.parquet --orcamento-memoria 8G
+    kaog treinar treino.parquet saida/ --coluna-y classe --motor vetorizado --n-jobs -1
+    kaog classificar saida/modelo.pkl novos.csv classes.csv --probabilidades
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from kaog.exportacao import FORMATOS, exportar
+from kaog.grafo_particionado import PARADAS
+from kaog.kaog import KAOG
+from kaog.planejamento import planejar, dimensoes
+from kaog.util import ColunaYSingleton
+from kaog.util.leitura import ler_completo, ler_em_blocos, _eh_parquet
+
+TIPOS = {'float64': np.float64, 'float32': np.float32}
+
+
+def treinar(entrada: str, saida: str, coluna_y: Optional[str] = None, colunas_categoricas: Iterable[str] = (),
+            tamanho_bloco: int = 100_000, formato: Optional[str] = None, orcamento_memoria: Optional[int] = None,
+            **kwargs) -> dict:
+    """
+    Cria o KAOG a partir de um arquivo e escreve o modelo, as tabelas e o relatório de tempos em `saida`.
+
+    O arquivo é lido em blocos, preenchendo colunas alocadas uma única vez (:func:`kaog.util.leitura.ler_completo`).
+
+    :param entrada: Arquivo CSV ou Parquet contendo os atributos e a coluna de classe.
+    :type entrada: str
+    :param saida: Diretório de saída, criado se não existir.
+    :type saida: str
+    :param coluna_y: Nome da coluna de classe. Por padrão, `ColunaYSingleton().NOME_COLUNA_Y`.
+    :type coluna_y: str
+    :param colunas_categoricas: Colunas com dados categóricos.
+    :type colunas_categoricas: Iterable[str]
+    :param tamanho_bloco: Quantidade de linhas lidas por vez.
+    :type tamanho_bloco: int
+    :param formato: Formato das tabelas, ver :func:`kaog.exportacao.escrever_tabela`.
+    :type formato: str
+    :param orcamento_memoria: Se definido, o arquivo só é carregado e a criação só é iniciada se o KAOG denso couber
+        nesse orçamento, em bytes, e `n_jobs` é reduzido ao que cabe nele (ver :func:`kaog.planejamento.planejar`).
+    :type orcamento_memoria: int
+    :param kwargs: Demais parâmetros de :class:`kaog.KAOG`, como `motor`, `algoritmo`, `n_jobs` e `dtype`.
+    :return: Relatório com a quantidade de pontos lidos, de vértices e de atributos, o último k analisado, os tempos
+        de cada etapa, em segundos, o plano de execução, se houver, e o caminho de cada arquivo escrito.
+    :rtype: dict
+    :raises MemoryError: Se o KAOG denso não couber em `orcamento_memoria`.
+    """
+    coluna_y = ColunaYSingleton().NOME_COLUNA_Y if coluna_y is None else coluna_y
+    os.makedirs(saida, exist_ok=True)
+    tempos = {}
+
+    # Com orçamento, o plano é feito a partir das dimensões do arquivo, antes de carregá-lo
+    inicio = time.perf_counter()
+    plano, n = None, None
+    if orcamento_memoria is not None:
+        n, d = dimensoes(entrada, coluna_y, tamanho_bloco)
+        plano = planejar(n, d, orcamento_memoria, metrica=kwargs.get('metrica'),
+                         dtype=kwargs.get('dtype', np.float64), n_jobs=kwargs.get('n_jobs', 1), rebaixar=False)
+        kwargs['n_jobs'] = plano.n_jobs
+    data = ler_completo(entrada, tamanho_bloco, n)
+    tempos['leitura'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    modelo = KAOG(data, pd.Index(list(colunas_categoricas)), coluna_y=coluna_y, **kwargs)
+    tempos['ajuste'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    caminho_modelo = os.path.join(saida, 'modelo.pkl')
+    modelo.salvar(caminho_modelo)
+    tempos['serializacao'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    arquivos = exportar(modelo, saida, formato)
+    tempos['exportacao'] = time.perf_counter() - inicio
+
+    arquivos['modelo'] = caminho_modelo
+    arquivos['relatorio'] = os.path.join(saida, 'relatorio.json')
+    relatorio = {
+        'pontos': len(data),
+        'vertices': len(modelo.y),
+        'atributos': modelo.x.shape[1],
+        'ultimo_k': int(max(modelo.grafos_associados)),
+        'tempos': tempos,
+        'plano': None if plano is None else str(plano),
+        'arquivos': arquivos,
+    }
+    with open(arquivos['relatorio'], 'w') as arquivo:
+        json.dump(relatorio, arquivo, indent=2)
+    return relatorio
+
+
+def classificar(modelo: str, entrada: str, saida: str, tamanho_bloco: int = 100_000,
+                probabilidades: bool = False) -> int:
+    """
+    Classifica um arquivo bloco a bloco, escrevendo cada bloco classificado em `saida`.
+
+    A coluna de classe, se presente na entrada, é ignorada. A saída é Parquet ou CSV, conforme a extensão.
+
+    :param modelo: Caminho de um modelo salvo com :meth:`kaog.KAOG.salvar`.
+    :type modelo: str
+    :param entrada: Arquivo CSV ou Parquet com os pontos a serem classificados.
+    :type entrada: str
+    :param saida: Arquivo de saída, com a classe de cada ponto, na mesma ordem da entrada.
+    :type saida: str
+    :param tamanho_bloco: Quantidade de linhas lidas e classificadas por vez.
+    :type tamanho_bloco: int
+    :param probabilidades: Se `True`, também escreve a probabilidade de cada classe, uma coluna por classe.
+    :type probabilidades: bool
+    :return: Quantidade de pontos classificados.
+    :rtype: int
+    """
+    kaog = KAOG.carregar(modelo)
+    return _escrever_blocos((_classificar_bloco(kaog, bloco, probabilidades)
+                             for bloco in ler_em_blocos(entrada, tamanho_bloco)), saida)
+
+
+def _classificar_bloco(kaog: KAOG, bloco: pd.DataFrame, probabilidades: bool) -> pd.DataFrame:
+    """Classe, e opcionalmente as probabilidades, dos pontos de um bloco."""
+    x = bloco.drop(columns=kaog.coluna_y, errors='ignore')
+    if not isinstance(kaog.x, pd.DataFrame):
+        x = x.to_numpy()
+    proba = kaog.predict_proba(x)
+    resultado = pd.DataFrame({kaog.coluna_y: proba.columns[proba.to_numpy().argmax(axis=1)]})
+    if probabilidades:
+        resultado = pd.concat([resultado, pd.DataFrame(proba.to_numpy(), columns=[str(c) for c in proba.columns])],
+                              axis=1)
+    return resultado
+
+
+def _escrever_blocos(blocos: Iterable[pd.DataFrame], caminho: str) -> int:
+    """
+    Escreve os blocos em sequência em um único arquivo CSV ou Parquet.
+
+    :raises ImportError: Se o arquivo for Parquet e o *pyarrow* não estiver instalado.
+    """
+    total = 0
+    if _eh_parquet(caminho):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError('A escrita de arquivos Parquet requer o pacote `pyarrow`.') from e
+        escritor = None
+        try:
+            for bloco in blocos:
+                tabela = pa.Table.from_pandas(bloco, preserve_index=False)
+                if escritor is None:
+                    escritor = pq.ParquetWriter(caminho, tabela.schema)
+                escritor.write_table(tabela)
+                total += len(bloco)
+        finally:
+            if escritor is not None:
+                escritor.close()
+        return total
+
+    with open(caminho, 'w', newline='') as arquivo:
+        for bloco in blocos:
+            bloco.to_csv(arquivo, index=False, header=total == 0)
+            total += len(bloco)
+    return total
+
+
+def _criar_parser() -> argparse.ArgumentParser:
+    """Parser dos argumentos dos subcomandos."""
+    parser = argparse.ArgumentParser(prog='kaog', description='Grafo K-associado ótimo (KAOG).')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    parser_treinar = subparsers.add_parser('treinar', aliases=['fit'], help='cria e salva um KAOG')
+    parser_treinar.add_argument('entrada', help='arquivo CSV ou Parquet de treino')
+    parser_treinar.add_argument('saida', help='diretório do modelo, das tabelas e do relatório')
+    parser_treinar.add_argument('--coluna-y', help='nome da coluna de classe')
+    parser_treinar.add_argument('--colunas-categoricas', nargs='*', default=[], help='colunas categóricas')
+    parser_treinar.add_argument('--motor', choices=KAOG.MOTORES, default='referencia')
+    parser_treinar.add_argument('--parada', choices=PARADAS, default='global',
+                                help='regra de parada do motor particionado')
+    parser_treinar.add_argument('--algoritmo', default='ball_tree', help='algoritmo do NearestNeighbors')
+    parser_treinar.add_argument('--metrica', help='métrica de distância')
+    parser_treinar.add_argument('--n-jobs', type=int, default=1, help='threads da busca de vizinhos')
+    parser_treinar.add_argument('--dtype', choices=sorted(TIPOS), default='float64')
+    parser_treinar.add_argument('--modo-enxuto', action='store_true', help='descarta os grafos k-associados')
+    parser_treinar.add_argument('--comprimir-duplicados', action='store_true',
+                                help='reúne as linhas com os mesmos atributos e a mesma classe em um vértice com peso')
+    parser_treinar.add_argument('--formato', choices=FORMATOS, help='formato das tabelas')
+    parser_treinar.add_argument('--tamanho-bloco', type=int, default=100_000, help='linhas lidas por vez')
+    parser_treinar.add_argument('--orcamento-memoria', type=_bytes,
+                                help='recusa a criação se o KAOG não couber nessa memória (ex.: 512M, 8G)')
+
+    parser_planejar = subparsers.add_parser('planejar', help='estima os recursos e escolhe a estratégia de criação')
+    parser_planejar.add_argument('entrada', help='arquivo CSV ou Parquet de treino')
+    parser_planejar.add_argument('--coluna-y', help='nome da coluna de classe')
+    parser_planejar.add_argument('--orcamento-memoria', type=_bytes,
+                                 help='memória disponível (ex.: 512M, 8G); por padrão, a memória livre')
+    parser_planejar.add_argument('--k-esperado', type=int, default=32, help='valor de k esperado ao fim')
+    parser_planejar.add_argument('--metrica', help='métrica de distância')
+    parser_planejar.add_argument('--dtype', choices=sorted(TIPOS), default='float64')
+    parser_planejar.add_argument('--n-jobs', type=int, default=-1, help='quantidade máxima de threads')
+    parser_planejar.add_argument('--tamanho-bloco', type=int, default=100_000, help='linhas lidas por vez')
+
+    parser_classificar = subparsers.add_parser('classificar', aliases=['predict'],
+                                               help='classifica um arquivo com um modelo salvo')
+    parser_classificar.add_argument('modelo', help='modelo salvo por `kaog treinar`')
+    parser_classificar.add_argument('entrada', help='arquivo CSV ou Parquet a ser classificado')
+    parser_classificar.add_argument('saida', help='arquivo CSV ou Parquet de saída')
+    parser_classificar.add_argument('--probabilidades', action='store_true',
+                                    help='também escreve a probabilidade de cada classe')
+    parser_classificar.add_argument('--tamanho-bloco', type=int, default=100_000, help='linhas classificadas por vez')
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Ponto de entrada do comando `kaog`.
+
+    :param argv: Argumentos. Por padrão, os da linha de comando.
+    :type argv: List[str]
+    :return: Código de saída.
+    :rtype: int
+    """
+    args = _criar_parser().parse_args(argv)
+    try:
+        if args.comando in ('treinar', 'fit'):
+            relatorio = treinar(args.entrada, args.saida, args.coluna_y, args.colunas_categoricas, args.tamanho_bloco,
+                                args.formato, args.orcamento_memoria, modo_enxuto=args.modo_enxuto,
+                                metrica=args.metrica, algoritmo=args.algoritmo, n_jobs=args.n_jobs,
+                                dtype=TIPOS[args.dtype], motor=args.motor, parada=args.parada,
+                                comprimir_duplicados=args.comprimir_duplicados)
+            print(json.dumps(relatorio['tempos'], indent=2))
+        elif args.comando == 'planejar':
+            n, d = dimensoes(args.entrada, args.coluna_y, args.tamanho_bloco)
+            print(planejar(n, d, args.orcamento_memoria, args.k_esperado, args.metrica, TIPOS[args.dtype],
+                           args.n_jobs))
+        else:
+            total = classificar(args.modelo, args.entrada, args.saida, args.tamanho_bloco, args.probabilidades)
+            print(f'{total} pontos classificados em {args.saida}')
+    except MemoryError as erro:
+        print(erro, file=sys.stderr)
+        return 1
+    return 0
+
+
+def _bytes(valor: str) -> int:
+    """Converte uma quantidade de memória, como `512M` ou `8G`, em bytes."""
+    unidades = {'K': 2 ** 10, 'M': 2 ** 20, 'G': 2 ** 30, 'T': 2 ** 40}
+    valor = valor.strip().upper().rstrip('B').rstrip('I')
+    if valor and valor[-1] in unidades:
+        return int(float(valor[:-1]) * unidades[valor[-1]])
+    return int(valor)
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,167 @@
+"""Comitê (*bagging*) de classificadores KAOG, com o cálculo de distâncias compartilhado entre os membros."""
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from kaog.distancias import Distancias
+from kaog.kaog import KAOG
+from kaog.util import ColunaYSingleton
+
+
+class ComiteKAOG:
+    """Comitê de classificadores KAOG treinados sobre amostras das linhas e/ou dos atributos.
+
+    **ComiteKAOG**
+
+    Os membros que usam todos os atributos compartilham uma única busca de vizinhos sobre o conjunto completo: os
+    vizinhos de cada membro são obtidos por :meth:`kaog.distancias.Distancias.subconjunto`, sem uma nova busca. Os
+    membros com amostragem de atributos calculam as suas próprias distâncias. Os membros são treinados em paralelo.
+
+    Com `bootstrap`, cada linha sorteada mais de uma vez é um único vértice, com peso igual à quantidade de sorteios
+    (`pesos` de :class:`kaog.KAOG`), o que requer o motor vetorizado ou particionado.
+
+    A probabilidade de cada classe é a média das probabilidades de :meth:`kaog.KAOG.predict_proba` dos membros.
+
+    **Atributos**
+    membros
+        Classificadores KAOG do comitê.
+    linhas_membros
+        Posições das linhas de `data` usadas por cada membro.
+    pesos_membros
+        Quantidade de vezes que cada linha de cada membro foi sorteada, ou `None` para os membros sem `bootstrap`.
+    atributos_membros
+        Atributos usados por cada membro.
+    classes
+        Classes presentes em `data`.
+    """
+
+    def __init__(self, data: pd.DataFrame, n_membros: int = 25, fracao_linhas: float = 1.0, bootstrap: bool = True,
+                 fracao_atributos: float = 1.0, random_state: Optional[int] = None, max_workers: Optional[int] = None,
+                 coluna_y: Optional[str] = None, colunas_categoricas: pd.Index = pd.Index([]),
+                 distancias: Optional[Distancias] = None, **kwargs):
+        """
+        Todos os membros são criados aqui.
+
+        :param data: Conjunto de dados contendo também a coluna de classe.
+        :type data: pandas.DataFrame
+        :param n_membros: Quantidade de membros.
+        :type n_membros: int
+        :param fracao_linhas: Fração das linhas sorteadas para cada membro.
+        :type fracao_linhas: float
+        :param bootstrap: Se `True`, as linhas são sorteadas com reposição e cada linha distinta sorteada é um vértice
+            com peso igual à quantidade de sorteios. Caso contrário, são sorteadas sem reposição.
+        :type bootstrap: bool
+        :param fracao_atributos: Fração dos atributos sorteados, sem reposição, para cada membro. Com valor menor que 1,
+            cada membro calcula as suas próprias distâncias.
+        :type fracao_atributos: float
+        :param random_state: Semente do sorteio.
+        :type random_state: int
+        :param max_workers: Quantidade máxima de threads usadas no treinamento.
+        :type max_workers: int
+        :param coluna_y: Nome da coluna de classe. Por padrão, `ColunaYSingleton().NOME_COLUNA_Y`.
+        :type coluna_y: str
+        :param colunas_categoricas: Colunas de `data` com dados categóricos.
+        :type colunas_categoricas: pandas.Index
+        :param distancias: Distâncias e vizinhos já calculados para todos os pontos de `data`, compartilhados pelos
+            membros que usam todos os atributos. Por padrão, são calculados aqui.
+        :type distancias: Distancias
+        :param kwargs: Demais parâmetros de :class:`kaog.KAOG`, como `metrica`, `motor` e `dtype`. Por padrão, o motor
+            é o vetorizado, com o mesmo grafo ótimo do motor de referência.
+        :raises ValueError: Se alguma fração estiver fora do intervalo (0, 1] ou se `bootstrap` for usado com o motor
+            de referência, que não aceita pesos.
+        """
+        if not 0 < fracao_linhas <= 1 or not 0 < fracao_atributos <= 1:
+            raise ValueError('As frações de linhas e de atributos devem estar no intervalo (0, 1].')
+        kwargs.setdefault('motor', 'vetorizado')
+        if bootstrap and kwargs['motor'] == 'referencia':
+            raise ValueError('O bootstrap usa pesos nos vértices, que requerem o motor vetorizado ou particionado.')
+        self.data = data
+        self.coluna_y = ColunaYSingleton().NOME_COLUNA_Y if coluna_y is None else coluna_y
+        self.cat_cols = colunas_categoricas
+        self.kwargs = kwargs
+        self.classes = pd.Index(pd.unique(data[self.coluna_y]))
+
+        rng = np.random.default_rng(random_state)
+        atributos = data.columns.drop(self.coluna_y)
+        sorteios = [self._sortear_linhas(rng, len(data), fracao_linhas, bootstrap) for _ in range(n_membros)]
+        self.linhas_membros = [linhas for linhas, _ in sorteios]
+        self.pesos_membros = [pesos for _, pesos in sorteios]
+        self.atributos_membros = [self._sortear_atributos(rng, atributos, fracao_atributos)
+                                  for _ in range(n_membros)]
+
+        if distancias is None and any(len(a) == len(atributos) for a in self.atributos_membros):
+            distancias = self._criar_distancias(atributos, np.arange(len(data)))
+        self._dist = distancias
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self._criar_membro, linhas, pesos, atributos_membro)
+                       for linhas, pesos, atributos_membro in zip(self.linhas_membros, self.pesos_membros,
+                                                                  self.atributos_membros)]
+            self.membros: List[KAOG] = [future.result() for future in futures]
+
+    def predict_proba(self, x: pd.DataFrame) -> pd.DataFrame:
+        """
+        Média das probabilidades de cada classe calculadas pelos membros.
+
+        :param x: Pontos a serem classificados, com os atributos de `data`.
+        :type x: pandas.DataFrame
+        :return: Probabilidade de cada classe (colunas) para cada ponto (linhas).
+        :rtype: pandas.DataFrame
+        """
+        probabilidades = np.zeros((len(x), len(self.classes)))
+        for membro, atributos in zip(self.membros, self.atributos_membros):
+            proba = membro.predict_proba(x[atributos])
+            # Um membro pode não ter todas as classes na sua amostra
+            probabilidades[:, self.classes.get_indexer(proba.columns)] += proba.to_numpy()
+        probabilidades /= len(self.membros)
+        return pd.DataFrame(probabilidades, index=x.index, columns=self.classes)
+
+    def predict(self, x: pd.DataFrame) -> pd.Series:
+        """
+        Classe mais provável de cada ponto, conforme :meth:`predict_proba`.
+
+        :param x: Pontos a serem classificados, com os atributos de `data`.
+        :type x: pandas.DataFrame
+        :return: Classe de cada ponto.
+        :rtype: pandas.Series
+        """
+        probabilidades = self.predict_proba(x)
+        return pd.Series(self.classes[probabilidades.to_numpy().argmax(axis=1)], index=x.index, name=self.coluna_y)
+
+    @staticmethod
+    def _sortear_linhas(rng: np.random.Generator, n: int, fracao: float,
+                        bootstrap: bool) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Posições, ordenadas e sem repetições, das linhas de um membro e, com `bootstrap`, quantidade de vezes que cada
+        uma foi sorteada.
+        """
+        tamanho = max(2, int(round(fracao * n)))
+        if bootstrap:
+            return np.unique(rng.integers(0, n, tamanho), return_counts=True)
+        return np.sort(rng.choice(n, min(tamanho, n), replace=False)), None
+
+    @staticmethod
+    def _sortear_atributos(rng: np.random.Generator, atributos: pd.Index, fracao: float) -> pd.Index:
+        """Atributos de um membro, na ordem original."""
+        if fracao == 1:
+            return atributos
+        tamanho = max(1, int(round(fracao * len(atributos))))
+        return atributos[np.sort(rng.choice(len(atributos), tamanho, replace=False))]
+
+    def _criar_distancias(self, atributos: pd.Index, linhas: np.ndarray) -> Distancias:
+        """Calcula as distâncias e vizinhos dos pontos e atributos escolhidos."""
+        return Distancias(self.data.iloc[linhas][atributos], self.cat_cols.intersection(atributos),
+                          self.kwargs.get('metrica'), self.kwargs.get('algoritmo', 'ball_tree'),
+                          self.kwargs.get('n_jobs', 1), self.kwargs.get('dtype', np.float64))
+
+    def _criar_membro(self, linhas: np.ndarray, pesos: Optional[np.ndarray], atributos: pd.Index) -> KAOG:
+        """Treina um membro, derivando os vizinhos das distâncias compartilhadas quando usa todos os atributos."""
+        if len(atributos) == len(self.data.columns) - 1:
+            distancias = self._dist.subconjunto(linhas)
+        else:
+            distancias = self._criar_distancias(atributos, linhas)
+        data = self.data.iloc[linhas][atributos.append(pd.Index([self.coluna_y]))]
+        return KAOG(data, self.cat_cols.intersection(atributos), coluna_y=self.coluna_y, distancias=distancias,
+                    pesos=pesos, **self.kwargs)
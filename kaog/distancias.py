@@ -1,38 +1,214 @@
+import copy
 import logging
+import os
 from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Callable, Union
 
 import numpy as np
 import pandas as pd
+from scipy import sparse
+from scipy.spatial import distance
+from sklearn.metrics import DistanceMetric
+from sklearn.metrics.pairwise import paired_distances
 from sklearn.neighbors import NearestNeighbors
 
+from kaog.util.codificacao import CodificadorCategorico
+
+Matriz = Union[pd.DataFrame, np.ndarray, sparse.spmatrix]
+# Métricas calculadas pelo `paired_distances` do scikit-learn, que aceita matrizes esparsas
+_METRICAS_PAREADAS = {'euclidean': 'euclidean', 'l2': 'euclidean', 'minkowski': 'euclidean',
+                      'manhattan': 'manhattan', 'cityblock': 'manhattan', 'l1': 'manhattan', 'cosine': 'cosine'}
+
 
 class Distancias:
     """Cálculo de distancias entre pontos e os vizinhos mais próximos.
 
     **Distancias**
 
-    Método de cálculo de distâncias entre pontos por meio da métrica definida em `METRIC`.
+    Método de cálculo de distâncias entre pontos por meio da métrica definida em `metrica`.
 
     **Atributos**
     METRIC
-        Métrica de cálculo de distâncias. Pode ser definida como uma função ou como um nome de métrica reconhecida pelo
-        NearestNeighbors.
+        Métrica padrão de cálculo de distâncias, usada quando nenhuma métrica é passada ao construtor. Pode ser definida
+        como uma função ou como um nome de métrica reconhecida pelo NearestNeighbors.
 
     """
     METRIC: Union[str, Callable] = 'euclidean'
+    TAMANHO_BLOCO_ORDENACAO = 1024
+    TAMANHO_BLOCO_CONSULTAS = 1024
+    TAMANHO_BLOCO_PARES = 65536
 
-    def __init__(self, x: pd.DataFrame, colunas_categoricas: pd.Index = pd.Index([])):
+    def __init__(self, x: Matriz, colunas_categoricas: pd.Index = pd.Index([]),
+                 metrica: Union[str, Callable] = None, algoritmo: str = 'ball_tree', n_jobs: int = 1,
+                 dtype: Union[type, np.dtype] = np.float64, codificador: CodificadorCategorico = None):
         """
         Recebe o DataFrame com os pontos que serão calculadas as distâncias.
 
-        :param x: Dados de entrada, sem informação de classes.
-        :type x: pandas.DataFrame
+        A configuração é mantida por instância, permitindo que objetos com métricas diferentes sejam criados ao mesmo
+        tempo em threads distintas.
+
+        :param x: Dados de entrada, sem informação de classes. Também pode ser um `numpy.ndarray` ou uma matriz esparsa
+            do scipy, usados sem cópia e sem conversão para DataFrame. Nesse caso, os pontos são indexados pela posição.
+        :type x: Union[pandas.DataFrame, numpy.ndarray, scipy.sparse.spmatrix]
+        :param colunas_categoricas: Colunas de `x` com dados categóricos. Apenas para DataFrames.
+        :type colunas_categoricas: pandas.Index
+        :param metrica: Métrica de cálculo de distâncias. Por padrão, `METRIC`.
+        :type metrica: Union[str, Callable]
+        :param algoritmo: Algoritmo usado pelo NearestNeighbors. Para matrizes esparsas, é sempre usado `'brute'`, que
+            calcula as distâncias diretamente sobre a matriz esparsa.
+        :type algoritmo: str
+        :param n_jobs: Quantidade de threads usadas na busca dos vizinhos, cada uma processando um bloco de consultas.
+            Com `-1` ou `None`, é usada uma thread por núcleo.
+        :type n_jobs: int
+        :param dtype: Tipo das distâncias armazenadas, `numpy.float64` ou `numpy.float32`. Com `numpy.float32`, os índices
+            dos vizinhos são armazenados como `numpy.int32`, reduzindo a memória pela metade. A ordenação é sempre feita
+            com as distâncias em precisão dupla, preservando os desempates.
+        :type dtype: Union[type, numpy.dtype]
+        :param codificador: Codificador das colunas categóricas já ajustado, por exemplo, compartilhado com outro objeto
+            criado a partir dos mesmos dados. Por padrão, é ajustado sobre `x`.
+        :type codificador: CodificadorCategorico
+        :raises ValueError: Se `dtype` não for `numpy.float64` ou `numpy.float32` ou se forem passadas colunas
+            categóricas com `x` que não seja um DataFrame.
+        """
+        self._configurar(x, colunas_categoricas, metrica, algoritmo, n_jobs, dtype, codificador)
+        self._distancias, self._vizinhos = self._calcular_distancias_e_vizinhos(self.x)
+
+    @classmethod
+    def pre_calculadas(cls, vizinhos: np.ndarray, distancias: np.ndarray, x: Matriz = None, indices: pd.Index = None,
+                       dtype: Union[type, np.dtype] = np.float64, **kwargs) -> 'Distancias':
+        """
+        Cria o objeto a partir de vizinhos já calculados, por exemplo, por uma biblioteca de busca especializada ou por
+        outra etapa do processamento, sem nenhuma busca de vizinhos.
+
+        Os vizinhos de cada ponto devem estar ordenados pela distância. Os empates são reordenados pelo índice do
+        vizinho, como na busca do próprio objeto. Com menos de n - 1 vizinhos por ponto, o KAOG é limitado a k = K, como
+        no modo enxuto.
+
+        :param vizinhos: Matriz (n, K) com as posições dos K vizinhos mais próximos de cada ponto, sem o próprio ponto.
+        :type vizinhos: numpy.ndarray
+        :param distancias: Matriz (n, K) com as distâncias correspondentes a `vizinhos`.
+        :type distancias: numpy.ndarray
+        :param x: Atributos dos pontos, usados apenas nas consultas de novos pontos e em :meth:`distancias_entre_pares`.
+            Por padrão, os pontos não têm atributos.
+        :type x: Union[pandas.DataFrame, numpy.ndarray, scipy.sparse.spmatrix]
+        :param indices: Índice de cada ponto, quando `x` não é passado. Por padrão, as posições.
+        :type indices: pandas.Index
+        :param dtype: Precisão das distâncias armazenadas, como no construtor.
+        :type dtype: Union[type, numpy.dtype]
+        :param kwargs: Demais parâmetros do construtor (`colunas_categoricas`, `metrica`, `algoritmo`, `n_jobs` e
+            `codificador`), usados nas consultas.
+        :return: Distâncias e vizinhos.
+        :rtype: Distancias
+        :raises ValueError: Se os arrays tiverem formatos diferentes ou incompatíveis com os pontos, se houver posições
+            inválidas, repetidas ou do próprio ponto, distâncias negativas ou não finitas, ou vizinhos fora de ordem.
         """
-        self.x = x.copy()
+        vizinhos = np.array(vizinhos, dtype=np.int64)
+        distancias = np.array(distancias, dtype=np.float64)
+        if vizinhos.ndim != 2 or vizinhos.shape != distancias.shape:
+            raise ValueError('Os vizinhos e as distâncias devem ser matrizes (n, K) com o mesmo formato.')
+        n, k = vizinhos.shape
+        if k > n - 1:
+            raise ValueError(f'Cada ponto tem no máximo {n - 1} vizinhos, mas foram passados {k}.')
+        if ((vizinhos < 0) | (vizinhos >= n)).any():
+            raise ValueError('Há posições de vizinhos fora do intervalo [0, n).')
+        if (vizinhos == np.arange(n)[:, None]).any():
+            raise ValueError('Um ponto não pode ser vizinho de si mesmo.')
+        if (np.diff(np.sort(vizinhos, axis=1), axis=1) == 0).any():
+            raise ValueError('Há vizinhos repetidos para um mesmo ponto.')
+        if not np.isfinite(distancias).all() or (distancias < 0).any():
+            raise ValueError('As distâncias devem ser finitas e não negativas.')
+        if (np.diff(distancias, axis=1) < 0).any():
+            raise ValueError('Os vizinhos de cada ponto devem estar ordenados pela distância.')
+
+        cls._ordenar(distancias, vizinhos)
+        return cls._de_arrays(vizinhos, distancias, x, indices, dtype, kwargs)
+
+    @classmethod
+    def de_matriz_distancias(cls, matriz: Union[np.ndarray, sparse.spmatrix], x: Matriz = None,
+                             indices: pd.Index = None, k: int = None, dtype: Union[type, np.dtype] = np.float64,
+                             **kwargs) -> 'Distancias':
+        """
+        Cria o objeto a partir de uma matriz de distâncias já calculada, sem nenhuma busca de vizinhos. A diagonal é
+        ignorada e os vizinhos são ordenados pela distância e pelo índice.
+
+        Em uma matriz esparsa, apenas os valores armazenados são distâncias, inclusive zeros explícitos, e as demais
+        posições não são vizinhos, como no `metric='precomputed'` do scikit-learn. Cada linha deve ter ao menos `k`
+        valores armazenados fora da diagonal.
+
+        :param matriz: Matriz (n, n) de distâncias, densa ou esparsa.
+        :type matriz: Union[numpy.ndarray, scipy.sparse.spmatrix]
+        :param x: Atributos dos pontos, como em :meth:`pre_calculadas`.
+        :type x: Union[pandas.DataFrame, numpy.ndarray, scipy.sparse.spmatrix]
+        :param indices: Índice de cada ponto, como em :meth:`pre_calculadas`.
+        :type indices: pandas.Index
+        :param k: Quantidade de vizinhos mantidos. Por padrão, n - 1 para matrizes densas e a menor quantidade de valores
+            armazenados em uma linha para matrizes esparsas.
+        :type k: int
+        :param dtype: Precisão das distâncias armazenadas, como no construtor.
+        :type dtype: Union[type, numpy.dtype]
+        :param kwargs: Demais parâmetros do construtor, como em :meth:`pre_calculadas`.
+        :return: Distâncias e vizinhos.
+        :rtype: Distancias
+        :raises ValueError: Se a matriz não for quadrada, se alguma linha esparsa tiver menos de `k` valores ou se as
+            distâncias forem negativas ou não finitas.
+        """
+        if matriz.ndim != 2 or matriz.shape[0] != matriz.shape[1]:
+            raise ValueError('A matriz de distâncias deve ser quadrada.')
+        n = matriz.shape[0]
+        if sparse.issparse(matriz):
+            matriz = sparse.csr_matrix(matriz)
+            vizinhos, distancias = _vizinhos_de_matriz_esparsa(matriz.tocoo(), k)
+        else:
+            matriz = np.asarray(matriz, dtype=np.float64)
+            vizinhos, distancias = _vizinhos_de_matriz_densa(matriz, n - 1 if k is None else k,
+                                                             cls.TAMANHO_BLOCO_ORDENACAO)
+        if not np.isfinite(distancias).all() or (distancias < 0).any():
+            raise ValueError('As distâncias devem ser finitas e não negativas.')
+        dist = cls._de_arrays(vizinhos, distancias, x, indices, dtype, kwargs)
+        # Sem atributos, a matriz responde às distâncias entre pares que não estão entre os k vizinhos
+        dist._matriz_distancias = matriz
+        return dist
+
+    @classmethod
+    def _de_arrays(cls, vizinhos: np.ndarray, distancias: np.ndarray, x: Matriz, indices: pd.Index,
+                   dtype: Union[type, np.dtype], configuracao: dict) -> 'Distancias':
+        """Cria o objeto com vizinhos e distâncias já validados e ordenados."""
+        if x is None:
+            x = pd.DataFrame(index=pd.RangeIndex(len(vizinhos)) if indices is None else indices)
+        elif x.shape[0] != len(vizinhos):
+            raise ValueError('A quantidade de pontos de `x` não corresponde à dos vizinhos.')
+        dist = cls.__new__(cls)
+        dist._configurar(x, configuracao.pop('colunas_categoricas', pd.Index([])), dtype=dtype, **configuracao)
+        dist._distancias = distancias.astype(dist.dtype, copy=False)
+        dist._vizinhos = vizinhos.astype(dist.dtype_indices, copy=False)
+        return dist
+
+    def _configurar(self, x: Matriz, colunas_categoricas: pd.Index, metrica: Union[str, Callable] = None,
+                    algoritmo: str = 'ball_tree', n_jobs: int = 1, dtype: Union[type, np.dtype] = np.float64,
+                    codificador: CodificadorCategorico = None):
+        """Atributos, índices e configuração da busca, com os parâmetros do construtor."""
+        self.dtype, self.dtype_indices = tipos_precisao(dtype)
+        self._indice = None
+        self._matriz_cache = None
+        self._matriz_distancias = None
+        if isinstance(x, pd.DataFrame):
+            self.x = x.copy()
+            self.indices = self.x.index
+        else:
+            if len(colunas_categoricas) > 0:
+                raise ValueError('Colunas categóricas só podem ser usadas com DataFrames.')
+            self.x = sparse.csr_matrix(x) if sparse.issparse(x) else np.asarray(x)
+            self.indices = pd.RangeIndex(self.x.shape[0])
         self.cat_cols = colunas_categoricas.copy()
+        if codificador is None:
+            codificador = CodificadorCategorico(self.cat_cols)
+            if isinstance(self.x, pd.DataFrame):
+                codificador.ajustar(self.x)
+        self.codificador = codificador
+        self.metrica = self.METRIC if metrica is None else metrica
+        self.algoritmo = 'brute' if sparse.issparse(self.x) else algoritmo
+        self.n_jobs = n_jobs
         self.index_map = self._create_map_pandas_to_numpy()
-        self._distancias, self._vizinhos = self._calcular_distancias_e_vizinhos(self.x)
 
     @property
     def distancias(self):
@@ -49,6 +225,64 @@ class Distancias:
         """Possibilita a conversão de índice da matriz para índice do DataFrame."""
         return {v: k for k, v in self.index_map.items()}
 
+    def truncado(self, k: int) -> 'Distancias':
+        """
+        Cria uma cópia que mantém apenas os `k` vizinhos mais próximos de cada ponto, descartando as demais colunas de
+        `distancias` e `vizinhos`. Reduz a memória de O(n²) para O(n * k). O objeto original não é alterado, podendo
+        continuar compartilhado.
+
+        :param k: Quantidade de vizinhos mantidos.
+        :type k: int
+        :return: Cópia com os vizinhos truncados.
+        :rtype: Distancias
+        """
+        truncado = copy.copy(self)
+        truncado._distancias = self._distancias[:, :k].copy()
+        truncado._vizinhos = self._vizinhos[:, :k].copy()
+        return truncado
+
+    def subconjunto(self, posicoes: np.ndarray) -> 'Distancias':
+        """
+        Cria as distâncias e vizinhos de um subconjunto dos pontos sem uma nova busca: os vizinhos de cada ponto são
+        filtrados, mantendo apenas os que pertencem ao subconjunto, e renumerados. Como a ordem relativa das posições é
+        preservada, o resultado é igual ao de um novo objeto criado com os mesmos pontos.
+
+        :param posicoes: Posições (índices da matriz) dos pontos do subconjunto, sem repetições.
+        :type posicoes: numpy.ndarray
+        :return: Distâncias e vizinhos dos pontos do subconjunto.
+        :rtype: Distancias
+        :raises ValueError: Se os vizinhos tiverem sido truncados ou se houver posições repetidas.
+        """
+        n = self.x.shape[0]
+        if self._vizinhos.shape[1] != n - 1:
+            raise ValueError('Não é possível criar um subconjunto a partir de vizinhos truncados.')
+        posicoes = np.sort(np.asarray(posicoes))
+        if len(np.unique(posicoes)) != len(posicoes):
+            raise ValueError('As posições do subconjunto não podem ser repetidas.')
+
+        m = len(posicoes)
+        nova_posicao = np.full(n, -1, dtype=self.dtype_indices)
+        nova_posicao[posicoes] = np.arange(m)
+        distancias = np.empty((m, m - 1), dtype=self.dtype)
+        vizinhos = np.empty((m, m - 1), dtype=self.dtype_indices)
+        for inicio in range(0, m, self.TAMANHO_BLOCO_ORDENACAO):
+            linhas = posicoes[inicio:inicio + self.TAMANHO_BLOCO_ORDENACAO]
+            v = self._vizinhos[linhas]
+            # Cada linha contém todos os demais pontos, então restam exatamente m - 1 vizinhos no subconjunto
+            mantidos = nova_posicao[v] >= 0
+            vizinhos[inicio:inicio + len(linhas)] = nova_posicao[v[mantidos]].reshape(len(linhas), m - 1)
+            distancias[inicio:inicio + len(linhas)] = self._distancias[linhas][mantidos].reshape(len(linhas), m - 1)
+
+        sub = copy.copy(self)
+        sub.x = self.x.iloc[posicoes] if isinstance(self.x, pd.DataFrame) else self.x[posicoes]
+        sub.indices = self.indices[posicoes]
+        sub.index_map = sub._create_map_pandas_to_numpy()
+        sub._indice = None
+        sub._matriz_cache = None
+        sub._matriz_distancias = None
+        sub._distancias, sub._vizinhos = distancias, vizinhos
+        return sub
+
     def k_vizinhos_mais_proximos_de(self, instancia: Union[pd.Series, int], k: int = None) -> np.ndarray:
         """
         Com base no índice do pandas e fazendo uso do mapa de índices, retorna os k-vizinhos mais próximos de um
@@ -72,6 +306,74 @@ class Distancias:
 
         return np.array(list(map(self.index_numpy_to_pandas, numpy_indice_)))
 
+    def vizinhos_de_consultas(self, consultas: pd.DataFrame, k: int) -> (np.ndarray, np.ndarray):
+        """
+        Busca, em lote, os `k` vizinhos mais próximos de pontos que não pertencem a `self.x`, sem recalcular as
+        distâncias entre os pontos de `self.x`.
+
+        Os empates são desfeitos pelo índice também no k-ésimo vizinho, como na matriz de vizinhos: quando outros pontos
+        estão à mesma distância do k-ésimo, todos os pontos até essa distância são buscados, as suas distâncias são
+        calculadas diretamente a partir dos atributos e os `k` primeiros por distância e índice são mantidos. Assim, o
+        resultado não depende de `algoritmo`.
+
+        :param consultas: Pontos buscados, com as mesmas colunas de `self.x`.
+        :type consultas: pandas.DataFrame
+        :param k: Quantidade de vizinhos.
+        :type k: int
+        :return: Distâncias e posições (índices da matriz) dos vizinhos de cada consulta, ordenados pela distância e pelo
+            índice.
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+        """
+        consultas = self._codificar_consultas(consultas)
+        if sparse.issparse(consultas):
+            consultas = sparse.csr_matrix(consultas)
+        distancias, vizinhos = self.indice.kneighbors(consultas, n_neighbors=min(k + 1, self.x.shape[0]))
+        if distancias.shape[1] > k:
+            # O (k + 1)-ésimo vizinho à mesma distância do k-ésimo indica um empate na fronteira, que a árvore não
+            # desfaz pelo índice
+            limites = distancias[:, k - 1]
+            empatadas = np.flatnonzero(distancias[:, k] <= limites + _tolerancia_empate(limites))
+            distancias, vizinhos = distancias[:, :k].copy(), vizinhos[:, :k].copy()
+            if len(empatadas):
+                self._desempatar(consultas, empatadas, limites[empatadas], distancias, vizinhos)
+        self._ordenar(distancias, vizinhos)
+        return distancias.astype(self.dtype, copy=False), vizinhos.astype(self.dtype_indices, copy=False)
+
+    def _desempatar(self, consultas: Matriz, linhas: np.ndarray, limites: np.ndarray, distancias: np.ndarray,
+                    vizinhos: np.ndarray):
+        """
+        Substitui, nas `linhas` indicadas, os vizinhos pelos `k` primeiros, por distância e índice, dentre todos os
+        pontos até a distância do k-ésimo vizinho.
+        """
+        k = vizinhos.shape[1]
+        raios = limites + _tolerancia_empate(limites)
+        for raio in np.unique(raios):
+            grupo = linhas[raios == raio]
+            _, candidatos = self.indice.radius_neighbors(consultas[grupo], radius=raio)
+            for linha, pontos in zip(grupo, candidatos):
+                # As distâncias da árvore podem diferir nos últimos dígitos; o desempate usa o cálculo direto
+                calculadas = _distancias_pareadas(self._matriz_pares[pontos],
+                                                  consultas[np.full(len(pontos), linha)], self.metrica)
+                ordem = np.lexsort((pontos, calculadas))[:k]
+                distancias[linha], vizinhos[linha] = calculadas[ordem], pontos[ordem]
+
+    @property
+    def indice(self) -> NearestNeighbors:
+        """Índice de busca sobre os pontos de `self.x`, criado no primeiro acesso e usado nas consultas."""
+        if self._indice is None:
+            if self.x.shape[1] == 0:
+                raise ValueError('As consultas requerem os atributos dos pontos, que não foram passados.')
+            self._indice = NearestNeighbors(metric=self.metrica, algorithm=self.algoritmo, n_jobs=self.n_jobs).fit(
+                self._matriz(self.x)
+            )
+        return self._indice
+
+    def _codificar_consultas(self, consultas: Matriz) -> Matriz:
+        """Converte as colunas categóricas das consultas com os mesmos códigos usados em `self.x`."""
+        if not isinstance(self.x, pd.DataFrame):
+            return consultas
+        return self._categoricos_para_numericos(consultas[self.x.columns]).to_numpy()
+
     def distancias_de(self, indice: Union[pd.Series, int]) -> np.ndarray:
         """
         Retorna as distâncias de um ponto para todos os outros.
@@ -97,10 +399,94 @@ class Distancias:
         """
         indice_1 = self._determinar_indice(indice_1)
         indice_2 = self._determinar_indice(indice_2)
+        return float(self.distancias_entre_pares([indice_1], [indice_2])[0])
 
-        vizinhos_1 = self.k_vizinhos_mais_proximos_de(indice_1)
-        pos = np.where(vizinhos_1 == indice_2)[0][0]
-        return self.distancias_de(indice_1)[pos]
+    def distancias_entre_pares(self, indices_1, indices_2, posicoes: bool = False) -> np.ndarray:
+        """
+        Calcula a distância entre cada par de pontos (`indices_1[i]`, `indices_2[i]`), diretamente a partir dos
+        atributos, sem consultar a matriz de vizinhos. Os pares são processados em blocos de `TAMANHO_BLOCO_PARES`.
+        Quando os pontos não têm atributos (:meth:`pre_calculadas` e :meth:`de_matriz_distancias` sem `x`), as
+        distâncias são obtidas da matriz de distâncias passada ou dos vizinhos armazenados.
+
+        Útil para calcular, por exemplo, o comprimento de todas as arestas de um grafo em uma única chamada.
+
+        :param indices_1: Primeiro ponto de cada par.
+        :type indices_1: array-like
+        :param indices_2: Segundo ponto de cada par.
+        :type indices_2: array-like
+        :param posicoes: Se `True`, os pontos são dados pelas posições (índices da matriz), e não pelo índice do pandas.
+        :type posicoes: bool
+        :return: Distância de cada par.
+        :rtype: numpy.ndarray
+        :raises KeyError: Se algum índice não pertencer a `self.x`.
+        :raises ValueError: Se `indices_1` e `indices_2` tiverem tamanhos diferentes ou se os pontos não tiverem
+            atributos e a distância de algum par não estiver armazenada.
+        """
+        posicoes_1 = self._posicoes(indices_1, posicoes)
+        posicoes_2 = self._posicoes(indices_2, posicoes)
+        if len(posicoes_1) != len(posicoes_2):
+            raise ValueError('Os dois arrays de índices devem ter o mesmo tamanho.')
+        if self.x.shape[1] == 0:
+            return self._distancias_armazenadas(posicoes_1, posicoes_2).astype(self.dtype, copy=False)
+
+        x = self._matriz_pares
+        resultado = np.empty(len(posicoes_1), dtype=self.dtype)
+        for inicio in range(0, len(posicoes_1), self.TAMANHO_BLOCO_PARES):
+            fim = inicio + self.TAMANHO_BLOCO_PARES
+            resultado[inicio:fim] = _distancias_pareadas(x[posicoes_1[inicio:fim]], x[posicoes_2[inicio:fim]],
+                                                         self.metrica)
+        return resultado
+
+    def _distancias_armazenadas(self, posicoes_1: np.ndarray, posicoes_2: np.ndarray) -> np.ndarray:
+        """
+        Distância de cada par de posições a partir da matriz passada a :meth:`de_matriz_distancias` ou, na falta dela,
+        das linhas de `vizinhos` de cada um dos dois pontos.
+        """
+        resultado = np.full(len(posicoes_1), np.nan)
+        resultado[posicoes_1 == posicoes_2] = 0
+        matriz = self._matriz_distancias
+        if sparse.issparse(matriz):
+            # Apenas os valores armazenados são distâncias, inclusive zeros explícitos
+            armazenados = matriz.copy()
+            armazenados.data = np.ones_like(armazenados.data)
+            encontrados = np.asarray(armazenados[posicoes_1, posicoes_2]).ravel() > 0
+            valores = np.asarray(matriz[posicoes_1, posicoes_2]).ravel()
+            resultado[encontrados] = valores[encontrados]
+        elif matriz is not None:
+            resultado = matriz[posicoes_1, posicoes_2].astype(np.float64)
+
+        bloco = max(1, self.TAMANHO_BLOCO_PARES // max(1, self._vizinhos.shape[1]))
+        for origem, destino in ((posicoes_1, posicoes_2), (posicoes_2, posicoes_1)):
+            faltantes = np.flatnonzero(np.isnan(resultado))
+            for inicio in range(0, len(faltantes), bloco):
+                pares = faltantes[inicio:inicio + bloco]
+                iguais = self._vizinhos[origem[pares]] == destino[pares, None]
+                encontrados = iguais.any(axis=1)
+                resultado[pares[encontrados]] = self._distancias[origem[pares[encontrados]],
+                                                                 iguais.argmax(axis=1)[encontrados]]
+
+        if np.isnan(resultado).any():
+            par = np.flatnonzero(np.isnan(resultado))[0]
+            raise ValueError(f'A distância entre os pontos {self.indices[posicoes_1[par]]} e '
+                             f'{self.indices[posicoes_2[par]]} não está armazenada, e o cálculo requer os atributos '
+                             f'dos pontos, que não foram passados.')
+        return resultado
+
+    @property
+    def _matriz_pares(self) -> Union[np.ndarray, sparse.csr_matrix]:
+        """Matriz numérica de `self.x`, criada no primeiro uso por :meth:`distancias_entre_pares`."""
+        if self._matriz_cache is None:
+            self._matriz_cache = self._matriz(self.x)
+        return self._matriz_cache
+
+    def _posicoes(self, indices, posicoes: bool) -> np.ndarray:
+        """Converte índices do pandas em posições da matriz, de forma vetorizada."""
+        if posicoes:
+            return np.asarray(indices, dtype=np.int64)
+        resultado = self.indices.get_indexer(pd.Index(indices))
+        if (resultado < 0).any():
+            raise KeyError(f'Índices não encontrados: {list(pd.Index(indices)[resultado < 0][:10])}')
+        return resultado
 
     @staticmethod
     def _determinar_indice(instancia: Union[pd.Series, int]) -> int:
@@ -118,22 +504,26 @@ class Distancias:
             indice = instancia
         return indice
 
-    @staticmethod
-    def _ordenar(distances, kneighbors):
+    @classmethod
+    def _ordenar(cls, distances, kneighbors):
         """
         Ordena os arrays de distâncias e vizinhos mais próximos, de forma que estejam ordenados de forma crescente pela
         distância e em seguida ordenados pelos índices dos vizinhos.
         Isso garante que se houver empate no valor da distância, será considerado a ordem dos índices dos vizinhos.
 
+        As linhas são ordenadas em blocos de `TAMANHO_BLOCO_ORDENACAO`, limitando a memória auxiliar.
+
         :param distances: Array com as distâncias entre os pontos.
         :type distances: numpy.ndarray
         :param kneighbors: Array com os índices dos vizinhos mais próximos.
         :type kneighbors: numpy.ndarray
         """
-        for i, (d, k_) in enumerate(zip(distances, kneighbors)):
-            sort_idx = np.lexsort((k_, d))
-            distances[i] = d[sort_idx]
-            kneighbors[i] = k_[sort_idx]
+        for inicio in range(0, distances.shape[0], cls.TAMANHO_BLOCO_ORDENACAO):
+            d = distances[inicio:inicio + cls.TAMANHO_BLOCO_ORDENACAO]
+            k_ = kneighbors[inicio:inicio + cls.TAMANHO_BLOCO_ORDENACAO]
+            sort_idx = np.lexsort((k_, d), axis=-1)
+            d[:] = np.take_along_axis(d, sort_idx, axis=-1)
+            k_[:] = np.take_along_axis(k_, sort_idx, axis=-1)
 
     def _vizinhos_com_instancia(self, instancia, k):
         """
@@ -185,49 +575,67 @@ class Distancias:
         :rtype: Dict[int, int]
         :raises ValueError: Se existirem índices repetidos sem `self.x`.
         """
-        if self.x.index.duplicated().any():
+        if self.indices.duplicated().any():
             raise ValueError('Os índices não podem ser duplicados.')
-        return {k: v for v, k in enumerate(self.x.index)}
+        return {k: v for v, k in enumerate(self.indices)}
 
-    def _calcular_distancias_e_vizinhos(self, data: pd.DataFrame) -> (np.ndarray, np.ndarray):
+    def _calcular_distancias_e_vizinhos(self, data: Matriz) -> (np.ndarray, np.ndarray):
         """
         Cria um array de **todas** as distâncias entre os pontos de `self.x`, assim como os índices dos vizinhos mais
         próximos. Não leva em consideração as classes, apenas as distâncias.
 
-        :param data: DataFrame com os pontos.
-        :type data: pd.DataFrame
+        As consultas são divididas em blocos de `TAMANHO_BLOCO_CONSULTAS` linhas, processados por `n_jobs` threads. Cada
+        bloco é ordenado e escrito diretamente nos arrays de saída, alocados uma única vez, de forma que a memória
+        auxiliar é limitada ao tamanho dos blocos em processamento.
+
+        :param data: Pontos, em um DataFrame ou em uma matriz.
+        :type data: Union[pandas.DataFrame, numpy.ndarray, scipy.sparse.spmatrix]
         :return: Array de distâncias e array com os vizinhos mais próximos.
         :rtype: Tuple[numpy.ndarray, numpy.ndarray]
         """
-        k = data.shape[0]
-        x = self._categoricos_para_numericos(data)
+        n = data.shape[0]
+        x = self._matriz(data)
         logging.debug('Calculando distâncias e vizinhos...')
-        # distances = self._computar_distancias(x)
-        nn = NearestNeighbors(n_neighbors=k, metric=self.METRIC, n_jobs=1, algorithm='ball_tree').fit(x)
-
-        # Decrementa k para considerar o próprio ponto
-        distances, kneighbors = nn.kneighbors(n_neighbors=k - 1, return_distance=True)
+        nn = NearestNeighbors(metric=self.metrica, algorithm=self.algoritmo, n_jobs=1).fit(x)
+        distances = np.empty((n, n - 1), dtype=self.dtype)
+        kneighbors = np.empty((n, n - 1), dtype=self.dtype_indices)
+
+        def calcular_bloco(inicio: int):
+            fim = min(inicio + self.TAMANHO_BLOCO_CONSULTAS, n)
+            d, k_ = nn.kneighbors(x[inicio:fim], n_neighbors=n, return_distance=True)
+            # Todos os pontos são retornados, então basta remover o próprio ponto de cada linha
+            outros = k_ != np.arange(inicio, fim)[:, None]
+            d = d[outros].reshape(fim - inicio, n - 1)
+            k_ = k_[outros].reshape(fim - inicio, n - 1)
+            self._ordenar(d, k_)
+            # A conversão é feita após a ordenação, mantendo os desempates da precisão dupla
+            distances[inicio:fim] = d
+            kneighbors[inicio:fim] = k_
+
+        blocos = range(0, n, self.TAMANHO_BLOCO_CONSULTAS)
+        with ThreadPoolExecutor(max_workers=_quantidade_threads(self.n_jobs)) as executor:
+            list(executor.map(calcular_bloco, blocos))
         logging.debug('Distâncias calculadas.')
-        self._ordenar(distances, kneighbors)
         return distances, kneighbors
 
+    def _matriz(self, x: Matriz) -> Union[np.ndarray, sparse.csr_matrix]:
+        """Matriz numérica usada pelo NearestNeighbors. Matrizes são usadas diretamente, sem cópia."""
+        if isinstance(x, pd.DataFrame):
+            return self._categoricos_para_numericos(x).to_numpy()
+        return x
+
     def _categoricos_para_numericos(self, x: pd.DataFrame):
         """
         Converte os valores que estão em colunas categóricas para valores numéricos, permitindo que seja aplicada a
-        distância.
+        distância. Os códigos são os aprendidos pelo `codificador` nos dados de treino, de forma que um mesmo valor
+        sempre recebe o mesmo código, inclusive em consultas.
 
         :param x: Conjunto de dados, sem informação de classes.
         :type x: pandas.DataFrame
-        :return: Conjunto de dados, com valores numéricos.
+        :return: Conjunto de dados, com valores numéricos. Sem colunas categóricas, o próprio `x` é retornado, sem cópia.
         :rtype: pandas.DataFrame
         """
-        x = x.copy()
-        logging.debug('Realizando factorize dos dados...')
-        for col in self.cat_cols:
-            x[col] = pd.factorize(x[col])[0] + 1
-
-        logging.debug('Dados convertidos.')
-        return x
+        return self.codificador.transformar(x)
 
     def _computar_distancias(self, x):
 
@@ -235,7 +643,7 @@ class Distancias:
             for j in range(i + 1, range_):
                 idx_i = self.index_numpy_to_pandas(i)
                 idx_j = self.index_numpy_to_pandas(j)
-                distances[i, j] = self.METRIC(x.loc[idx_i], x.loc[idx_j])
+                distances[i, j] = self.metrica(x.loc[idx_i], x.loc[idx_j])
 
         # Usar a conversao de indice de numpy para pandas
         range_ = x.shape[0]
@@ -253,3 +661,96 @@ class Distancias:
             logging.debug("Futures finalizados")
 
         return distances
+
+
+def _distancias_pareadas(a: Union[np.ndarray, sparse.spmatrix], b: Union[np.ndarray, sparse.spmatrix],
+                         metrica: Union[str, Callable]) -> np.ndarray:
+    """Distância entre cada linha de `a` e a linha correspondente de `b`."""
+    # `paired_distances` não aceita matrizes esparsas; os blocos são pequenos o bastante para serem densificados
+    if sparse.issparse(a):
+        a, b = a.toarray(), b.toarray()
+    if metrica in _METRICAS_PAREADAS:
+        return paired_distances(a, b, metric=_METRICAS_PAREADAS[metrica])
+    if metrica == 'sqeuclidean':
+        return ((a - b) ** 2).sum(axis=1)
+    if metrica == 'chebyshev':
+        return np.abs(a - b).max(axis=1)
+    if not callable(metrica):
+        metrica = getattr(distance, metrica, None) or _metrica_sklearn(metrica)
+    return np.array([metrica(u, v) for u, v in zip(a, b)])
+
+
+def _tolerancia_empate(distancias: np.ndarray) -> np.ndarray:
+    """Diferença até a qual duas distâncias calculadas por caminhos diferentes são consideradas um empate."""
+    return 1e-9 * np.maximum(distancias, 1)
+
+
+def _metrica_sklearn(nome: str) -> Callable:
+    """Função de distância entre dois pontos para uma métrica do scikit-learn que não existe no scipy."""
+    calculo = DistanceMetric.get_metric(nome)
+    return lambda u, v: calculo.pairwise(u[None], v[None])[0, 0]
+
+
+def _quantidade_threads(n_jobs: Union[int, None]) -> int:
+    """Quantidade de threads para `n_jobs`, seguindo a convenção do scikit-learn para valores negativos."""
+    nucleos = os.cpu_count() or 1
+    if n_jobs is None or n_jobs == -1:
+        return nucleos
+    if n_jobs < 0:
+        return max(1, nucleos + 1 + n_jobs)
+    return n_jobs
+
+
+def _vizinhos_de_matriz_densa(matriz: np.ndarray, k: int, tamanho_bloco: int) -> (np.ndarray, np.ndarray):
+    """Os `k` vizinhos de cada linha de uma matriz de distâncias densa, sem a diagonal, ordenados em blocos de linhas."""
+    n = matriz.shape[0]
+    vizinhos = np.empty((n, k), dtype=np.int64)
+    distancias = np.empty((n, k))
+    for inicio in range(0, n, tamanho_bloco):
+        fim = min(inicio + tamanho_bloco, n)
+        linhas = np.arange(inicio, fim)
+        # A diagonal é removida pela posição, e não pelo valor
+        outros = np.ones((fim - inicio, n), dtype=bool)
+        outros[linhas - inicio, linhas] = False
+        d = matriz[inicio:fim][outros].reshape(fim - inicio, n - 1)
+        v = np.broadcast_to(np.arange(n), (fim - inicio, n))[outros].reshape(fim - inicio, n - 1)
+        ordem = np.lexsort((v, d), axis=-1)[:, :k]
+        distancias[inicio:fim] = np.take_along_axis(d, ordem, axis=-1)
+        vizinhos[inicio:fim] = np.take_along_axis(v, ordem, axis=-1)
+    return vizinhos, distancias
+
+
+def _vizinhos_de_matriz_esparsa(matriz: sparse.coo_matrix, k: Union[int, None]) -> (np.ndarray, np.ndarray):
+    """Os `k` vizinhos de cada linha dentre os valores armazenados de uma matriz de distâncias esparsa."""
+    n = matriz.shape[0]
+    fora_da_diagonal = matriz.row != matriz.col
+    linhas, colunas = matriz.row[fora_da_diagonal], matriz.col[fora_da_diagonal]
+    valores = np.asarray(matriz.data[fora_da_diagonal], dtype=np.float64)
+    quantidades = np.bincount(linhas, minlength=n)
+    k = int(quantidades.min()) if k is None else k
+    if quantidades.min() < k:
+        raise ValueError(f'Há linhas com menos de {k} distâncias armazenadas fora da diagonal.')
+
+    ordem = np.lexsort((colunas, valores, linhas))
+    linhas, colunas, valores = linhas[ordem], colunas[ordem], valores[ordem]
+    posicao_na_linha = np.arange(len(linhas)) - np.repeat(np.cumsum(quantidades) - quantidades, quantidades)
+    mantidos = posicao_na_linha < k
+    return colunas[mantidos].astype(np.int64).reshape(n, k), valores[mantidos].reshape(n, k)
+
+
+def tipos_precisao(dtype: Union[type, np.dtype]) -> (np.dtype, np.dtype):
+    """
+    Tipos das distâncias e dos índices para a precisão escolhida.
+
+    :param dtype: `numpy.float64` ou `numpy.float32`.
+    :type dtype: Union[type, numpy.dtype]
+    :return: Tipo das distâncias e tipo dos índices (`numpy.int64` ou `numpy.int32`).
+    :rtype: Tuple[numpy.dtype, numpy.dtype]
+    :raises ValueError: Se `dtype` não for `numpy.float64` ou `numpy.float32`.
+    """
+    dtype = np.dtype(dtype)
+    if dtype == np.float64:
+        return dtype, np.dtype(np.int64)
+    if dtype == np.float32:
+        return dtype, np.dtype(np.int32)
+    raise ValueError(f'O tipo {dtype} não é suportado, use numpy.float64 ou numpy.float32.')
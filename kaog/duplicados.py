@@ -0,0 +1,50 @@
+"""
+Compressão de pontos duplicados.
+
+Pontos com os mesmos atributos e a mesma classe são reunidos em um único vértice, com peso igual à quantidade de pontos
+reunidos. A busca de vizinhos e os grafos passam a ser criados apenas sobre os pontos distintos, e a pureza, a taxa e a
+classificação consideram os pesos (:class:`kaog.grafo_vetorizado.GrafoKAssociadoVetorizado` e
+:func:`kaog.kaog.probabilidades_bertini`).
+
+O resultado é uma aproximação do KAOG sobre os dados originais: nos dados originais, as cópias de um ponto são as suas
+vizinhas mais próximas, à distância zero, e ocupam parte dos k vizinhos de cada cópia. Pontos com os mesmos atributos e
+classes diferentes continuam em vértices distintos.
+"""
+from typing import Tuple, Union
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+def agrupar_duplicados(x: Union[pd.DataFrame, np.ndarray],
+                       y: Union[np.ndarray, pd.Series]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Agrupa as linhas com os mesmos atributos e a mesma classe.
+
+    :param x: Atributos, em um DataFrame (inclusive com colunas categóricas) ou em uma matriz densa.
+    :type x: Union[pandas.DataFrame, numpy.ndarray]
+    :param y: Classe de cada linha.
+    :type y: Union[numpy.ndarray, pandas.Series]
+    :return: Posição da primeira linha de cada grupo (o representante), em ordem crescente, grupo de cada linha,
+        numerado na ordem dos representantes, e quantidade de linhas de cada grupo.
+    :rtype: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+    :raises ValueError: Se `x` for uma matriz esparsa ou se `x` e `y` tiverem tamanhos diferentes.
+    """
+    if sparse.issparse(x):
+        raise ValueError('A compressão de duplicados não é suportada para matrizes esparsas.')
+    if x.shape[0] != len(y):
+        raise ValueError('Os atributos e as classes devem ter a mesma quantidade de linhas.')
+    codigos_y = pd.factorize(np.asarray(y))[0]
+    if isinstance(x, pd.DataFrame):
+        linhas = x.reset_index(drop=True).assign(**{'__classe__': codigos_y})
+        # Com sort=False, os grupos são numerados na ordem em que aparecem pela primeira vez
+        grupos = linhas.groupby(list(linhas.columns), sort=False, dropna=False).ngroup().to_numpy()
+    else:
+        linhas = np.column_stack([np.asarray(x), codigos_y])
+        _, primeiras, grupos = np.unique(linhas, axis=0, return_index=True, return_inverse=True)
+        ordem = np.empty(len(primeiras), dtype=np.int64)
+        ordem[np.argsort(primeiras, kind='stable')] = np.arange(len(primeiras))
+        grupos = ordem[grupos.ravel()]
+    representantes = np.unique(grupos, return_index=True)[1]
+    return representantes, grupos, np.bincount(grupos)
@@ -0,0 +1,319 @@
+"""
+Testes diferenciais entre a implementação de referência do KAOG e os caminhos otimizados.
+
+Qualquer caminho mais rápido de :class:`kaog.distancias.Distancias`, :class:`kaog.k_associado.KAssociado` ou
+:class:`kaog.grafo_otimo.GrafoOtimo` deve resultar nos mesmos vizinhos, com os mesmos desempates, nas mesmas arestas,
+nos mesmos componentes e no mesmo valor de k de cada componente. :func:`gerar_conjunto` cria conjuntos aleatórios com
+muitos empates exatos e pontos duplicados, :func:`comparar` descreve as diferenças entre dois modelos e
+:func:`verificar_caminhos` executa a referência e cada caminho otimizado sobre o mesmo conjunto.
+
+Os caminhos aproximados (parada por classe, protótipos, redução de dimensionalidade e compressão de duplicados) não
+precisam ser idênticos: as suas diferenças são medidas como frações e verificadas com
+:meth:`Diferencas.dentro_da_tolerancia`.
+"""
+import os
+import tempfile
+from typing import Dict, FrozenSet, Optional, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from kaog.fora_de_memoria import KAOGForaDeMemoria
+from kaog.kaog import KAOG
+from kaog.prototipos import SelecaoPrototipos
+from kaog.reducao import ReducaoDimensionalidade
+from kaog.util import ColunaYSingleton
+
+Modelo = Union[KAOG, KAOGForaDeMemoria]
+CAMINHOS_EXATOS = ('vetorizado', 'particionado', 'float32', 'matriz', 'reajustar_classes', 'fora_de_memoria')
+CAMINHOS_APROXIMADOS = ('parada_por_classe', 'prototipos', 'reducao', 'duplicados')
+
+
+def gerar_conjunto(n: int = 100, d: int = 2, n_classes: int = 3, valores_distintos: int = 6,
+                   fracao_duplicatas: float = 0.2, ruido_classes: float = 0.1, coluna_y: Optional[str] = None,
+                   random_state: Optional[int] = None) -> pd.DataFrame:
+    """
+    Gera um conjunto com atributos inteiros em uma grade pequena, de forma que muitas distâncias sejam exatamente
+    iguais, e com uma fração de pontos duplicados, possivelmente de outra classe.
+
+    :param n: Quantidade de pontos.
+    :type n: int
+    :param d: Quantidade de atributos.
+    :type d: int
+    :param n_classes: Quantidade de classes.
+    :type n_classes: int
+    :param valores_distintos: Quantidade de valores inteiros possíveis de cada atributo.
+    :type valores_distintos: int
+    :param fracao_duplicatas: Fração dos pontos que são cópias dos atributos de outros pontos.
+    :type fracao_duplicatas: float
+    :param ruido_classes: Fração dos pontos cuja classe é sorteada, em vez de definida pelo centro mais próximo.
+    :type ruido_classes: float
+    :param coluna_y: Nome da coluna de classe. Por padrão, `ColunaYSingleton().NOME_COLUNA_Y`.
+    :type coluna_y: str
+    :param random_state: Semente do sorteio.
+    :type random_state: int
+    :return: Conjunto de dados, com índice de 0 a n - 1.
+    :rtype: pandas.DataFrame
+    """
+    coluna_y = ColunaYSingleton().NOME_COLUNA_Y if coluna_y is None else coluna_y
+    rng = np.random.default_rng(random_state)
+    x = rng.integers(0, valores_distintos, size=(n, d))
+    duplicatas = rng.choice(n, int(round(fracao_duplicatas * n)), replace=False)
+    x[duplicatas] = x[rng.integers(0, n, len(duplicatas))]
+
+    centros = rng.uniform(0, valores_distintos - 1, size=(n_classes, d))
+    y = np.argmin(((x[:, None, :] - centros[None]) ** 2).sum(axis=2), axis=1)
+    ruidosos = rng.random(n) < ruido_classes
+    y[ruidosos] = rng.integers(0, n_classes, np.count_nonzero(ruidosos))
+
+    data = pd.DataFrame(x.astype(np.float64), columns=[f'x{i}' for i in range(d)])
+    data[coluna_y] = y
+    return data
+
+
+class ResumoGrafo:
+    """Descrição canônica do resultado de um modelo, independente da numeração interna dos componentes.
+
+    **ResumoGrafo**
+
+    **Atributos**
+    vertices
+        Vértices do grafo ótimo.
+    arestas
+        Arestas do grafo ótimo.
+    componente
+        Componente ótimo de cada vértice.
+    k, pureza
+        Valor de k e pureza do componente ótimo de cada vértice.
+    vizinhos
+        Matriz de vizinhos ordenados, ou `None` se o modelo não os expõe com as mesmas posições dos vértices.
+    arestas_por_k
+        Arestas de cada grafo k-associado, apenas se pedidas em :func:`resumir`.
+    """
+
+    def __init__(self, modelo: Modelo, grafos_associados: bool = False):
+        """
+        :param modelo: Modelo já treinado.
+        :type modelo: Union[KAOG, KAOGForaDeMemoria]
+        :param grafos_associados: Se também devem ser resumidas as arestas de cada grafo k-associado do KAOG.
+        :type grafos_associados: bool
+        """
+        grafo = modelo.grafo_otimo
+        self.vertices: Set[int] = set(grafo.nodes)
+        self.arestas: Set[Tuple[int, int]] = set(grafo.edges)
+        self.componente: Dict[int, FrozenSet[int]] = {}
+        self.k: Dict[int, int] = {}
+        self.pureza: Dict[int, float] = {}
+        for componente in grafo.componentes:
+            k = grafo.obter_k_de_componente(componente)
+            pureza = grafo.pureza(componente)
+            for vertice in componente:
+                self.componente[vertice], self.k[vertice], self.pureza[vertice] = componente, k, pureza
+
+        if isinstance(modelo, KAOGForaDeMemoria):
+            self.vizinhos = np.asarray(modelo.vizinhos)
+        elif isinstance(modelo.y.index, pd.RangeIndex) and modelo.y.index.equals(pd.RangeIndex(len(modelo.y))):
+            self.vizinhos = modelo.distancias_e_vizinhos.vizinhos
+        else:
+            self.vizinhos = None
+
+        self.arestas_por_k: Dict[int, Set[Tuple[int, int]]] = {}
+        if grafos_associados and isinstance(modelo, KAOG):
+            for k in modelo.grafos_associados:
+                self.arestas_por_k[k] = set(modelo.grafos_associados[k].grafo.edges)
+
+
+def resumir(modelo: Modelo, grafos_associados: bool = False) -> ResumoGrafo:
+    """
+    Resume o resultado de um modelo para comparação.
+
+    :param modelo: Modelo já treinado.
+    :type modelo: Union[KAOG, KAOGForaDeMemoria]
+    :param grafos_associados: Se também devem ser resumidas as arestas de cada grafo k-associado do KAOG.
+    :type grafos_associados: bool
+    :return: Resumo do modelo.
+    :rtype: ResumoGrafo
+    """
+    return ResumoGrafo(modelo, grafos_associados)
+
+
+class Diferencas:
+    """Diferenças entre um modelo candidato e a referência, medidas sobre os vértices presentes em ambos.
+
+    **Diferencas**
+
+    **Atributos** (frações no intervalo [0, 1], com 0 quando os modelos são iguais)
+    vizinhos
+        Fração das linhas com vizinhos diferentes, comparando as colunas presentes em ambos. `None` se os vizinhos não
+        puderem ser comparados.
+    arestas
+        Tamanho da diferença simétrica entre as arestas, dividido pelo tamanho da união.
+    componentes
+        Fração dos vértices cujo componente ótimo, restrito aos vértices comuns, é diferente.
+    k
+        Fração dos vértices cujo componente ótimo tem outro valor de k.
+    grafos_associados
+        Maior fração de arestas diferentes dentre os grafos k-associados comparados, ou `None` se não comparados.
+
+    **Demais atributos**
+    pureza
+        Maior diferença absoluta entre as purezas dos componentes ótimos de um mesmo vértice.
+    arestas_faltantes, arestas_extras
+        Quantidade de arestas da referência ausentes no candidato e do candidato ausentes na referência.
+    vertices_comuns
+        Quantidade de vértices presentes em ambos os modelos.
+    """
+    METRICAS = ('vizinhos', 'arestas', 'componentes', 'k', 'pureza', 'grafos_associados')
+
+    def __init__(self, referencia: ResumoGrafo, candidato: ResumoGrafo):
+        """
+        :param referencia: Resumo do modelo de referência.
+        :type referencia: ResumoGrafo
+        :param candidato: Resumo do modelo comparado.
+        :type candidato: ResumoGrafo
+        """
+        comuns = referencia.vertices & candidato.vertices
+        self.vertices_comuns = len(comuns)
+        self.vizinhos = _diferenca_vizinhos(referencia.vizinhos, candidato.vizinhos)
+
+        arestas_ref = {a for a in referencia.arestas if a[0] in comuns and a[1] in comuns}
+        arestas_cand = {a for a in candidato.arestas if a[0] in comuns and a[1] in comuns}
+        self.arestas_faltantes = len(arestas_ref - arestas_cand)
+        self.arestas_extras = len(arestas_cand - arestas_ref)
+        self.arestas = _fracao(self.arestas_faltantes + self.arestas_extras, len(arestas_ref | arestas_cand))
+
+        componentes_diferentes = sum(referencia.componente[v] & comuns != candidato.componente[v] & comuns
+                                     for v in comuns)
+        self.componentes = _fracao(componentes_diferentes, len(comuns))
+        self.k = _fracao(sum(referencia.k[v] != candidato.k[v] for v in comuns), len(comuns))
+        self.pureza = max((abs(referencia.pureza[v] - candidato.pureza[v]) for v in comuns), default=0.0)
+
+        self.grafos_associados = None
+        diferencas_k = []
+        for k in set(referencia.arestas_por_k) & set(candidato.arestas_por_k):
+            arestas_ref = {a for a in referencia.arestas_por_k[k] if a[0] in comuns and a[1] in comuns}
+            arestas_cand = {a for a in candidato.arestas_por_k[k] if a[0] in comuns and a[1] in comuns}
+            diferencas_k.append(_fracao(len(arestas_ref ^ arestas_cand), len(arestas_ref | arestas_cand)))
+        if diferencas_k:
+            self.grafos_associados = max(diferencas_k)
+
+    @property
+    def equivalente(self) -> bool:
+        """Se os modelos são idênticos em todas as métricas comparadas."""
+        return self.dentro_da_tolerancia()
+
+    def dentro_da_tolerancia(self, **tolerancias: float) -> bool:
+        """
+        Verifica se cada diferença é menor ou igual à sua tolerância.
+
+        :param tolerancias: Tolerância de cada métrica de `METRICAS`. As métricas omitidas têm tolerância 0.
+        :return: Se todas as diferenças estão dentro das tolerâncias.
+        :rtype: bool
+        :raises ValueError: Se uma métrica for desconhecida.
+        """
+        desconhecidas = set(tolerancias) - set(self.METRICAS)
+        if desconhecidas:
+            raise ValueError(f'Métricas {sorted(desconhecidas)} desconhecidas, use dentre {self.METRICAS}.')
+        return all(getattr(self, metrica) is None or getattr(self, metrica) <= tolerancias.get(metrica, 0)
+                   for metrica in self.METRICAS)
+
+    def __str__(self) -> str:
+        valores = ', '.join(f'{metrica}={getattr(self, metrica)}' for metrica in self.METRICAS)
+        return (f'Diferencas({valores}, arestas_faltantes={self.arestas_faltantes}, '
+                f'arestas_extras={self.arestas_extras}, vertices_comuns={self.vertices_comuns})')
+
+
+def comparar(referencia: Modelo, candidato: Modelo, grafos_associados: bool = False) -> Diferencas:
+    """
+    Compara um modelo com a referência.
+
+    :param referencia: Modelo de referência.
+    :type referencia: Union[KAOG, KAOGForaDeMemoria]
+    :param candidato: Modelo comparado.
+    :type candidato: Union[KAOG, KAOGForaDeMemoria]
+    :param grafos_associados: Se também devem ser comparadas as arestas de cada grafo k-associado.
+    :type grafos_associados: bool
+    :return: Diferenças encontradas.
+    :rtype: Diferencas
+    """
+    return Diferencas(resumir(referencia, grafos_associados), resumir(candidato, grafos_associados))
+
+
+def verificar_caminhos(data: pd.DataFrame, coluna_y: Optional[str] = None, aproximados: bool = True,
+                       grafos_associados: bool = True, random_state: Optional[int] = None) -> Dict[str, Diferencas]:
+    """
+    Cria o KAOG de referência (motor `'referencia'`, precisão dupla, a partir de um DataFrame) e cada caminho
+    otimizado sobre o mesmo conjunto, comparando-os com a referência.
+
+    Caminhos exatos: `vetorizado`, `particionado` (parada global), `float32`, `matriz` (atributos em um
+    `numpy.ndarray`), `reajustar_classes` (a partir de um modelo com as classes embaralhadas) e `fora_de_memoria`.
+    Caminhos aproximados: `parada_por_classe`, `prototipos` (metade dos pontos), `reducao` (PCA com d - 1
+    componentes) e `duplicados` (`comprimir_duplicados`, comparado nos vértices representantes).
+
+    :param data: Conjunto de dados, com índice de 0 a n - 1.
+    :type data: pandas.DataFrame
+    :param coluna_y: Nome da coluna de classe. Por padrão, `ColunaYSingleton().NOME_COLUNA_Y`.
+    :type coluna_y: str
+    :param aproximados: Se os caminhos aproximados também são executados.
+    :type aproximados: bool
+    :param grafos_associados: Se as arestas de cada grafo k-associado também são comparadas.
+    :type grafos_associados: bool
+    :param random_state: Semente dos sorteios.
+    :type random_state: int
+    :return: Diferenças de cada caminho.
+    :rtype: Dict[str, Diferencas]
+    :raises ValueError: Se o índice de `data` não for de 0 a n - 1.
+    """
+    coluna_y = ColunaYSingleton().NOME_COLUNA_Y if coluna_y is None else coluna_y
+    if not data.index.equals(pd.RangeIndex(len(data))):
+        raise ValueError('O índice de `data` deve ser de 0 a n - 1, as posições usadas pelos caminhos com matrizes.')
+    rng = np.random.default_rng(random_state)
+    x, y = data.drop(columns=coluna_y), data[coluna_y]
+    referencia = resumir(KAOG(data.copy(), coluna_y=coluna_y), grafos_associados)
+
+    def kaog(**kwargs) -> KAOG:
+        return KAOG(data.copy(), coluna_y=coluna_y, **kwargs)
+
+    caminhos = {
+        'vetorizado': lambda: kaog(motor='vetorizado'),
+        'particionado': lambda: kaog(motor='particionado', n_jobs=2),
+        'float32': lambda: kaog(dtype=np.float32, motor='vetorizado'),
+        'matriz': lambda: KAOG(x.to_numpy(), y=y.to_numpy(), coluna_y=coluna_y, motor='vetorizado'),
+        'reajustar_classes': lambda: KAOG(x.to_numpy(), y=rng.permutation(y.to_numpy()), coluna_y=coluna_y)
+        .reajustar_classes(y.to_numpy()),
+        'fora_de_memoria': lambda: _fora_de_memoria(data, coluna_y, diretorio),
+    }
+    if aproximados:
+        caminhos.update({
+            'parada_por_classe': lambda: kaog(motor='particionado', parada='por_classe'),
+            'prototipos': lambda: kaog(prototipos=SelecaoPrototipos('amostragem', 0.5, random_state),
+                                       motor='vetorizado'),
+            'reducao': lambda: kaog(reducao=ReducaoDimensionalidade('pca', max(1, x.shape[1] - 1), random_state),
+                                    motor='vetorizado'),
+            'duplicados': lambda: kaog(motor='vetorizado', comprimir_duplicados=True),
+        })
+    # Os arquivos do caminho fora de memória são removidos assim que o seu resumo é comparado
+    with tempfile.TemporaryDirectory(prefix='kaog_equivalencia_') as diretorio:
+        return {nome: Diferencas(referencia, resumir(criar(), grafos_associados)) for nome, criar in caminhos.items()}
+
+
+def _fora_de_memoria(data: pd.DataFrame, coluna_y: str, diretorio: str) -> KAOGForaDeMemoria:
+    """KAOGForaDeMemoria com todos os vizinhos e blocos pequenos, para exercitar a mesclagem entre blocos."""
+    caminho = os.path.join(diretorio, 'dados.csv')
+    data.to_csv(caminho, index=False)
+    return KAOGForaDeMemoria(caminho, k_max=len(data) - 1, orcamento_memoria=2 ** 16,
+                             tamanho_bloco=max(1, len(data) // 3), diretorio=diretorio, coluna_y=coluna_y)
+
+
+def _diferenca_vizinhos(referencia: Optional[np.ndarray], candidato: Optional[np.ndarray]) -> Optional[float]:
+    """Fração das linhas com vizinhos diferentes, nas colunas presentes em ambas as matrizes."""
+    if referencia is None or candidato is None or len(referencia) != len(candidato):
+        return None
+    colunas = min(referencia.shape[1], candidato.shape[1])
+    diferentes = (np.asarray(referencia[:, :colunas]) != np.asarray(candidato[:, :colunas])).any(axis=1)
+    return float(diferentes.mean())
+
+
+def _fracao(parte: int, total: int) -> float:
+    """`parte / total`, ou 0 se `total` for 0."""
+    return parte / total if total else 0.0
@@ -0,0 +1,177 @@
+"""
+Exportação dos resultados do KAOG em formato colunar.
+
+As tabelas são criadas diretamente a partir dos arrays de vizinhos e de componentes, sem iterar as arestas ou os
+componentes do networkx, e escritas de uma só vez em Parquet, ou em `.npz` quando o *pyarrow* não está instalado.
+
+Tabelas
+    arestas
+        `origem` e `destino` de cada aresta do grafo ótimo.
+    componentes
+        `vertice`, `componente`, `k` e `pureza` do componente ótimo de cada vértice.
+    estatisticas_k
+        `k`, quantidade de `arestas`, quantidade de `componentes` e `taxa` de cada grafo k-associado analisado.
+"""
+import os
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from kaog.fora_de_memoria import KAOGForaDeMemoria
+from kaog.grafo_vetorizado import GrafoKAssociadoVetorizado, ComponentesOtimos
+from kaog.kaog import KAOG
+
+FORMATOS = ('parquet', 'npz')
+Modelo = Union[KAOG, KAOGForaDeMemoria]
+
+
+def tabela_arestas(modelo: Modelo) -> pd.DataFrame:
+    """
+    Arestas do grafo ótimo.
+
+    :param modelo: Modelo já treinado.
+    :type modelo: Union[KAOG, KAOGForaDeMemoria]
+    :return: Colunas `origem` e `destino`, com os índices dos vértices.
+    :rtype: pandas.DataFrame
+    """
+    vizinhos, y, indices, _ = _vizinhos_e_classes(modelo)
+    origem, destino = _componentes_otimos(modelo).arestas(vizinhos, y)
+    return pd.DataFrame({'origem': np.asarray(indices)[origem], 'destino': np.asarray(indices)[destino]})
+
+
+def tabela_componentes(modelo: Modelo) -> pd.DataFrame:
+    """
+    Componente ótimo de cada vértice, com o seu valor de k e a sua pureza.
+
+    :param modelo: Modelo já treinado.
+    :type modelo: Union[KAOG, KAOGForaDeMemoria]
+    :return: Colunas `vertice`, `componente`, `k` e `pureza`, uma linha por vértice.
+    :rtype: pandas.DataFrame
+    """
+    _, _, indices, _ = _vizinhos_e_classes(modelo)
+    componentes = _componentes_otimos(modelo)
+    rotulos = np.asarray(componentes.rotulos)
+    return pd.DataFrame({'vertice': np.asarray(indices), 'componente': rotulos, 'k': componentes.k[rotulos],
+                         'pureza': componentes.purezas[rotulos]})
+
+
+def estatisticas_por_k(modelo: Modelo) -> pd.DataFrame:
+    """
+    Quantidade de arestas, de componentes e taxa de cada grafo k-associado analisado pelo algoritmo. Com pesos nos
+    vértices, a taxa é a ponderada pelas multiplicidades, como a usada no treino.
+
+    :param modelo: Modelo já treinado.
+    :type modelo: Union[KAOG, KAOGForaDeMemoria]
+    :return: Colunas `k`, `arestas`, `componentes` e `taxa`, uma linha por valor de k.
+    :rtype: pandas.DataFrame
+    """
+    vizinhos, y, _, buffer_arestas = _vizinhos_e_classes(modelo)
+    pesos = _pesos(modelo)
+    linhas = []
+    for k in range(1, _componentes_otimos(modelo).ultimo_k + 1):
+        grafo_k = GrafoKAssociadoVetorizado(vizinhos, y, k, buffer_arestas, pesos)
+        linhas.append((k, len(grafo_k.origem), grafo_k.quantidade_componentes, grafo_k.taxa))
+    return pd.DataFrame(linhas, columns=['k', 'arestas', 'componentes', 'taxa'])
+
+
+def escrever_tabela(tabela: pd.DataFrame, caminho: str, formato: Optional[str] = None) -> str:
+    """
+    Escreve uma tabela em formato colunar.
+
+    :param tabela: Tabela a ser escrita. O índice é descartado.
+    :type tabela: pandas.DataFrame
+    :param caminho: Caminho do arquivo. A extensão é substituída pela do formato usado.
+    :type caminho: str
+    :param formato: `'parquet'` ou `'npz'`. Por padrão, Parquet se o *pyarrow* estiver instalado e `.npz` caso
+        contrário.
+    :type formato: str
+    :return: Caminho do arquivo escrito.
+    :rtype: str
+    :raises ValueError: Se o formato for desconhecido.
+    """
+    formato = _formato_padrao() if formato is None else formato
+    if formato not in FORMATOS:
+        raise ValueError(f'Formato {formato} desconhecido, use um dentre {FORMATOS}.')
+    caminho = f'{os.path.splitext(str(caminho))[0]}.{formato}'
+    if formato == 'parquet':
+        tabela.to_parquet(caminho, index=False)
+    else:
+        np.savez(caminho, **{str(coluna): tabela[coluna].to_numpy() for coluna in tabela.columns})
+    return caminho
+
+
+def ler_tabela(caminho: str) -> pd.DataFrame:
+    """
+    Lê uma tabela escrita por :func:`escrever_tabela`.
+
+    :param caminho: Caminho do arquivo, Parquet ou `.npz`.
+    :type caminho: str
+    :return: Tabela lida.
+    :rtype: pandas.DataFrame
+    """
+    if str(caminho).endswith('.npz'):
+        with np.load(caminho) as arrays:
+            return pd.DataFrame({coluna: arrays[coluna] for coluna in arrays.files})
+    return pd.read_parquet(caminho)
+
+
+def exportar(modelo: Modelo, diretorio: str, formato: Optional[str] = None) -> Dict[str, str]:
+    """
+    Escreve as tabelas de arestas, de componentes e de estatísticas por k em um diretório.
+
+    :param modelo: Modelo já treinado.
+    :type modelo: Union[KAOG, KAOGForaDeMemoria]
+    :param diretorio: Diretório de saída, criado se não existir.
+    :type diretorio: str
+    :param formato: Ver :func:`escrever_tabela`.
+    :type formato: str
+    :return: Caminho do arquivo de cada tabela.
+    :rtype: Dict[str, str]
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    tabelas = {
+        'arestas': tabela_arestas(modelo),
+        'componentes': tabela_componentes(modelo),
+        'estatisticas_k': estatisticas_por_k(modelo),
+    }
+    return {nome: escrever_tabela(tabela, os.path.join(diretorio, nome), formato) for nome, tabela in tabelas.items()}
+
+
+def _formato_padrao() -> str:
+    """Parquet, se o *pyarrow* estiver instalado, ou `.npz`."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return 'npz'
+    return 'parquet'
+
+
+def _vizinhos_e_classes(modelo: Modelo) -> Tuple[np.ndarray, np.ndarray, pd.Index, Optional[np.ndarray]]:
+    """Matriz de vizinhos, classes codificadas, índice de cada vértice e buffer de arestas do modelo."""
+    if isinstance(modelo, KAOGForaDeMemoria):
+        n, k = modelo.vizinhos.shape
+        buffer_arestas = np.memmap(modelo._caminho('arestas.dat'), dtype=modelo.dtype_indices, mode='r+',
+                                   shape=(2, n * k))
+        return modelo.vizinhos, modelo.y, pd.RangeIndex(n), buffer_arestas
+    dist = modelo.distancias_e_vizinhos
+    y = pd.factorize(modelo.y)[0].astype(dist.dtype_indices)
+    return dist.vizinhos, y, modelo.y.index, None
+
+
+def _pesos(modelo: Modelo) -> Optional[np.ndarray]:
+    """Multiplicidade de cada vértice do modelo, ou `None` sem pesos."""
+    return None if isinstance(modelo, KAOGForaDeMemoria) else modelo._pesos
+
+
+def _componentes_otimos(modelo: Modelo) -> ComponentesOtimos:
+    """
+    Componentes ótimos do modelo. Para o motor de referência, são calculados sobre os mesmos vizinhos, com resultado
+    equivalente ao grafo ótimo do networkx.
+    """
+    if isinstance(modelo, KAOGForaDeMemoria):
+        return modelo.componentes_otimos
+    if getattr(modelo, 'componentes_vetorizados', None) is not None:
+        return modelo.componentes_vetorizados
+    vizinhos, y, _, _ = _vizinhos_e_classes(modelo)
+    return ComponentesOtimos(vizinhos, y)
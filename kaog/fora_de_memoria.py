@@ -0,0 +1,216 @@
+import logging
+import os
+import tempfile
+from typing import Callable, Union, Optional, Dict, FrozenSet
+
+import numpy as np
+import pandas as pd
+from scipy.spatial.distance import cdist
+from sklearn.metrics import pairwise_distances
+
+from kaog.distancias import Distancias, tipos_precisao
+from kaog.grafo_otimo import GrafoOtimo
+from kaog.grafo_vetorizado import ComponentesOtimos
+from kaog.util import ColunaYSingleton
+from kaog.util.leitura import ler_em_blocos
+
+# Bytes usados por par (consulta, referência) ao mesclar um bloco de distâncias com os melhores vizinhos
+_BYTES_POR_PAR = 48
+_METRICAS_SCIPY = {'euclidean', 'sqeuclidean', 'cityblock', 'chebyshev', 'minkowski', 'cosine', 'correlation',
+                   'canberra', 'braycurtis', 'hamming'}
+
+
+class KAOGForaDeMemoria:
+    """Algoritmo KAOG para conjuntos de dados que não cabem em memória.
+
+    **KAOGForaDeMemoria**
+
+    Os dados são lidos em blocos de um arquivo CSV ou Parquet e copiados para arquivos mapeados em memória. Em seguida,
+    os `k_max` vizinhos mais próximos de cada ponto são calculados bloco a bloco, sem criar a matriz n x n de distâncias,
+    e as arestas de cada grafo k-associado são escritas em disco. A análise dos componentes é feita a partir desses
+    arquivos, de forma que o pico de memória é limitado por `orcamento_memoria` e por O(n * k_max).
+
+    O resultado é equivalente ao de :class:`kaog.KAOG`, desde que o algoritmo termine antes de `k_max`.
+
+    **Arquivos** (em `diretorio`)
+    x.dat, y.dat
+        Atributos (float64) e classes codificadas (com o tipo dos índices).
+    vizinhos.dat, distancias.dat
+        Os `k_max` vizinhos mais próximos de cada ponto e suas distâncias, ordenados pela distância e pelo índice.
+    arestas.dat
+        Arestas do último grafo k-associado analisado.
+    rotulos.dat
+        Componente ótimo de cada vértice.
+    """
+
+    def __init__(self, caminho: str, k_max: int = 32, orcamento_memoria: int = 256 * 2 ** 20,
+                 tamanho_bloco: int = 100_000, diretorio: Optional[str] = None,
+                 metrica: Union[str, Callable, None] = None, coluna_y: Optional[str] = None,
+                 dtype: Union[type, np.dtype] = np.float64):
+        """
+        Todo o procedimento para criar o grafo ótimo é executado aqui.
+
+        :param caminho: Arquivo CSV ou Parquet contendo os atributos e a coluna de classe.
+        :type caminho: str
+        :param k_max: Maior valor de k analisado, igual a quantidade de vizinhos armazenados por ponto.
+        :type k_max: int
+        :param orcamento_memoria: Memória, em bytes, disponível para o cálculo de cada bloco de distâncias.
+        :type orcamento_memoria: int
+        :param tamanho_bloco: Quantidade de linhas lidas do arquivo por vez.
+        :type tamanho_bloco: int
+        :param diretorio: Diretório onde os arquivos mapeados em memória são criados. Por padrão, um diretório temporário.
+        :type diretorio: str
+        :param metrica: Métrica de distância. Por padrão, `Distancias.METRIC`.
+        :type metrica: Union[str, Callable]
+        :param coluna_y: Nome da coluna de classe. Por padrão, `ColunaYSingleton().NOME_COLUNA_Y`.
+        :type coluna_y: str
+        :param dtype: Tipo das distâncias armazenadas, `numpy.float64` ou `numpy.float32`. Com `numpy.float32`, os
+            vizinhos, as classes, as arestas e os rótulos são armazenados como `numpy.int32`.
+        :type dtype: Union[type, numpy.dtype]
+        """
+        self.dtype, self.dtype_indices = tipos_precisao(dtype)
+        self.diretorio = tempfile.mkdtemp(prefix='kaog_') if diretorio is None else diretorio
+        os.makedirs(self.diretorio, exist_ok=True)
+        self.metrica = Distancias.METRIC if metrica is None else metrica
+        self.coluna_y = ColunaYSingleton().NOME_COLUNA_Y if coluna_y is None else coluna_y
+        self.orcamento_memoria = orcamento_memoria
+
+        self._ler_dados(caminho, tamanho_bloco)
+        self._calcular_vizinhos(min(k_max, self.n - 1))
+        self._criar_kaog()
+
+    @property
+    def n(self) -> int:
+        """Quantidade de pontos."""
+        return self.x.shape[0]
+
+    @property
+    def rotulos(self) -> np.ndarray:
+        """Componente ótimo de cada vértice."""
+        return self._rotulos
+
+    @property
+    def k_componentes(self) -> np.ndarray:
+        """Valor de k de cada componente ótimo."""
+        return self.componentes_otimos.k
+
+    @property
+    def purezas(self) -> np.ndarray:
+        """Pureza de cada componente ótimo."""
+        return self.componentes_otimos.purezas
+
+    @property
+    def grafo_otimo(self) -> GrafoOtimo:
+        """Grafo ótimo, criado sob demanda. Os vértices são as posições das linhas no arquivo lido."""
+        origem, destino = self.componentes_otimos.arestas(self.vizinhos, self.y)
+        return GrafoOtimo(range(self.n), zip(origem.tolist(), destino.tolist()), self._componente_e_k())
+
+    def _componente_e_k(self) -> Dict[FrozenSet[int], int]:
+        """Associa o conjunto de vértices de cada componente ótimo ao seu valor de k."""
+        grupos = pd.Series(np.arange(self.n)).groupby(np.asarray(self.rotulos))
+        return {frozenset(vertices.tolist()): int(self.k_componentes[rotulo]) for rotulo, vertices in grupos}
+
+    def _caminho(self, nome: str) -> str:
+        """Caminho de um arquivo dentro de `self.diretorio`."""
+        return os.path.join(self.diretorio, nome)
+
+    def _ler_dados(self, caminho: str, tamanho_bloco: int):
+        """
+        Lê o arquivo em blocos, copiando os atributos e as classes codificadas para arquivos mapeados em memória.
+
+        :raises ValueError: Se o arquivo estiver vazio.
+        """
+        coluna_y = self.coluna_y
+        self.classes = pd.Index([])
+        n, d = 0, 0
+        with open(self._caminho('x.dat'), 'wb') as arquivo_x, open(self._caminho('y.dat'), 'wb') as arquivo_y:
+            for bloco in ler_em_blocos(caminho, tamanho_bloco):
+                y = bloco[coluna_y]
+                x = bloco.drop(columns=coluna_y).to_numpy(dtype=np.float64)
+                unicos = pd.Index(pd.unique(y))
+                self.classes = self.classes.append(unicos[~unicos.isin(self.classes)])
+                arquivo_x.write(np.ascontiguousarray(x).tobytes())
+                arquivo_y.write(self.classes.get_indexer(y).astype(self.dtype_indices).tobytes())
+                n, d = n + x.shape[0], x.shape[1]
+
+        if n == 0:
+            raise ValueError(f'O arquivo {caminho} não contém dados.')
+        self.x = np.memmap(self._caminho('x.dat'), dtype=np.float64, mode='r', shape=(n, d))
+        self.y = np.memmap(self._caminho('y.dat'), dtype=self.dtype_indices, mode='r', shape=(n,))
+
+    def _calcular_vizinhos(self, k: int):
+        """
+        Calcula os `k` vizinhos mais próximos de cada ponto, bloco a bloco. Cada bloco de consultas é comparado com todos
+        os blocos de referência, mantendo apenas os `k` melhores candidatos, ordenados pela distância e, em caso de
+        empate, pelo índice do vizinho. A mesclagem é feita em precisão dupla e convertida para `dtype` apenas ao ser
+        escrita, preservando os desempates.
+        """
+        n, d = self.x.shape
+        self.vizinhos = np.memmap(self._caminho('vizinhos.dat'), dtype=self.dtype_indices, mode='w+', shape=(n, k))
+        self.distancias = np.memmap(self._caminho('distancias.dat'), dtype=self.dtype, mode='w+', shape=(n, k))
+        bloco = _tamanho_bloco_vizinhos(self.orcamento_memoria, k, d)
+        logging.debug(f'Calculando {k} vizinhos de {n} pontos em blocos de {bloco}...')
+
+        for inicio_q in range(0, n, bloco):
+            fim_q = min(inicio_q + bloco, n)
+            consultas = np.asarray(self.x[inicio_q:fim_q])
+            posicoes_q = np.arange(inicio_q, fim_q)
+            melhores_d = np.empty((len(consultas), 0))
+            melhores_i = np.empty((len(consultas), 0), dtype=np.int64)
+
+            for inicio_r in range(0, n, bloco):
+                fim_r = min(inicio_r + bloco, n)
+                distancias = _distancias_entre_blocos(consultas, np.asarray(self.x[inicio_r:fim_r]), self.metrica)
+                indices = np.broadcast_to(np.arange(inicio_r, fim_r), distancias.shape).copy()
+                # O próprio ponto não é considerado vizinho
+                proprios = (posicoes_q >= inicio_r) & (posicoes_q < fim_r)
+                distancias[proprios, posicoes_q[proprios] - inicio_r] = np.inf
+                indices[proprios, posicoes_q[proprios] - inicio_r] = n
+
+                melhores_d = np.hstack([melhores_d, distancias])
+                melhores_i = np.hstack([melhores_i, indices])
+                if melhores_d.shape[1] > k:
+                    ordem = np.lexsort((melhores_i, melhores_d))[:, :k]
+                    melhores_d = np.take_along_axis(melhores_d, ordem, axis=1)
+                    melhores_i = np.take_along_axis(melhores_i, ordem, axis=1)
+
+            self.distancias[inicio_q:fim_q] = melhores_d
+            self.vizinhos[inicio_q:fim_q] = melhores_i
+
+        self.vizinhos.flush()
+        self.distancias.flush()
+        logging.debug('Vizinhos calculados.')
+
+    def _criar_kaog(self):
+        """Executa o algoritmo KAOG a partir dos vizinhos em disco, reutilizando o mesmo arquivo para as arestas."""
+        n, k = self.vizinhos.shape
+        buffer_arestas = np.memmap(self._caminho('arestas.dat'), dtype=self.dtype_indices, mode='w+', shape=(2, n * k))
+        self.componentes_otimos = ComponentesOtimos(self.vizinhos, self.y, buffer_arestas=buffer_arestas)
+        if not self.componentes_otimos.convergiu:
+            logging.warning(f'O algoritmo foi interrompido ao atingir k_max={k}.')
+
+        self._rotulos = np.memmap(self._caminho('rotulos.dat'), dtype=self.dtype_indices, mode='w+', shape=(n,))
+        self._rotulos[:] = self.componentes_otimos.rotulos
+        self._rotulos.flush()
+
+
+def _tamanho_bloco_vizinhos(orcamento_memoria: int, k: int, d: int) -> int:
+    """
+    Maior quantidade de linhas por bloco tal que a mesclagem de um bloco de consultas com um bloco de referência,
+    incluindo os `k` melhores candidatos e os atributos, respeite o orçamento de memória.
+    """
+    a = _BYTES_POR_PAR
+    b = _BYTES_POR_PAR * k + 16 * d
+    return max(1, int((-b + np.sqrt(b ** 2 + 4 * a * orcamento_memoria)) / (2 * a)))
+
+
+def _distancias_entre_blocos(a: np.ndarray, b: np.ndarray, metrica: Union[str, Callable]) -> np.ndarray:
+    """
+    Matriz de distâncias entre os pontos de `a` e `b`. Para as métricas implementadas pelo *scipy*, as distâncias são
+    calculadas diretamente pela definição, assim como no `NearestNeighbors`, preservando os empates.
+    """
+    if isinstance(metrica, str) and metrica in _METRICAS_SCIPY:
+        return cdist(a, b, metric=metrica)
+    if metrica == 'manhattan':
+        return cdist(a, b, metric='cityblock')
+    return pairwise_distances(a, b, metric=metrica, n_jobs=1)
@@ -15,7 +15,8 @@ class GrafoOtimo(nx.DiGraph):
     Contém os componentes, bem como a associação entre o componente e seu valor de k.
     """
 
-    def __init__(self, nodes, edges, **attr):
+    def __init__(self, nodes, edges, componente_e_k: Dict[FrozenSet[int], int] = None,
+                 pesos: Dict[int, int] = None, **attr):
         """
         Para iniciar o grafo ótimo, são necessários os vértices e arestas, sendo uma lista de inteiros, por exemplo,
         para representar os vértices, e uma lista de tuplas de inteiros, por exemplo, para representar as arestas.
@@ -26,13 +27,21 @@ class GrafoOtimo(nx.DiGraph):
         :type nodes: List[int]
         :param edges: Lista de arestas.
         :type edges: List[Tuple[int, int]]
+        :param componente_e_k: Valor de k de cada componente. Por padrão, todos os componentes têm k igual a 1.
+        :type componente_e_k: Dict[FrozenSet[int], int]
+        :param pesos: Multiplicidade de cada vértice. Com pesos, o grau médio de um componente é a média ponderada do
+            dobro do grau de saída, como em :class:`kaog.grafo_vetorizado.GrafoKAssociadoVetorizado`.
+        :type pesos: Dict[int, int]
         :param attr: Atributos adicionais sendo passados para a classe pai *nx.DiGraph*.
         """
         super().__init__(**attr)
         self.add_nodes_from(nodes)
         self.add_edges_from(edges)
 
-        self._componente_e_k: Dict[FrozenSet[int], int] = {k: 1 for k in self.componentes}
+        if componente_e_k is None:
+            componente_e_k = {k: 1 for k in self.componentes}
+        self._componente_e_k: Dict[FrozenSet[int], int] = dict(componente_e_k)
+        self._pesos = pesos
 
     @property
     def componentes(self) -> List[FrozenSet[int]]:
@@ -126,5 +135,8 @@ class GrafoOtimo(nx.DiGraph):
         :rtype: float
         :raises ValueError: Se o vértice não estiver conectado ao grafo.
         """
+        if self._pesos is not None:
+            pesos = [self._pesos[i] for i in componente]
+            return 2 * sum(self.out_degree(i) * peso for i, peso in zip(componente, pesos)) / sum(pesos)
         graus = [self.degree(i) for i in componente]
         return mean(graus)
@@ -0,0 +1,287 @@
+"""
+Cálculo do grafo ótimo particionado por classe.
+
+Os grafos k-associados só contêm arestas entre vértices da mesma classe, de forma que cada componente, e cada
+componente ótimo, contém uma única classe. A regra de aceitação compara apenas componentes contidos uns nos outros, e
+portanto de mesma classe. Assim, depois da busca de vizinhos, o algoritmo pode ser executado separadamente para cada
+classe, em processos paralelos, e os resultados combinados em um único :class:`kaog.grafo_vetorizado.ComponentesOtimos`.
+
+A única dependência entre as classes é a regra de parada, que usa a taxa do grafo inteiro. Com `parada='global'`, a
+taxa de cada k é obtida somando os graus e a quantidade de componentes de todas as classes, e o resultado é idêntico ao
+do algoritmo sem particionamento. Com `parada='por_classe'`, cada classe termina quando a sua própria taxa diminui.
+
+Os processos não recebem a matriz de vizinhos de cada classe: apenas as primeiras colunas da matriz são gravadas em um
+arquivo mapeado (*np.memmap*), e cada processo lê as linhas da sua classe. A quantidade de colunas começa em
+`COLUNAS_INICIAIS` e cresce enquanto alguma classe precisar de valores maiores de k; a cada aumento, cada classe continua
+a execução anterior (:meth:`kaog.grafo_vetorizado.ComponentesOtimos.continuar`), sem recomeçar de k = 1.
+"""
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from kaog.grafo_vetorizado import ComponentesOtimos, HistoricoComponentes
+
+PARADAS = ('global', 'por_classe')
+COLUNAS_INICIAIS = 16
+
+
+def componentes_otimos_por_classe(vizinhos: np.ndarray, y: np.ndarray, parada: str = 'global',
+                                  max_workers: Optional[int] = None,
+                                  pesos: Optional[np.ndarray] = None,
+                                  colunas_iniciais: int = COLUNAS_INICIAIS) -> ComponentesOtimos:
+    """
+    Executa o algoritmo KAOG separadamente para cada classe, em processos paralelos, e combina os resultados.
+
+    :param vizinhos: Matriz (n, K) com os índices dos vizinhos mais próximos, ordenados.
+    :type vizinhos: numpy.ndarray
+    :param y: Classe (codificada) de cada vértice.
+    :type y: numpy.ndarray
+    :param parada: `'global'`, que interrompe todas as classes quando a taxa do grafo inteiro diminui, ou
+        `'por_classe'`, que interrompe cada classe quando a sua própria taxa diminui.
+    :type parada: str
+    :param max_workers: Quantidade máxima de processos. Por padrão, definida pelo `ProcessPoolExecutor`.
+    :type max_workers: int
+    :param pesos: Multiplicidade (inteira) de cada vértice, como em :class:`kaog.grafo_vetorizado.ComponentesOtimos`.
+    :type pesos: numpy.ndarray
+    :param colunas_iniciais: Quantidade de colunas da matriz de vizinhos enviadas aos processos na primeira execução.
+        Cresce enquanto alguma classe precisar de mais colunas.
+    :type colunas_iniciais: int
+    :return: Componentes ótimos, com rótulos numerados classe a classe. Com `parada='global'`, `historico` combina os
+        históricos das classes; com `'por_classe'`, cada classe tem o seu valor de k final e `historico` é `None`.
+    :rtype: ComponentesOtimos
+    :raises ValueError: Se a regra de parada for desconhecida.
+    """
+    if parada not in PARADAS:
+        raise ValueError(f'Parada {parada} desconhecida, use uma dentre {PARADAS}.')
+    y = np.asarray(y)
+    k_max = vizinhos.shape[1]
+    particoes = [np.flatnonzero(y == classe) for classe in np.unique(y)]
+    pesos_particoes = [None if pesos is None else np.asarray(pesos)[posicoes] for posicoes in particoes]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor, \
+            tempfile.TemporaryDirectory(prefix='kaog_') as diretorio:
+        colunas = _ColunasMapeadas(vizinhos, diretorio)
+
+        def otimizar(classes: List[int], alvo: int, parar_na_queda: bool) -> None:
+            arquivo = colunas.publicar(alvo)
+            continuados = executor.map(_otimizar_classe, [arquivo] * len(classes), [particoes[i] for i in classes],
+                                       [alvo] * len(classes), [parar_na_queda] * len(classes),
+                                       [pesos_particoes[i] for i in classes], [resultados[i] for i in classes])
+            for i, componentes in zip(classes, continuados):
+                resultados[i] = componentes
+
+        resultados = [None] * len(particoes)
+        alvo = min(colunas_iniciais, k_max)
+        otimizar(list(range(len(particoes))), alvo, parada == 'por_classe')
+        if parada == 'por_classe':
+            while True:
+                # Classes que atingiram o limite de colunas sem que a sua taxa diminuísse precisam de mais colunas
+                incompletas = [i for i, componentes in enumerate(resultados)
+                               if not componentes.convergiu and componentes.ultimo_k < k_max]
+                if not incompletas:
+                    return _combinar(vizinhos, particoes, resultados, None)
+                alvo = min(2 * alvo, k_max)
+                otimizar(incompletas, alvo, True)
+
+        # Todas as classes avançam juntas, sem a sua própria parada, até a queda da taxa global. O limite cresce mais
+        # devagar do que na parada por classe, porque os valores de k além da queda são calculados sem necessidade
+        while True:
+            parada_global = _queda_taxa_global(resultados, k_max)
+            if parada_global is not None:
+                break
+            alvo = min(alvo + max(alvo // 2, 1), k_max)
+            otimizar(list(range(len(particoes))), alvo, False)
+
+    k_final, convergiu = parada_global
+    resultados = [ComponentesOtimos.de_historico(componentes.historico, vizinhos.dtype, k_max=k_final,
+                                                 parar_na_queda=False) for componentes in resultados]
+    combinados = _combinar(vizinhos, particoes, resultados, _combinar_historicos(particoes, resultados, k_final))
+    combinados.ultimo_k, combinados.convergiu = k_final, convergiu
+    return combinados
+
+
+def medir_tempos(vizinhos: np.ndarray, y: np.ndarray, max_workers: Optional[int] = None,
+                 repeticoes: int = 1) -> pd.DataFrame:
+    """
+    Compara o tempo do cálculo particionado com o do algoritmo vetorizado sem particionamento, sobre a mesma matriz de
+    vizinhos.
+
+    :param vizinhos: Matriz (n, K) com os índices dos vizinhos mais próximos, ordenados.
+    :type vizinhos: numpy.ndarray
+    :param y: Classe (codificada) de cada vértice.
+    :type y: numpy.ndarray
+    :param max_workers: Quantidade máxima de processos do cálculo particionado.
+    :type max_workers: int
+    :param repeticoes: Quantidade de execuções de cada motor; é informado o menor tempo.
+    :type repeticoes: int
+    :return: Uma linha por motor (`'vetorizado'` e `'particionado'`), com o menor tempo em segundos, o último k
+        analisado e se o resultado tem os mesmos componentes ótimos do algoritmo vetorizado.
+    :rtype: pandas.DataFrame
+    """
+    motores = {
+        'vetorizado': lambda: ComponentesOtimos(vizinhos, y),
+        'particionado': lambda: componentes_otimos_por_classe(vizinhos, y, max_workers=max_workers),
+    }
+    linhas = []
+    for motor, calcular in motores.items():
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            componentes = calcular()
+            tempos.append(time.perf_counter() - inicio)
+        if motor == 'vetorizado':
+            esperado = componentes
+        linhas.append({'motor': motor, 'segundos': min(tempos), 'ultimo_k': componentes.ultimo_k,
+                       'iguais': _mesmos_componentes(esperado, componentes)})
+    return pd.DataFrame(linhas)
+
+
+def _mesmos_componentes(esperado: ComponentesOtimos, componentes: ComponentesOtimos) -> bool:
+    """Se os componentes ótimos têm os mesmos vértices, valores de k e purezas, independentemente da numeração."""
+    pares = set(zip(esperado.rotulos.tolist(), componentes.rotulos.tolist()))
+    return (len(pares) == len(esperado.k) == len(componentes.k)
+            and np.array_equal(esperado.k[esperado.rotulos], componentes.k[componentes.rotulos])
+            and np.array_equal(esperado.purezas[esperado.rotulos], componentes.purezas[componentes.rotulos]))
+
+
+class _ColunasMapeadas:
+    """
+    Primeiras colunas da matriz de vizinhos, gravadas em um arquivo mapeado que os processos abrem para leitura.
+    O arquivo só é regravado quando são necessárias mais colunas.
+    """
+
+    def __init__(self, vizinhos: np.ndarray, diretorio: str):
+        self.vizinhos = vizinhos
+        self.diretorio = diretorio
+        self.arquivo = None
+
+    def publicar(self, colunas: int) -> Tuple[str, Tuple[int, int], str]:
+        """Caminho, forma e tipo do arquivo com pelo menos `colunas` colunas da matriz de vizinhos."""
+        if self.arquivo is None or self.arquivo[1][1] < colunas:
+            caminho = os.path.join(self.diretorio, f'vizinhos_{colunas}.dat')
+            forma = (self.vizinhos.shape[0], colunas)
+            mapeado = np.memmap(caminho, dtype=self.vizinhos.dtype, mode='w+', shape=forma)
+            mapeado[:] = self.vizinhos[:, :colunas]
+            mapeado.flush()
+            del mapeado
+            if self.arquivo is not None:
+                os.remove(self.arquivo[0])
+            self.arquivo = caminho, forma, self.vizinhos.dtype.str
+        return self.arquivo
+
+
+def _subgrafo_da_classe(vizinhos: np.ndarray, posicoes: np.ndarray, colunas: int) -> np.ndarray:
+    """
+    Primeiras `colunas` colunas dos vizinhos dos vértices de uma classe, numerados pela posição dentro da classe. Os
+    vizinhos de outras classes recebem o índice `len(posicoes)`, que não corresponde a nenhum vértice da classe.
+    """
+    locais = np.full(vizinhos.shape[0], len(posicoes), dtype=vizinhos.dtype)
+    locais[posicoes] = np.arange(len(posicoes), dtype=vizinhos.dtype)
+    return locais[np.asarray(vizinhos[posicoes, :colunas])]
+
+
+def _otimizar_classe(arquivo: Tuple[str, Tuple[int, int], str], posicoes: np.ndarray, k_max: int,
+                     parar_na_queda: bool, pesos: Optional[np.ndarray] = None,
+                     anterior: Optional[ComponentesOtimos] = None) -> ComponentesOtimos:
+    """
+    Executa o algoritmo sobre os vértices de uma única classe, lendo as suas linhas do arquivo mapeado de vizinhos, ou
+    continua a execução `anterior` até `k_max`. Um vértice fictício de outra classe, na posição `len(posicoes)`,
+    representa os vizinhos das demais classes.
+    """
+    caminho, forma, dtype = arquivo
+    vizinhos = _subgrafo_da_classe(np.memmap(caminho, dtype=dtype, mode='r', shape=forma), posicoes, k_max)
+    y = np.zeros(len(vizinhos) + 1, dtype=vizinhos.dtype)
+    y[-1] = 1
+    if anterior is None:
+        return ComponentesOtimos(vizinhos, y, k_max, parar_na_queda=parar_na_queda, pesos=pesos)
+    anterior.continuar(vizinhos, y, k_max, parar_na_queda=parar_na_queda)
+    return anterior
+
+
+def _graus_e_componentes(historico: HistoricoComponentes) -> Tuple[np.ndarray, np.ndarray]:
+    """Soma dos graus e quantidade de componentes de cada grafo k-associado registrado no histórico."""
+    quantidades = np.bincount(historico.k - 1)
+    ks = np.arange(1, len(quantidades) + 1)
+    # A taxa é a soma dos graus dividida pela quantidade de componentes e por k, e a soma dos graus é inteira, também
+    # com pesos inteiros
+    return np.rint(historico.taxas * quantidades * ks).astype(np.int64), quantidades
+
+
+def _taxa_global(resultados: List[ComponentesOtimos], k: int) -> float:
+    """Taxa do grafo k-associado de todas as classes, calculada como em `GrafoKAssociadoVetorizado.taxa`."""
+    somas = [_graus_e_componentes(componentes.historico) for componentes in resultados]
+    return sum(graus[k - 1] for graus, _ in somas) / sum(quantidades[k - 1] for _, quantidades in somas) / k
+
+
+def _queda_taxa_global(resultados: List[ComponentesOtimos], k_max: int) -> Optional[Tuple[int, bool]]:
+    """
+    Último k analisado pelo algoritmo sem particionamento e se ele terminou pela diminuição da taxa global: o primeiro
+    k em que a taxa diminui, dentre os valores registrados por todas as classes, ou `k_max` se todas as classes
+    chegaram a `k_max` sem queda. `None` se ainda não é possível determinar.
+    """
+    somas = [_graus_e_componentes(componentes.historico) for componentes in resultados]
+    disponiveis = min(len(graus) for graus, _ in somas)
+    graus = sum(graus[:disponiveis] for graus, _ in somas)
+    quantidades = sum(quantidades[:disponiveis] for _, quantidades in somas)
+    taxas = graus / quantidades / np.arange(1, disponiveis + 1)
+    quedas = np.flatnonzero(taxas[1:] < taxas[:-1])
+    if len(quedas):
+        return int(quedas[0]) + 2, True
+    return (k_max, False) if disponiveis == k_max else None
+
+
+def _combinar(vizinhos: np.ndarray, particoes: List[np.ndarray], resultados: List[ComponentesOtimos],
+              historico: Optional[HistoricoComponentes]) -> ComponentesOtimos:
+    """Une os componentes ótimos das classes, numerando os componentes classe a classe."""
+    combinados = ComponentesOtimos.__new__(ComponentesOtimos)
+    rotulos = np.empty(len(vizinhos), dtype=vizinhos.dtype)
+    inicio = 0
+    for posicoes, componentes in zip(particoes, resultados):
+        rotulos[posicoes] = np.asarray(componentes.rotulos) + inicio
+        inicio += len(componentes.k)
+    combinados.rotulos = rotulos
+    combinados.k = np.concatenate([componentes.k for componentes in resultados])
+    combinados.purezas = np.concatenate([componentes.purezas for componentes in resultados])
+    combinados.ultimo_k = max(componentes.ultimo_k for componentes in resultados)
+    combinados.convergiu = all(componentes.convergiu for componentes in resultados)
+    combinados.k_max = vizinhos.shape[1]
+    combinados.historico = historico
+    return combinados
+
+
+def _combinar_historicos(particoes: List[np.ndarray], resultados: List[ComponentesOtimos],
+                         k_final: int) -> HistoricoComponentes:
+    """
+    Une os históricos das classes até `k_final`, numerando os nós nível a nível e, dentro de cada nível, classe a
+    classe, como no histórico do algoritmo sem particionamento.
+    """
+    historicos = [componentes.historico for componentes in resultados]
+    quantidades = np.array([np.bincount(h.k - 1)[:k_final] for h in historicos])
+    inicios_nivel = np.concatenate([[0], np.cumsum(quantidades.sum(axis=0))])
+    inicios_classe = inicios_nivel[:-1] + np.concatenate([np.zeros((1, k_final), dtype=np.int64),
+                                                          np.cumsum(quantidades, axis=0)[:-1]])
+
+    total = inicios_nivel[-1]
+    combinado = HistoricoComponentes.__new__(HistoricoComponentes)
+    combinado.pai = np.full(total, -1, dtype=np.int64)
+    combinado.k = np.empty(total, dtype=np.int64)
+    combinado.purezas = np.empty(total)
+    combinado.aceitos = np.empty(total, dtype=bool)
+    combinado.rotulos_iniciais = np.empty(sum(len(p) for p in particoes), dtype=np.int64)
+    for c, (posicoes, historico) in enumerate(zip(particoes, historicos)):
+        usados = quantidades[c].sum()
+        novos = np.concatenate([np.arange(inicios_classe[c, i], inicios_classe[c, i] + quantidades[c, i])
+                                for i in range(k_final)])
+        internos = historico.k[:usados] < k_final
+        combinado.pai[novos[internos]] = novos[historico.pai[:usados][internos]]
+        combinado.k[novos] = historico.k[:usados]
+        combinado.purezas[novos] = historico.purezas[:usados]
+        combinado.aceitos[novos] = historico.aceitos[:usados]
+        combinado.rotulos_iniciais[posicoes] = novos[historico.rotulos_iniciais]
+    combinado.taxas = np.array([_taxa_global(resultados, k) for k in range(1, k_final + 1)])
+    return combinado
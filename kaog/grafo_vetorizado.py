@@ -0,0 +1,449 @@
+"""
+Implementação vetorizada dos grafos k-associados e do grafo ótimo.
+
+Trabalha diretamente sobre a matriz de vizinhos ordenados (uma linha por vértice, com os índices da matriz dos vizinhos
+mais próximos) e sobre o array de classes, sem criar objetos do networkx. Os resultados são equivalentes aos obtidos por
+:class:`kaog.k_associado.KAssociado` e :class:`kaog.KAOG`, porém representados por arrays.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+TAMANHO_BLOCO_PADRAO = 65536
+
+
+def arestas_k_associado(vizinhos: np.ndarray, y: np.ndarray, k: int, out: Optional[np.ndarray] = None,
+                        tamanho_bloco: int = TAMANHO_BLOCO_PADRAO) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cria as arestas do grafo k-associado: cada vértice é ligado aos seus `k` primeiros vizinhos que sejam da mesma
+    classe.
+
+    As linhas de `vizinhos` são processadas em blocos, permitindo que `vizinhos`, `y` e `out` sejam arrays mapeados em
+    disco (*np.memmap*) sem que sejam carregados por completo.
+
+    :param vizinhos: Matriz (n, K) com os índices dos vizinhos mais próximos, ordenados.
+    :type vizinhos: numpy.ndarray
+    :param y: Classe (codificada) de cada vértice.
+    :type y: numpy.ndarray
+    :param k: Valor de k do grafo. Deve ser menor ou igual a K.
+    :type k: int
+    :param out: Array (2, n * k) onde as arestas serão escritas. Por padrão, é criado em memória.
+    :type out: numpy.ndarray
+    :param tamanho_bloco: Quantidade de linhas processadas por vez.
+    :type tamanho_bloco: int
+    :return: Arrays de origem e destino das arestas.
+    :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+    :raises ValueError: Se `k` for maior que a quantidade de vizinhos disponíveis.
+    """
+    n, k_disponivel = vizinhos.shape
+    if k > k_disponivel:
+        raise ValueError(f'Apenas {k_disponivel} vizinhos estão disponíveis, não é possível criar o {k}-associado.')
+    if out is None:
+        out = np.empty((2, n * k), dtype=vizinhos.dtype)
+
+    total = 0
+    for inicio in range(0, n, tamanho_bloco):
+        fim = min(inicio + tamanho_bloco, n)
+        destino = np.asarray(vizinhos[inicio:fim, :k])
+        origem = np.broadcast_to(np.arange(inicio, fim, dtype=vizinhos.dtype)[:, None], destino.shape)
+        mesma_classe = np.asarray(y)[destino] == np.asarray(y[inicio:fim])[:, None]
+        quantidade = np.count_nonzero(mesma_classe)
+        out[0, total:total + quantidade] = origem[mesma_classe]
+        out[1, total:total + quantidade] = destino[mesma_classe]
+        total += quantidade
+    return out[0, :total], out[1, :total]
+
+
+def rotular_componentes(n: int, origem: np.ndarray, destino: np.ndarray) -> Tuple[int, np.ndarray]:
+    """
+    Encontra os componentes fracamente conectados do grafo formado pelas arestas.
+
+    :param n: Quantidade de vértices.
+    :type n: int
+    :param origem: Vértices de origem das arestas.
+    :type origem: numpy.ndarray
+    :param destino: Vértices de destino das arestas.
+    :type destino: numpy.ndarray
+    :return: Quantidade de componentes e o rótulo do componente de cada vértice.
+    :rtype: Tuple[int, numpy.ndarray]
+    """
+    adjacencia = coo_matrix((np.ones(len(origem), dtype=np.int8), (origem, destino)), shape=(n, n)).tocsr()
+    return connected_components(adjacencia, directed=True, connection='weak')
+
+
+def graus(n: int, origem: np.ndarray, destino: np.ndarray) -> np.ndarray:
+    """Grau (entrada mais saída) de cada vértice."""
+    return np.bincount(origem, minlength=n) + np.bincount(destino, minlength=n)
+
+
+class GrafoKAssociadoVetorizado:
+    """Representação vetorizada de um grafo k-associado.
+
+    **GrafoKAssociadoVetorizado**
+
+    Contém as arestas, o rótulo do componente de cada vértice e a pureza de cada componente, calculados de forma
+    equivalente a :class:`kaog.k_associado.KAssociado`.
+
+    Com `pesos`, cada vértice representa `pesos[i]` pontos idênticos, todos com as mesmas arestas de saída. A soma dos
+    graus de um componente passa a ser o dobro da soma dos graus de saída ponderados, e o tamanho, a soma dos pesos.
+    Com pesos unitários, os valores são os mesmos do grafo sem pesos.
+    """
+
+    def __init__(self, vizinhos: np.ndarray, y: np.ndarray, k: int, out: Optional[np.ndarray] = None,
+                 pesos: Optional[np.ndarray] = None):
+        """
+        :param vizinhos: Matriz (n, K) com os índices dos vizinhos mais próximos, ordenados.
+        :type vizinhos: numpy.ndarray
+        :param y: Classe (codificada) de cada vértice.
+        :type y: numpy.ndarray
+        :param k: Valor de k do grafo.
+        :type k: int
+        :param out: Array (2, n * k) onde as arestas serão escritas, podendo ser mapeado em disco.
+        :type out: numpy.ndarray
+        :param pesos: Multiplicidade de cada vértice. Por padrão, todos os vértices têm peso 1.
+        :type pesos: numpy.ndarray
+        """
+        self.k = k
+        self.pesos = pesos
+        self.n = vizinhos.shape[0]
+        self.origem, self.destino = arestas_k_associado(vizinhos, y, k, out)
+        self.quantidade_componentes, self.rotulos = rotular_componentes(self.n, self.origem, self.destino)
+        self.graus = graus(self.n, self.origem, self.destino)
+
+    @property
+    def tamanho_componentes(self) -> np.ndarray:
+        """Quantidade de vértices (ou soma dos pesos) de cada componente."""
+        return np.bincount(self.rotulos, weights=self.pesos, minlength=self.quantidade_componentes)
+
+    @property
+    def soma_graus_componentes(self) -> np.ndarray:
+        """Soma dos graus (ou dos graus ponderados) dos vértices de cada componente."""
+        return np.bincount(self.rotulos, weights=self._graus_ponderados, minlength=self.quantidade_componentes)
+
+    @property
+    def purezas(self) -> np.ndarray:
+        """Pureza de cada componente."""
+        return self.soma_graus_componentes / self.tamanho_componentes / (2 * self.k)
+
+    @property
+    def taxa(self) -> float:
+        """Média da soma dos graus dos componentes, dividida por k."""
+        return self._graus_ponderados.sum() / self.quantidade_componentes / self.k
+
+    @property
+    def _graus_ponderados(self) -> np.ndarray:
+        """Graus usados na pureza e na taxa: o dobro do grau de saída multiplicado pelo peso, quando há pesos."""
+        if self.pesos is None:
+            return self.graus
+        return 2 * np.bincount(self.origem, minlength=self.n) * self.pesos
+
+
+class HistoricoComponentes:
+    """Histórico das uniões de componentes ao longo dos valores de k.
+
+    **HistoricoComponentes**
+
+    Como as arestas do grafo k-associado contêm as do (k-1)-associado, cada componente do grafo k-associado é a união de
+    componentes do grafo anterior. O histórico armazena essa hierarquia: cada nó é um componente de um grafo
+    k-associado, ligado ao componente do grafo seguinte que o contém. Com ela, o grafo ótimo pode ser obtido novamente
+    para outras regras de parada, sem recalcular os grafos.
+
+    **Atributos** (um valor por nó, numerados nível a nível a partir de k = 1)
+    pai
+        Nó do nível seguinte que contém o componente, ou -1 no último nível.
+    k
+        Valor de k do grafo do componente.
+    purezas
+        Pureza do componente.
+    aceitos
+        Se o componente foi aceito como componente ótimo durante o treino.
+
+    **Demais atributos**
+    taxas
+        Taxa de cada grafo k-associado, com `taxas[k - 1]` para o valor k.
+    rotulos_iniciais
+        Nó do grafo 1-associado de cada vértice.
+    """
+
+    def __init__(self, rotulos: np.ndarray, purezas: np.ndarray, taxa: float):
+        """
+        Inicia o histórico com o grafo 1-associado, cujos componentes são todos aceitos.
+
+        :param rotulos: Componente de cada vértice no grafo 1-associado.
+        :type rotulos: numpy.ndarray
+        :param purezas: Pureza de cada componente.
+        :type purezas: numpy.ndarray
+        :param taxa: Taxa do grafo 1-associado.
+        :type taxa: float
+        """
+        self.rotulos_iniciais = np.asarray(rotulos)
+        self._rotulos_anteriores = self.rotulos_iniciais
+        self._niveis = [(np.ones(len(purezas), dtype=np.int64), np.asarray(purezas, dtype=np.float64),
+                         np.ones(len(purezas), dtype=bool))]
+        self._pais = []
+        self.taxas = [taxa]
+
+    def adicionar(self, k: int, rotulos: np.ndarray, purezas: np.ndarray, aceitos: np.ndarray, taxa: float):
+        """
+        Adiciona o grafo k-associado ao histórico.
+
+        :param k: Valor de k, igual ao último adicionado mais 1.
+        :type k: int
+        :param rotulos: Componente de cada vértice.
+        :type rotulos: numpy.ndarray
+        :param purezas: Pureza de cada componente.
+        :type purezas: numpy.ndarray
+        :param aceitos: Se cada componente foi aceito como componente ótimo.
+        :type aceitos: numpy.ndarray
+        :param taxa: Taxa do grafo.
+        :type taxa: float
+        """
+        inicio = sum(len(nivel[0]) for nivel in self._niveis)
+        pai = np.empty(len(self._niveis[-1][0]), dtype=np.int64)
+        pai[self._rotulos_anteriores] = np.asarray(rotulos) + inicio
+        self._pais.append(pai)
+        self._niveis.append((np.full(len(purezas), k, dtype=np.int64), np.asarray(purezas, dtype=np.float64),
+                             np.asarray(aceitos, dtype=bool)))
+        self._rotulos_anteriores = np.asarray(rotulos)
+        self.taxas.append(taxa)
+
+    def concluir(self):
+        """Concatena os níveis nos arrays do histórico, descartando os rótulos por vértice do último nível."""
+        self._pais.append(np.full(len(self._niveis[-1][0]), -1, dtype=np.int64))
+        self.pai = np.concatenate(self._pais)
+        self.k, self.purezas, self.aceitos = (np.concatenate(arrays) for arrays in zip(*self._niveis))
+        self.taxas = np.asarray(self.taxas)
+        del self._niveis, self._pais, self._rotulos_anteriores
+
+    def reabrir(self):
+        """
+        Desfaz :meth:`concluir`, permitindo adicionar novos grafos k-associados. Os rótulos por vértice do último nível
+        são obtidos seguindo os pais a partir dos rótulos iniciais.
+        """
+        inicios = np.concatenate([[0], np.cumsum(np.bincount(self.k - 1))])
+        fatias = [slice(inicio, fim) for inicio, fim in zip(inicios[:-1], inicios[1:])]
+        self._niveis = [(self.k[fatia], self.purezas[fatia], self.aceitos[fatia]) for fatia in fatias]
+        self._pais = [self.pai[fatia] for fatia in fatias[:-1]]
+        rotulos = self.rotulos_iniciais
+        for pai, inicio in zip(self._pais, inicios[1:]):
+            rotulos = pai[rotulos] - inicio
+        self._rotulos_anteriores = rotulos
+        self.taxas = list(self.taxas)
+        del self.pai, self.k, self.purezas, self.aceitos
+
+    @property
+    def ultimo_k(self) -> int:
+        """Último valor de k registrado."""
+        return len(self.taxas)
+
+    def reconstruir(self, k_max: Optional[int] = None, pureza_minima: Optional[float] = None,
+                    parar_na_queda: bool = True) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int, bool]:
+        """
+        Executa novamente o algoritmo KAOG sobre a hierarquia de componentes.
+
+        :param k_max: Maior valor de k considerado. Por padrão, `ultimo_k`.
+        :type k_max: int
+        :param pureza_minima: Se definido, um componente só é aceito se a sua pureza também for maior ou igual a esse
+            valor. Os componentes do grafo 1-associado são sempre aceitos.
+        :type pureza_minima: float
+        :param parar_na_queda: Se o algoritmo termina quando a taxa diminui, como no treino. Caso contrário, continua
+            até `k_max` ou até `ultimo_k`.
+        :type parar_na_queda: bool
+        :return: Componente ótimo de cada vértice (numerados a partir de 0), valor de k e pureza de cada componente
+            ótimo, último valor de k analisado e se o algoritmo terminou pela diminuição da taxa.
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, int, bool]
+        """
+        k_max = self.ultimo_k if k_max is None else min(k_max, self.ultimo_k)
+        inicios = np.concatenate([[0], np.cumsum(np.bincount(self.k - 1))])
+        no_vertice = self.rotulos_iniciais.astype(np.int64)
+        otimo_vertice = no_vertice.copy()
+        maior_pureza = self.purezas[:inicios[1]]
+        convergiu = False
+
+        k = 1
+        while k < k_max:
+            k += 1
+            inicio, fim = inicios[k - 1], inicios[k]
+            purezas_k = self.purezas[inicio:fim]
+            maior_pureza_otimos = np.full(fim - inicio, -np.inf)
+            np.maximum.at(maior_pureza_otimos, self.pai[inicios[k - 2]:inicio] - inicio, maior_pureza)
+            aceitos = purezas_k >= maior_pureza_otimos
+            if pureza_minima is not None:
+                aceitos &= purezas_k >= pureza_minima
+            maior_pureza = np.where(aceitos, purezas_k, maior_pureza_otimos)
+
+            no_vertice = self.pai[no_vertice]
+            substituidos = aceitos[no_vertice - inicio]
+            otimo_vertice[substituidos] = no_vertice[substituidos]
+
+            if parar_na_queda and self.taxas[k - 1] < self.taxas[k - 2]:
+                convergiu = True
+                break
+
+        usados, rotulos = np.unique(otimo_vertice, return_inverse=True)
+        return rotulos, self.k[usados], self.purezas[usados], k, convergiu
+
+
+class ComponentesOtimos:
+    """Resultado vetorizado do algoritmo KAOG.
+
+    **ComponentesOtimos**
+
+    Executa o mesmo procedimento de :meth:`kaog.KAOG._criar_kaog` sobre a matriz de vizinhos. O grafo ótimo é
+    representado pelo rótulo do componente ótimo de cada vértice, juntamente com o valor de k e a pureza de cada
+    componente.
+
+    **Atributos**
+    rotulos
+        Componente ótimo de cada vértice, numerados a partir de 0, com o mesmo tipo de `vizinhos`.
+    k
+        Valor de k do qual cada componente ótimo foi obtido.
+    purezas
+        Pureza de cada componente ótimo.
+    ultimo_k
+        Último valor de k analisado.
+    convergiu
+        Se o algoritmo terminou pela diminuição da taxa, e não por atingir `k_max`.
+    historico
+        :class:`HistoricoComponentes` com todos os grafos k-associados analisados.
+    """
+
+    def __init__(self, vizinhos: np.ndarray, y: np.ndarray, k_max: Optional[int] = None,
+                 buffer_arestas: Optional[np.ndarray] = None, parar_na_queda: bool = True,
+                 pesos: Optional[np.ndarray] = None):
+        """
+        :param vizinhos: Matriz (n, K) com os índices dos vizinhos mais próximos, ordenados.
+        :type vizinhos: numpy.ndarray
+        :param y: Classe (codificada) de cada vértice.
+        :type y: numpy.ndarray
+        :param k_max: Maior valor de k analisado. Por padrão, K.
+        :type k_max: int
+        :param buffer_arestas: Array (2, n * k_max) reutilizado para as arestas de cada k, podendo ser mapeado em disco.
+        :type buffer_arestas: numpy.ndarray
+        :param parar_na_queda: Se o algoritmo termina quando a taxa diminui. Caso contrário, continua até `k_max`.
+        :type parar_na_queda: bool
+        :param pesos: Multiplicidade de cada vértice, usada nas purezas e na taxa (:class:`GrafoKAssociadoVetorizado`).
+        :type pesos: numpy.ndarray
+        """
+        self.k_max = vizinhos.shape[1] if k_max is None else min(k_max, vizinhos.shape[1])
+        self.parar_na_queda = parar_na_queda
+        self.pesos = pesos
+        self._otimizar(vizinhos, y, buffer_arestas)
+
+    @classmethod
+    def de_historico(cls, historico: HistoricoComponentes, dtype: np.dtype = np.int64, **kwargs) -> 'ComponentesOtimos':
+        """
+        Obtém os componentes ótimos a partir de um histórico, sem recalcular os grafos k-associados.
+
+        :param historico: Histórico registrado no treino.
+        :type historico: HistoricoComponentes
+        :param dtype: Tipo dos rótulos.
+        :type dtype: numpy.dtype
+        :param kwargs: Parâmetros de :meth:`HistoricoComponentes.reconstruir`.
+        :return: Componentes ótimos.
+        :rtype: ComponentesOtimos
+        """
+        componentes = cls.__new__(cls)
+        rotulos, componentes.k, componentes.purezas, componentes.ultimo_k, componentes.convergiu = \
+            historico.reconstruir(**kwargs)
+        componentes.rotulos = rotulos.astype(dtype, copy=False)
+        componentes.k_max = kwargs.get('k_max') or historico.ultimo_k
+        componentes.historico = historico
+        return componentes
+
+    def continuar(self, vizinhos: np.ndarray, y: np.ndarray, k_max: int,
+                  buffer_arestas: Optional[np.ndarray] = None, parar_na_queda: Optional[bool] = None):
+        """
+        Continua o algoritmo a partir de `ultimo_k`, com o mesmo resultado de uma execução que tivesse começado com o
+        novo `k_max`. Se o algoritmo havia terminado pela diminuição da taxa, a análise continua a partir do k seguinte.
+
+        :param vizinhos: Mesma matriz de vizinhos usada no cálculo, com pelo menos `k_max` colunas.
+        :type vizinhos: numpy.ndarray
+        :param y: Mesmo array de classes usado no cálculo.
+        :type y: numpy.ndarray
+        :param k_max: Novo maior valor de k analisado.
+        :type k_max: int
+        :param buffer_arestas: Array (2, n * k_max) reutilizado para as arestas de cada k.
+        :type buffer_arestas: numpy.ndarray
+        :param parar_na_queda: Se o algoritmo termina quando a taxa diminui. Por padrão, o valor usado no cálculo.
+        :type parar_na_queda: bool
+        """
+        if min(k_max, vizinhos.shape[1]) <= self.ultimo_k:
+            return
+        self.k_max = min(k_max, vizinhos.shape[1])
+        if parar_na_queda is not None:
+            self.parar_na_queda = parar_na_queda
+        self.historico.reabrir()
+        self._estender(vizinhos, y, buffer_arestas, self.ultimo_k, self.rotulos.astype(np.int64), [self.k],
+                       [self.purezas])
+
+    def _otimizar(self, vizinhos, y, buffer_arestas):
+        """Laço principal do KAOG, interrompido quando a taxa diminui ou quando `k_max` é atingido."""
+        grafo_k = GrafoKAssociadoVetorizado(vizinhos, y, 1, buffer_arestas, self.pesos)
+        self.historico = HistoricoComponentes(grafo_k.rotulos, grafo_k.purezas, grafo_k.taxa)
+        self._estender(vizinhos, y, buffer_arestas, 1, grafo_k.rotulos.copy(),
+                       [np.ones(grafo_k.quantidade_componentes, dtype=np.int64)], [grafo_k.purezas])
+
+    def _estender(self, vizinhos, y, buffer_arestas, k, rotulos, ks, purezas):
+        """Analisa os grafos k-associados a partir de `k + 1`, dados os componentes ótimos obtidos até `k`."""
+        quantidade = sum(len(ks_nivel) for ks_nivel in ks)
+        ultima_taxa = self.historico.taxas[-1]
+        self.convergiu = False
+
+        while k < self.k_max:
+            k += 1
+            grafo_k = GrafoKAssociadoVetorizado(vizinhos, y, k, buffer_arestas, self.pesos)
+            pureza_k = grafo_k.purezas
+
+            # Cada componente ótimo está contido em um único componente do k-associado
+            pureza_otimos = np.concatenate(purezas)[rotulos]
+            maior_pureza = np.full(grafo_k.quantidade_componentes, -np.inf)
+            np.maximum.at(maior_pureza, grafo_k.rotulos, pureza_otimos)
+            aceitos = pureza_k >= maior_pureza
+
+            novos_ids = np.cumsum(aceitos) - 1 + quantidade
+            substituidos = aceitos[grafo_k.rotulos]
+            rotulos[substituidos] = novos_ids[grafo_k.rotulos[substituidos]]
+            ks.append(np.full(np.count_nonzero(aceitos), k, dtype=np.int64))
+            purezas.append(pureza_k[aceitos])
+            quantidade += np.count_nonzero(aceitos)
+
+            taxa = grafo_k.taxa
+            self.historico.adicionar(k, grafo_k.rotulos, pureza_k, aceitos, taxa)
+            if taxa < ultima_taxa and self.parar_na_queda:
+                self.convergiu = True
+                break
+            ultima_taxa = taxa
+
+        self.ultimo_k = k
+        self.historico.concluir()
+        usados, rotulos = np.unique(rotulos, return_inverse=True)
+        self.rotulos = rotulos.astype(vizinhos.dtype, copy=False)
+        self.k = np.concatenate(ks)[usados]
+        self.purezas = np.concatenate(purezas)[usados]
+
+    @property
+    def k_por_vertice(self) -> np.ndarray:
+        """Valor de k do componente ótimo de cada vértice."""
+        return self.k[self.rotulos]
+
+    def arestas(self, vizinhos: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Arestas do grafo ótimo: cada vértice é ligado aos vizinhos de mesma classe dentre os `k` primeiros, sendo `k` o
+        valor associado ao seu componente ótimo.
+
+        :param vizinhos: Mesma matriz de vizinhos usada no cálculo.
+        :type vizinhos: numpy.ndarray
+        :param y: Mesmo array de classes usado no cálculo.
+        :type y: numpy.ndarray
+        :return: Arrays de origem e destino das arestas.
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+        """
+        k_max = int(self.k.max())
+        destino = np.asarray(vizinhos[:, :k_max])
+        y = np.asarray(y)
+        mascara = (np.arange(k_max) < self.k_por_vertice[:, None]) & (y[destino] == y[:, None])
+        origem = np.broadcast_to(np.arange(len(destino), dtype=destino.dtype)[:, None], destino.shape)
+        return origem[mascara], destino[mascara]
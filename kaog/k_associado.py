@@ -1,7 +1,8 @@
 from statistics import mean
-from typing import Dict, Set, Union, List, FrozenSet
+from typing import Dict, Set, Union, List, FrozenSet, Callable
 
 import networkx as nx
+import numpy as np
 import pandas as pd
 
 from kaog.distancias import Distancias
@@ -19,7 +20,8 @@ class KAssociado(DrawableGraph):
     Sendo assim, para as distâncias, não importa as classes dos vértices. A classe só é utilizada para a conexão.
     """
 
-    def __init__(self, k: int, data: pd.DataFrame, colunas_categoricas: pd.Index = pd.Index([])):
+    def __init__(self, k: int, data: pd.DataFrame, colunas_categoricas: pd.Index = pd.Index([]),
+                 distancias: Distancias = None, coluna_y: str = None, metrica: Union[str, Callable] = None):
         """
         Cada instância de `data` é representada como um vértice, que será conectado a todos seus `k` vizinhos mais
         próximos, se pertencerem a mesma classe.
@@ -29,10 +31,21 @@ class KAssociado(DrawableGraph):
         :type k: int
         :param data: Conjunto de dados com classe associada.
         :type data: pd.DataFrame
+        :param distancias: Distâncias e vizinhos já calculados para os pontos de `data`, compartilhados entre grafos com
+            valores de k diferentes. Por padrão, são calculados novamente.
+        :type distancias: Distancias
+        :param coluna_y: Nome da coluna de classe. Por padrão, `ColunaYSingleton().NOME_COLUNA_Y`.
+        :type coluna_y: str
+        :param metrica: Métrica de distância, usada apenas se `distancias` não for passado. Por padrão,
+            `Distancias.METRIC`.
+        :type metrica: Union[str, Callable]
         """
         self._k = k
         self._data: pd.DataFrame = data.copy()
-        self.distancias = Distancias(self.x, colunas_categoricas)
+        self.coluna_y = ColunaYSingleton().NOME_COLUNA_Y if coluna_y is None else coluna_y
+        if distancias is None:
+            distancias = Distancias(self.x, colunas_categoricas, metrica)
+        self.distancias = distancias
 
         vizinhos = self._determinar_vizinhos()
 
@@ -57,12 +70,12 @@ class KAssociado(DrawableGraph):
     @property
     def x(self) -> pd.DataFrame:
         """Dados sem classe associada."""
-        return self.data.drop(ColunaYSingleton().NOME_COLUNA_Y, axis=1, errors='ignore')
+        return self.data.drop(self.coluna_y, axis=1, errors='ignore')
 
     @property
     def y(self) -> pd.Series:
         """Classe de cada vértice."""
-        return self.data[ColunaYSingleton().NOME_COLUNA_Y]
+        return self.data[self.coluna_y]
 
     @property
     def componentes(self) -> List[FrozenSet[int]]:
@@ -93,7 +106,7 @@ class KAssociado(DrawableGraph):
             raise RuntimeError(f'O valor da pureza do componente {componente} é {pureza}, fora do intervalo [1,0].')
         return pureza
 
-    def draw(self, title=None, color_by_component=False):
+    def draw(self, title=None, color_by_component=False, arquivo=None, with_labels=True):
         """
         Desenha o grafo. Por padrão, a cor de cada vértice é a sua classe.
 
@@ -101,10 +114,33 @@ class KAssociado(DrawableGraph):
         :type title: str
         :param color_by_component: Se deve colorir os vértices por componente ao invés das classes.
         :type color_by_component: bool
+        :param arquivo: Se definido, a figura é salva nesse arquivo, sem ser exibida.
+        :type arquivo: str
+        :param with_labels: Se os índices dos vértices devem ser escritos.
+        :type with_labels: bool
+        :return: Figura criada.
+        :rtype: matplotlib.figure.Figure
         """
         if title is None:
             title = f'{self.k}-associado'
-        super().draw(title=title, color_by_component=color_by_component)
+        return super().draw(title=title, color_by_component=color_by_component, arquivo=arquivo,
+                            with_labels=with_labels)
+
+    def pureza_e_k_componentes(self, componentes: List[FrozenSet[int]]) -> (np.ndarray, np.ndarray):
+        """
+        Pureza e valor de k de vários componentes do grafo, sem as validações de :meth:`pureza`.
+
+        :param componentes: Componentes do grafo.
+        :type componentes: List[FrozenSet[int]]
+        :return: Arrays com a pureza e o valor de k (sempre `self.k`) de cada componente.
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+        """
+        purezas = np.array([self._obter_media_grau_componente(c) for c in componentes]) / (2 * self.k)
+        return purezas, np.full(len(componentes), self.k)
+
+    def _pureza_e_k_componentes(self, componentes: List[FrozenSet[int]]) -> (np.ndarray, np.ndarray):
+        """Pureza e valor de k de cada componente, usados no desenho agregado."""
+        return self.pureza_e_k_componentes(componentes)
 
     def _gen_componentes(self):
         """Gerador para os componentes do grafo."""
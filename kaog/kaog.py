@@ -1,17 +1,103 @@
 import logging
-from typing import Dict, List, FrozenSet
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Mapping
+from typing import Dict, List, FrozenSet, Callable, Iterable, Union
 
 import networkx as nx
 import numpy as np
 import pandas as pd
+from scipy import sparse
 
-from kaog.distancias import Distancias
+from kaog.distancias import Distancias, Matriz, _quantidade_threads
+from kaog.duplicados import agrupar_duplicados
+from kaog.grafo_particionado import componentes_otimos_por_classe
 from kaog.grafo_otimo import GrafoOtimo
+from kaog.grafo_vetorizado import ComponentesOtimos, HistoricoComponentes
 from kaog.k_associado import KAssociado
+from kaog.prototipos import SelecaoPrototipos
+from kaog.reducao import ReducaoDimensionalidade
 from kaog.util import ColunaYSingleton
 from kaog.util.draw import DrawableGraph
 
 
+def probabilidades_bertini(vizinhos: np.ndarray, rotulos: np.ndarray, k_componentes: np.ndarray, purezas: np.ndarray,
+                           y: np.ndarray, n_classes: int, pesos: np.ndarray = None) -> np.ndarray:
+    """
+    Probabilidade de cada classe para consultas cujos vizinhos já foram buscados, como em :meth:`KAOG.predict_proba`.
+
+    :param vizinhos: Matriz (m, k_max) com as posições dos vizinhos de cada consulta, ordenados, sendo k_max o maior
+        valor de k dos componentes.
+    :type vizinhos: numpy.ndarray
+    :param rotulos: Componente ótimo de cada vértice.
+    :type rotulos: numpy.ndarray
+    :param k_componentes: Valor de k de cada componente.
+    :type k_componentes: numpy.ndarray
+    :param purezas: Pureza de cada componente.
+    :type purezas: numpy.ndarray
+    :param y: Classe codificada de cada vértice.
+    :type y: numpy.ndarray
+    :param n_classes: Quantidade de classes.
+    :type n_classes: int
+    :param pesos: Multiplicidade de cada vértice. Um vértice com peso w ocupa w posições dentre os k_C vizinhos, como
+        se as w cópias estivessem presentes.
+    :type pesos: numpy.ndarray
+    :return: Matriz (m, n_classes) com as probabilidades.
+    :rtype: numpy.ndarray
+    """
+    componentes = rotulos[vizinhos]
+    if pesos is None:
+        conectados = np.arange(vizinhos.shape[1]) < k_componentes[componentes]
+        pesos = purezas[componentes] / k_componentes[componentes]
+    else:
+        multiplicidades = pesos[vizinhos]
+        anteriores = np.cumsum(multiplicidades, axis=1) - multiplicidades
+        posicoes = np.clip(k_componentes[componentes] - anteriores, 0, multiplicidades)
+        conectados = posicoes > 0
+        pesos = purezas[componentes] / k_componentes[componentes] * posicoes
+    n = vizinhos.shape[0]
+    consultas = np.broadcast_to(np.arange(n)[:, None], vizinhos.shape)
+    classes_vizinhos = y[vizinhos]
+
+    probabilidades = np.zeros((n, n_classes))
+    np.add.at(probabilidades, (consultas[conectados], classes_vizinhos[conectados]), pesos[conectados])
+    sem_conexao = probabilidades.sum(axis=1) == 0
+    probabilidades[sem_conexao, classes_vizinhos[sem_conexao, 0]] = 1
+    probabilidades /= probabilidades.sum(axis=1, keepdims=True)
+    return probabilidades
+
+
+class GrafosAssociadosSobDemanda(Mapping):
+    """Grafos k-associados criados apenas quando acessados.
+
+    **GrafosAssociadosSobDemanda**
+
+    Mapeia cada valor de k analisado para o respectivo grafo k-associado, sem mantê-los em memória. A cada acesso, o
+    grafo é criado novamente a partir dos vizinhos compartilhados.
+    """
+
+    def __init__(self, ks: Iterable[int], criar: Callable[[int], KAssociado]):
+        """
+        :param ks: Valores de k disponíveis.
+        :type ks: Iterable[int]
+        :param criar: Função que recebe k e cria o grafo k-associado.
+        :type criar: Callable[[int], KAssociado]
+        """
+        self._ks = list(ks)
+        self._criar = criar
+
+    def __getitem__(self, k: int) -> KAssociado:
+        if k not in self._ks:
+            raise KeyError(k)
+        return self._criar(k)
+
+    def __iter__(self):
+        return iter(self._ks)
+
+    def __len__(self):
+        return len(self._ks)
+
+
 class KAOG(DrawableGraph):
     """Algoritmo para criar o grafo otimo de um conjunto de dados.
 
@@ -19,22 +105,129 @@ class KAOG(DrawableGraph):
 
     A partir do conjunto de dados forneido, é executado o algoritmo para criar o grafo ótimo.
 
-    """
+    Os dados também podem ser passados como uma matriz (`numpy.ndarray` ou matriz esparsa do scipy) e um array de
+    classes, sem conversão para DataFrame. Nesse caso, os vértices são as posições das linhas, `x` retorna a própria
+    matriz e `data` contém apenas a coluna de classe. O desenho requer um DataFrame.
 
-    def __init__(self, data: pd.DataFrame, colunas_categoricas: pd.Index = pd.Index([])):
+    """
+    MOTORES = ('referencia', 'vetorizado', 'particionado')
+
+    def __init__(self, data: Matriz, colunas_categoricas: pd.Index = pd.Index([]), modo_enxuto: bool = False,
+                 coluna_y: str = None, metrica: Union[str, Callable] = None, algoritmo: str = 'ball_tree',
+                 n_jobs: int = 1, distancias: Distancias = None, dtype: Union[type, np.dtype] = np.float64,
+                 motor: str = 'referencia', y: Union[np.ndarray, pd.Series] = None,
+                 reducao: ReducaoDimensionalidade = None, prototipos: SelecaoPrototipos = None,
+                 parada: str = 'global', comprimir_duplicados: bool = False,
+                 pesos: Union[np.ndarray, pd.Series] = None):
         """
         Cria um objeto do tipo KAOG. Todo o procedimento para criar o grafo ótimo é executado aqui.
 
-        :param data: Conjunto de dados contendo também informação de classe, do qual será criado o grafo ótimo.
-        :type data: pd.DataFrame
+        As distâncias e vizinhos são calculados uma única vez e compartilhados por todos os grafos k-associados. Toda a
+        configuração (métrica, coluna de classe e opções do NearestNeighbors) é mantida por instância, de forma que
+        objetos com configurações diferentes podem ser criados ao mesmo tempo.
+
+        :param data: Conjunto de dados contendo também informação de classe, do qual será criado o grafo ótimo. Também
+            pode ser uma matriz de atributos (`numpy.ndarray` ou matriz esparsa do scipy), com as classes em `y`.
+        :type data: Union[pandas.DataFrame, numpy.ndarray, scipy.sparse.spmatrix]
+        :param modo_enxuto: Se `True`, os grafos k-associados não são mantidos após a criação do grafo ótimo e os
+            vizinhos são truncados ao maior k analisado, de forma que a memória retida seja O(n * k). Os grafos em
+            `grafos_associados` passam a ser criados novamente a cada acesso.
+        :type modo_enxuto: bool
+        :param coluna_y: Nome da coluna de classe. Por padrão, `ColunaYSingleton().NOME_COLUNA_Y`.
+        :type coluna_y: str
+        :param metrica: Métrica de distância. Por padrão, `Distancias.METRIC`.
+        :type metrica: Union[str, Callable]
+        :param algoritmo: Algoritmo usado pelo NearestNeighbors.
+        :type algoritmo: str
+        :param n_jobs: Quantidade de processos usados pelo NearestNeighbors.
+        :type n_jobs: int
+        :param distancias: Distâncias e vizinhos já calculados para os pontos de `data`, sem a coluna de classe. Quando
+            passado, `metrica`, `algoritmo`, `n_jobs` e `dtype` são ignorados e não há busca de vizinhos. Também pode
+            ser criado a partir de vizinhos ou de uma matriz de distâncias externos, com
+            :meth:`Distancias.pre_calculadas` e :meth:`Distancias.de_matriz_distancias`.
+        :type distancias: Distancias
+        :param dtype: Precisão das distâncias, `numpy.float64` ou `numpy.float32`. Com `numpy.float32`, os índices dos
+            vizinhos, as arestas e os rótulos dos componentes do motor vetorizado usam `numpy.int32`.
+        :type dtype: Union[type, numpy.dtype]
+        :param motor: `'referencia'`, que cria cada grafo k-associado com o networkx, ou `'vetorizado'`, que executa o
+            algoritmo sobre a matriz de vizinhos (:mod:`kaog.grafo_vetorizado`) e cria os grafos k-associados apenas
+            quando acessados. Ambos resultam no mesmo grafo ótimo. `'particionado'` executa o motor vetorizado
+            separadamente para cada classe, em `n_jobs` processos (:mod:`kaog.grafo_particionado`).
+        :type motor: str
+        :param y: Classe de cada linha, obrigatória quando `data` é uma matriz.
+        :type y: Union[numpy.ndarray, pandas.Series]
+        :param reducao: Redução de dimensionalidade ajustada sobre os atributos antes da busca de vizinhos e aplicada
+            também às consultas de :meth:`predict_proba`. Se `distancias` for passado, a redução já deve ter sido
+            ajustada sobre os mesmos pontos.
+        :type reducao: ReducaoDimensionalidade
+        :param prototipos: Seleção de protótipos aplicada a `data` antes de todo o procedimento. O grafo ótimo e as
+            classificações passam a usar apenas os protótipos, disponíveis em `data`. A seleção usa as mesmas
+            `colunas_categoricas` e `metrica` do KAOG.
+        :type prototipos: SelecaoPrototipos
+        :param parada: Regra de parada do motor particionado: `'global'`, com o mesmo grafo ótimo dos demais motores, ou
+            `'por_classe'`, em que cada classe termina quando a sua própria taxa diminui. Com `'por_classe'`, o
+            `historico` não é mantido.
+        :type parada: str
+        :param comprimir_duplicados: Se `True`, as linhas com os mesmos atributos e a mesma classe são reunidas em um
+            único vértice, com peso igual à quantidade de linhas (:mod:`kaog.duplicados`). `data` passa a conter apenas
+            a primeira linha de cada grupo, a pureza, a taxa e as classificações consideram os pesos em
+            `multiplicidades` e `representantes` associa cada linha original ao seu vértice. Requer o motor
+            vetorizado ou particionado. Os grafos em `grafos_associados` não usam os pesos.
+        :type comprimir_duplicados: bool
+        :param pesos: Multiplicidade (inteira e positiva) de cada linha de `data`, como em `comprimir_duplicados`: cada
+            linha é um vértice com esse peso, registrado em `multiplicidades`. Uma `pandas.Series` é alinhada pelo
+            índice de `data`, e um array, pela posição. Com `comprimir_duplicados`, os pesos de cada grupo são somados.
+            Requer o motor vetorizado ou particionado.
+        :type pesos: Union[numpy.ndarray, pandas.Series]
+        :raises ValueError: Se `distancias` não corresponder aos pontos de `data`, se o motor for desconhecido, se
+            `data` for uma matriz e `y` não for passado, se houver colunas categóricas com `reducao`, se `prototipos`
+            for usado com uma matriz, se `comprimir_duplicados` for usado com o motor de referência ou com uma matriz
+            esparsa ou se `pesos` for usado com o motor de referência ou não tiver um peso inteiro positivo por linha.
         """
-        self._data = data.copy()
+        if motor not in self.MOTORES:
+            raise ValueError(f'Motor {motor} desconhecido, use um dentre {self.MOTORES}.')
+        self.coluna_y = ColunaYSingleton().NOME_COLUNA_Y if coluna_y is None else coluna_y
+        if isinstance(data, pd.DataFrame):
+            self._x_matriz = None
+            self._data = data.copy() if prototipos is None else prototipos.selecionar(data, self.coluna_y,
+                                                                                      colunas_categoricas, metrica)
+        else:
+            if y is None:
+                raise ValueError('As classes `y` devem ser passadas quando `data` é uma matriz.')
+            if prototipos is not None:
+                raise ValueError('A seleção de protótipos requer um DataFrame.')
+            self._x_matriz = data
+            self._data = pd.DataFrame({self.coluna_y: np.asarray(y)})
+        self.multiplicidades, self.representantes = None, None
+        if pesos is not None:
+            if motor == 'referencia':
+                raise ValueError('Os pesos dos vértices requerem o motor vetorizado ou particionado.')
+            self.multiplicidades = self._multiplicidades_das_linhas(pesos, data)
+        if comprimir_duplicados:
+            if motor == 'referencia':
+                raise ValueError('A compressão de duplicados requer o motor vetorizado ou particionado.')
+            self._comprimir_duplicados()
         self.cat_cols = colunas_categoricas.copy()
-
-        self.grafos_associados: Dict[int, KAssociado] = {}
+        self.modo_enxuto = modo_enxuto
+        self.metrica = metrica
+        self.algoritmo = algoritmo
+        self.n_jobs = n_jobs
+        self.dtype = dtype
+        self.motor = motor
+        self.parada = parada
+        self.reducao = reducao
+        self._dist = distancias
+        self._arrays_predicao = None
+
+        self.grafos_associados: Mapping[int, KAssociado] = {}
         self.componentes_otimos: Dict[FrozenSet[int], int] = {}  # Mapeia o valor de k do componente escolhido
-        self._criar_kaog()
         self._calcular_distancias_e_vizinhos()
+        if self.motor != 'referencia':
+            self._criar_kaog_vetorizado()
+        else:
+            self._criar_kaog()
+            if self.modo_enxuto:
+                self._liberar_grafos_associados()
 
     @property
     def data(self) -> pd.DataFrame:
@@ -42,14 +235,16 @@ class KAOG(DrawableGraph):
         return self._data.copy()
 
     @property
-    def x(self) -> pd.DataFrame:
-        """Dados sem a classe."""
-        return self.data.drop(ColunaYSingleton().NOME_COLUNA_Y, axis=1)
+    def x(self) -> Matriz:
+        """Dados sem a classe. Se o KAOG foi criado a partir de uma matriz, a própria matriz."""
+        if self._x_matriz is not None:
+            return self._x_matriz
+        return self.data.drop(self.coluna_y, axis=1)
 
     @property
     def y(self) -> pd.Series:
         """Informação de classe."""
-        return self.data[ColunaYSingleton().NOME_COLUNA_Y]
+        return self.data[self.coluna_y]
 
     @property
     def grafo(self):
@@ -68,9 +263,187 @@ class KAOG(DrawableGraph):
 
     @staticmethod
     def set_metrica_distancia(metrica):
+        """
+        Define a métrica padrão de **todas** as instâncias criadas sem o parâmetro `metrica`. Prefira passar `metrica`
+        ao construtor, que não afeta outras instâncias.
+        """
         Distancias.METRIC = metrica
 
-    def draw(self, title=None, color_by_component=False):
+    def predict_proba(self, x: Matriz) -> pd.DataFrame:
+        """
+        Probabilidade de cada classe para novos pontos, conforme o classificador KAOG de Bertini.
+
+        Cada ponto é conectado a cada componente ótimo C por meio dos seus k_C vizinhos mais próximos, sendo k_C o valor
+        de k do componente. A probabilidade do ponto pertencer a C é proporcional à fração desses vizinhos que pertencem
+        a C, ponderada pela pureza de C. A probabilidade de cada classe é a soma das probabilidades dos seus componentes.
+        Se o ponto não se conectar a nenhum componente com pureza positiva, é atribuída a classe do vizinho mais próximo.
+
+        Todos os pontos são processados em lote, com uma única busca de vizinhos. Com `comprimir_duplicados`, cada
+        vizinho ocupa tantas posições dentre os k_C vizinhos quanto a sua multiplicidade.
+
+        :param x: Pontos a serem classificados, com as mesmas colunas de `self.x`, ou uma matriz, se o KAOG tiver sido
+            criado a partir de uma matriz.
+        :type x: Union[pandas.DataFrame, numpy.ndarray, scipy.sparse.spmatrix]
+        :return: Probabilidade de cada classe (colunas) para cada ponto (linhas). Para matrizes, o índice é a posição.
+        :rtype: pandas.DataFrame
+        """
+        rotulos, k_componentes, purezas, y, classes = self._componentes_por_vertice()
+        _, vizinhos = self._dist.vizinhos_de_consultas(self._reduzir(x), int(k_componentes.max()))
+        probabilidades = probabilidades_bertini(vizinhos, rotulos, k_componentes, purezas, y, len(classes),
+                                                self._pesos)
+        indice = x.index if isinstance(x, pd.DataFrame) else pd.RangeIndex(x.shape[0])
+        return pd.DataFrame(probabilidades, index=indice, columns=classes)
+
+    def predict(self, x: Matriz) -> pd.Series:
+        """
+        Classe mais provável de cada ponto, conforme :meth:`predict_proba`.
+
+        :param x: Pontos a serem classificados, como em :meth:`predict_proba`.
+        :type x: Union[pandas.DataFrame, numpy.ndarray, scipy.sparse.spmatrix]
+        :return: Classe de cada ponto.
+        :rtype: pandas.Series
+        """
+        probabilidades = self.predict_proba(x)
+        return pd.Series(probabilidades.columns[probabilidades.to_numpy().argmax(axis=1)], index=probabilidades.index,
+                         name=self.coluna_y)
+
+    def reajustar_classes(self, y: Union[np.ndarray, pd.Series]) -> 'KAOG':
+        """
+        Cria um novo KAOG com os mesmos atributos e novas classes, reaproveitando as distâncias, os vizinhos e a
+        codificação dos atributos. Apenas as arestas, os componentes e o grafo ótimo são calculados novamente.
+
+        :param y: Nova classe de cada ponto. Uma `pandas.Series` é alinhada pelo índice de `data`, e um array, pela
+            posição.
+        :type y: Union[numpy.ndarray, pandas.Series]
+        :return: KAOG com as novas classes e a mesma configuração.
+        :rtype: KAOG
+        :raises ValueError: Se os vizinhos tiverem sido truncados pelo modo enxuto, se os duplicados tiverem sido
+            comprimidos ou se `y` tiver outro tamanho.
+        """
+        if self.representantes is not None:
+            raise ValueError('Os duplicados foram agrupados pelas classes atuais, não é possível trocar as classes.')
+        if self._dist.vizinhos.shape[1] < len(self.y) - 1:
+            raise ValueError('Os vizinhos foram truncados pelo modo enxuto, não é possível reaproveitá-los.')
+        y = y.loc[self.y.index].to_numpy() if isinstance(y, pd.Series) else np.asarray(y)
+        if len(y) != len(self.y):
+            raise ValueError(f'São esperadas {len(self.y)} classes, mas foram passadas {len(y)}.')
+
+        configuracao = dict(colunas_categoricas=self.cat_cols, modo_enxuto=self.modo_enxuto, coluna_y=self.coluna_y,
+                            metrica=self.metrica, algoritmo=self.algoritmo, n_jobs=self.n_jobs,
+                            distancias=self._dist, dtype=self.dtype, motor=self.motor, reducao=self.reducao,
+                            parada=self.parada, pesos=self.multiplicidades)
+        if self._x_matriz is not None:
+            return KAOG(self._x_matriz, y=y, **configuracao)
+        data = self._data.copy()
+        data[self.coluna_y] = y
+        return KAOG(data, **configuracao)
+
+    def para_indices_originais(self, valores: pd.Series) -> pd.Series:
+        """
+        Associa valores calculados por vértice, como o componente de cada vértice, a cada linha original, quando os
+        duplicados foram comprimidos.
+
+        :param valores: Valores indexados pelos vértices (índice de `data`).
+        :type valores: pandas.Series
+        :return: Valor do vértice de cada linha original, indexado pelas linhas originais. Sem compressão, o próprio
+            `valores`.
+        :rtype: pandas.Series
+        """
+        if self.representantes is None:
+            return valores
+        return pd.Series(valores.loc[self.representantes].to_numpy(), index=self.representantes.index,
+                         name=valores.name)
+
+    def reajustar_classes_em_lote(self, ys: Iterable[Union[np.ndarray, pd.Series]],
+                                  max_workers: int = None) -> List['KAOG']:
+        """
+        Executa :meth:`reajustar_classes` para vários vetores de classes, em paralelo, compartilhando as mesmas
+        distâncias e vizinhos.
+
+        :param ys: Vetores de classes.
+        :type ys: Iterable[Union[numpy.ndarray, pandas.Series]]
+        :param max_workers: Quantidade máxima de threads. Por padrão, definida pelo `ThreadPoolExecutor`.
+        :type max_workers: int
+        :return: Um KAOG para cada vetor de classes, na mesma ordem.
+        :rtype: List[KAOG]
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.reajustar_classes, ys))
+
+    def reconstruir_grafo_otimo(self, k_max: int = None, pureza_minima: float = None,
+                                parar_na_queda: bool = True) -> GrafoOtimo:
+        """
+        Cria o grafo ótimo para outra regra de parada a partir de `historico`, sem recalcular os grafos k-associados.
+        Com os valores padrão, o resultado é igual a `grafo_otimo`.
+
+        Apenas os valores de k analisados no treino estão disponíveis no histórico.
+
+        :param k_max: Maior valor de k considerado.
+        :type k_max: int
+        :param pureza_minima: Pureza mínima para que um componente seja aceito como componente ótimo.
+        :type pureza_minima: float
+        :param parar_na_queda: Se o algoritmo termina quando a taxa diminui.
+        :type parar_na_queda: bool
+        :return: Grafo ótimo obtido.
+        :rtype: GrafoOtimo
+        :raises ValueError: Se o histórico não tiver sido mantido, com a parada por classe.
+        """
+        if self.historico is None:
+            raise ValueError('O histórico não é mantido com a parada por classe.')
+        y = pd.factorize(self.y)[0].astype(self._dist.dtype_indices)
+        componentes = ComponentesOtimos.de_historico(self.historico, self._dist.dtype_indices, k_max=k_max,
+                                                     pureza_minima=pureza_minima, parar_na_queda=parar_na_queda)
+        return self._grafo_otimo_de_componentes(componentes, y)
+
+    def alteracao_vizinhos(self, k: int = 10, amostra: int = 500, random_state: int = None) -> Dict[str, float]:
+        """
+        Mede quanto os vizinhos mais próximos foram alterados pela redução de dimensionalidade, comparando-os com os
+        vizinhos no espaço original para uma amostra dos pontos.
+
+        :param k: Quantidade de vizinhos comparados.
+        :type k: int
+        :param amostra: Quantidade de pontos comparados.
+        :type amostra: int
+        :param random_state: Semente do sorteio da amostra.
+        :type random_state: int
+        :return: Ver :meth:`kaog.reducao.ReducaoDimensionalidade.alteracao_vizinhos`.
+        :rtype: Dict[str, float]
+        :raises RuntimeError: Se o KAOG não tiver sido criado com redução de dimensionalidade.
+        """
+        if self.reducao is None:
+            raise RuntimeError('O KAOG foi criado sem redução de dimensionalidade.')
+        metrica = Distancias.METRIC if self.metrica is None else self.metrica
+        return self.reducao.alteracao_vizinhos(self._matriz_atributos(self.x), self._dist.vizinhos, k, amostra,
+                                               metrica, random_state)
+
+    def salvar(self, caminho: str):
+        """
+        Serializa o modelo em um arquivo, com o *pickle*.
+
+        :param caminho: Caminho do arquivo.
+        :type caminho: str
+        """
+        with open(caminho, 'wb') as arquivo:
+            pickle.dump(self, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def carregar(caminho: str) -> 'KAOG':
+        """
+        Carrega um modelo salvo com :meth:`salvar`.
+
+        :param caminho: Caminho do arquivo.
+        :type caminho: str
+        :return: Modelo carregado.
+        :rtype: KAOG
+        :raises TypeError: Se o arquivo não contiver um KAOG.
+        """
+        with open(caminho, 'rb') as arquivo:
+            modelo = pickle.load(arquivo)
+        if not isinstance(modelo, KAOG):
+            raise TypeError(f'O arquivo {caminho} não contém um KAOG.')
+        return modelo
+
+    def draw(self, title=None, color_by_component=False, arquivo=None, with_labels=True):
         """
         Desenha o grafo ótimo.
 
@@ -78,10 +451,42 @@ class KAOG(DrawableGraph):
         :type title: str
         :param color_by_component: Se True, desenha o grafo ótimo colorido por componentes.
         :type color_by_component: bool
+        :param arquivo: Se definido, a figura é salva nesse arquivo, sem ser exibida.
+        :type arquivo: str
+        :param with_labels: Se os índices dos vértices devem ser escritos.
+        :type with_labels: bool
+        :return: Figura criada.
+        :rtype: matplotlib.figure.Figure
         """
         if title is None:
             title = 'Grafo Ótimo'
-        super().draw(title=title, color_by_component=color_by_component)
+        return super().draw(title=title, color_by_component=color_by_component, arquivo=arquivo,
+                            with_labels=with_labels)
+
+    def _componentes_por_vertice(self):
+        """
+        Arrays usados na classificação, calculados uma única vez: componente ótimo de cada vértice (na ordem da matriz
+        de vizinhos), valor de k e pureza de cada componente, classe codificada de cada vértice e as classes.
+        """
+        if self._arrays_predicao is None:
+            indices = self.y.index
+            y, classes = pd.factorize(self.y)
+            componentes = self.componentes
+            rotulos = np.empty(len(indices), dtype=self._dist.dtype_indices)
+            k_componentes = np.empty(len(componentes), dtype=np.int64)
+            purezas = np.empty(len(componentes))
+            for i, componente in enumerate(componentes):
+                rotulos[indices.get_indexer(list(componente))] = i
+                k_componentes[i] = self.grafo_otimo.obter_k_de_componente(componente)
+                purezas[i] = self.grafo_otimo.pureza(componente)
+            self._arrays_predicao = rotulos, k_componentes, purezas, y, classes
+        return self._arrays_predicao
+
+    def _pureza_e_k_componentes(self, componentes: List[FrozenSet[int]]) -> (np.ndarray, np.ndarray):
+        """Pureza e valor de k de cada componente ótimo, usados no desenho agregado."""
+        purezas = np.array([self.grafo_otimo.pureza(c) for c in componentes])
+        ks = np.array([self.grafo_otimo.obter_k_de_componente(c) for c in componentes])
+        return purezas, ks
 
     def _criar_kaog(self):
         """Algoritmo central para criar o KAOG.
@@ -96,21 +501,125 @@ class KAOG(DrawableGraph):
         """
         k = 1
         self._iniciar_grafo_otimo()
+        componentes_1 = self.grafos_associados[k].componentes
+        self.historico = HistoricoComponentes(self._rotulos_de_componentes(componentes_1),
+                                              self.grafos_associados[k].pureza_e_k_componentes(componentes_1)[0],
+                                              self._calcular_ultima_taxa())
         while 1:
             ultima_taxa = self._calcular_ultima_taxa()
+            if self._vizinhos_esgotados(k):
+                break
             k += 1
             grafo_k = self._criar_grafo_associado(k)
+            componentes_k = grafo_k.componentes
+            purezas_k = np.empty(len(componentes_k))
+            aceitos = np.zeros(len(componentes_k), dtype=bool)
 
             # Iterar por todos os novos componentes do grafo k-associado
-            for componente_k in grafo_k.componentes:
+            for i, componente_k in enumerate(componentes_k):
                 pureza_k = grafo_k.pureza(componente_k)
                 componentes_otimo = self._obter_componentes_otimos(componente_k)
                 purezas_componentes_otimos = self._calcular_pureza_componentes_otimos(componentes_otimo)
+                purezas_k[i] = pureza_k
                 if (pureza_k >= purezas_componentes_otimos).all():
+                    aceitos[i] = True
                     self._inserir_novo_componente_otimo(k, grafo_k.grafo.subgraph(componente_k))
 
-            if self._calcular_ultima_taxa() < ultima_taxa:
+            taxa = self._calcular_ultima_taxa()
+            self.historico.adicionar(k, self._rotulos_de_componentes(componentes_k), purezas_k, aceitos, taxa)
+            if taxa < ultima_taxa:
                 break
+        self.historico.concluir()
+
+    @property
+    def _pesos(self) -> Union[np.ndarray, None]:
+        """Multiplicidade de cada vértice, na ordem da matriz de vizinhos, ou `None` sem pesos."""
+        return None if self.multiplicidades is None else self.multiplicidades.to_numpy()
+
+    def _multiplicidades_das_linhas(self, pesos: Union[np.ndarray, pd.Series], data: Matriz) -> pd.Series:
+        """Valida os pesos passados ao construtor e os alinha às linhas de `data`."""
+        if not isinstance(pesos, pd.Series):
+            if len(pesos) != data.shape[0]:
+                raise ValueError(f'São esperados {data.shape[0]} pesos, mas foram passados {len(pesos)}.')
+            indice = data.index if isinstance(data, pd.DataFrame) else self._data.index
+            pesos = pd.Series(np.asarray(pesos), index=indice)
+        pesos = pesos.reindex(self._data.index)
+        valores = pesos.to_numpy(dtype=np.float64)
+        if not (np.isfinite(valores).all() and (valores >= 1).all() and (valores == np.rint(valores)).all()):
+            raise ValueError('Cada linha de `data` deve ter um peso inteiro e positivo.')
+        return pd.Series(valores.astype(np.int64), index=self._data.index, name='multiplicidade')
+
+    def _comprimir_duplicados(self):
+        """Mantém em `data` apenas a primeira linha de cada grupo de duplicados, registrando os pesos."""
+        indices_originais = self._data.index
+        representantes, grupos, multiplicidades = agrupar_duplicados(self.x, self.y)
+        if self.multiplicidades is not None:
+            multiplicidades = np.bincount(grupos, weights=self.multiplicidades.to_numpy()).astype(np.int64)
+        logging.debug(f'{len(indices_originais)} linhas comprimidas em {len(representantes)} vértices.')
+        if self._x_matriz is not None:
+            self._x_matriz = self._x_matriz[representantes]
+            self._data = self._data.iloc[representantes].reset_index(drop=True)
+        else:
+            self._data = self._data.iloc[representantes]
+        self.multiplicidades = pd.Series(multiplicidades, index=self._data.index, name='multiplicidade')
+        self.representantes = pd.Series(self._data.index[grupos], index=indices_originais, name='vertice')
+
+    def _vizinhos_esgotados(self, k: int) -> bool:
+        """
+        Se `k` atingiu a quantidade de vizinhos disponíveis, menor que n - 1 quando os vizinhos são pré-calculados
+        (:meth:`kaog.distancias.Distancias.pre_calculadas`). Nesse caso, o algoritmo é interrompido em `k`.
+        """
+        disponiveis = self._dist.vizinhos.shape[1]
+        if k < disponiveis or disponiveis >= len(self.y) - 1:
+            return False
+        logging.warning(f'O algoritmo foi interrompido ao atingir k_max={k}, a quantidade de vizinhos disponíveis.')
+        return True
+
+    def _rotulos_de_componentes(self, componentes: List[FrozenSet[int]]) -> np.ndarray:
+        """Posição, na lista `componentes`, do componente de cada vértice."""
+        rotulos = np.empty(len(self.y), dtype=np.int64)
+        for i, componente in enumerate(componentes):
+            rotulos[self.y.index.get_indexer(list(componente))] = i
+        return rotulos
+
+    def _criar_kaog_vetorizado(self):
+        """
+        Executa o algoritmo sobre a matriz de vizinhos, sem criar os grafos k-associados, e cria o grafo ótimo a partir
+        dos componentes resultantes.
+        """
+        y = pd.factorize(self.y)[0].astype(self._dist.dtype_indices)
+        if self.motor == 'particionado':
+            self.componentes_vetorizados = componentes_otimos_por_classe(self._dist.vizinhos, y, self.parada,
+                                                                         _quantidade_threads(self.n_jobs), self._pesos)
+        else:
+            self.componentes_vetorizados = ComponentesOtimos(self._dist.vizinhos, y, pesos=self._pesos)
+        self.historico = self.componentes_vetorizados.historico
+        self.grafo_otimo = self._grafo_otimo_de_componentes(self.componentes_vetorizados, y)
+
+        ultimo_k = self.componentes_vetorizados.ultimo_k
+        if not self.componentes_vetorizados.convergiu:
+            self._vizinhos_esgotados(ultimo_k)
+        if self.modo_enxuto:
+            self._dist = self._dist.truncado(ultimo_k)
+        self.grafos_associados = GrafosAssociadosSobDemanda(range(1, ultimo_k + 1), self._instanciar_grafo_associado)
+
+    def _grafo_otimo_de_componentes(self, componentes: ComponentesOtimos, y: np.ndarray) -> GrafoOtimo:
+        """
+        Cria o grafo ótimo a partir do resultado vetorizado, convertendo as posições da matriz para os índices de `data`.
+
+        :param componentes: Componentes ótimos calculados sobre `self.distancias_e_vizinhos.vizinhos`.
+        :type componentes: ComponentesOtimos
+        :param y: Classes codificadas usadas no cálculo.
+        :type y: numpy.ndarray
+        :return: Grafo ótimo.
+        :rtype: GrafoOtimo
+        """
+        indices = self.y.index
+        origem, destino = componentes.arestas(self._dist.vizinhos, y)
+        grupos = pd.Series(indices).groupby(componentes.rotulos)
+        componente_e_k = {frozenset(vertices.tolist()): int(componentes.k[rotulo]) for rotulo, vertices in grupos}
+        pesos = None if self.multiplicidades is None else self.multiplicidades.to_dict()
+        return GrafoOtimo(indices, zip(indices[origem].tolist(), indices[destino].tolist()), componente_e_k, pesos)
 
     def _calcular_pureza_componentes_otimos(self, componentes_otimo: List[FrozenSet[int]]) -> np.ndarray:
         """
@@ -159,10 +668,23 @@ class KAOG(DrawableGraph):
         :return: Novo grafo k-associado.
         """
         logging.debug('Criando grafo k-associado com k={}'.format(k))
-        k_associado = KAssociado(k, self.data, self.cat_cols)
+        k_associado = self._instanciar_grafo_associado(k)
+        if self.modo_enxuto:
+            # Apenas o último grafo é necessário para o cálculo da taxa
+            self.grafos_associados.clear()
         self.grafos_associados[k] = k_associado
         return k_associado
 
+    def _liberar_grafos_associados(self):
+        """Descarta os grafos k-associados, que passam a ser criados sob demanda a partir dos vizinhos truncados."""
+        ultimo_k = max(self.grafos_associados)
+        self._dist = self._dist.truncado(ultimo_k)
+        self.grafos_associados = GrafosAssociadosSobDemanda(range(1, ultimo_k + 1), self._instanciar_grafo_associado)
+
+    def _instanciar_grafo_associado(self, k: int) -> KAssociado:
+        """Cria o grafo k-associado com a configuração desta instância e os vizinhos compartilhados."""
+        return KAssociado(k, self.data, self.cat_cols, self._dist, self.coluna_y)
+
     def _calcular_ultima_taxa(self) -> float:
         """
         Calcula a última taxa do último grafo k-associado.
@@ -186,5 +708,27 @@ class KAOG(DrawableGraph):
         self.grafo_otimo.adicionar_componente_otimo(novo_componente=componente_k, k=k)
 
     def _calcular_distancias_e_vizinhos(self):
-        """Calcula as distâncias e vizinhos entre os vértices do grafo ótimo."""
-        self._dist = Distancias(self.x, self.cat_cols)
+        """Calcula as distâncias e vizinhos entre os vértices do grafo ótimo, caso não tenham sido passados."""
+        if self.reducao is not None and len(self.cat_cols) > 0:
+            raise ValueError('A redução de dimensionalidade não pode ser usada com colunas categóricas.')
+        if self._dist is None:
+            x = self.x
+            if self.reducao is not None:
+                x = pd.DataFrame(self.reducao.ajustar_transformar(self._matriz_atributos(x)), index=self.y.index)
+                logging.debug(f'Atributos reduzidos para {x.shape[1]} dimensões.')
+            self._dist = Distancias(x, self.cat_cols, self.metrica, self.algoritmo, self.n_jobs, self.dtype)
+        elif not self._dist.indices.equals(self.y.index):
+            raise ValueError('As distâncias passadas não correspondem aos pontos do conjunto de dados.')
+
+    def _reduzir(self, x: Matriz) -> Matriz:
+        """Aplica às consultas a mesma redução de dimensionalidade usada nos pontos de treino."""
+        if self.reducao is None:
+            return x
+        indice = x.index if isinstance(x, pd.DataFrame) else pd.RangeIndex(x.shape[0])
+        return pd.DataFrame(self.reducao.transformar(self._matriz_atributos(x)), index=indice)
+
+    def _matriz_atributos(self, x: Matriz) -> Union[np.ndarray, sparse.spmatrix]:
+        """Atributos em uma matriz, mantendo apenas as colunas usadas no treino quando `x` é um DataFrame."""
+        if isinstance(x, pd.DataFrame):
+            return x[self.x.columns].to_numpy()
+        return x
@@ -0,0 +1,330 @@
+"""
+Classificação em vários processos a partir de um KAOG gravado em arquivos mapeados em memória.
+
+Carregar o pickle de um :class:`kaog.KAOG` em cada processo de um servidor multiplica a memória pela quantidade de
+processos. :meth:`ModeloMapeado.salvar` grava uma única vez, em arquivos `.npy`, os arrays usados na classificação:
+atributos codificados, classe de cada vértice, componente ótimo de cada vértice e valor de k e pureza de cada
+componente. Cada processo abre os arquivos com `numpy.load(mmap_mode='r')`, somente leitura, e todos compartilham as
+mesmas páginas do cache do sistema operacional.
+
+O índice de busca é a própria matriz de atributos mapeada: a busca de vizinhos é feita por força bruta sobre ela, em
+blocos e sem cópia, como em :class:`kaog.KAOGForaDeMemoria`. As árvores do NearestNeighbors seriam reconstruídas na
+memória privada de cada processo e não podem ser mapeadas.
+
+Exemplo de uso::
+
+    ModeloMapeado.salvar(modelo, 'modelo_mapeado')
+    with PoolInferencia('modelo_mapeado', processos=4) as pool:
+        classes = pool.predict(consultas)
+    print(medir_escalabilidade('modelo_mapeado', consultas, processos=(1, 2, 4)))
+"""
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from kaog.distancias import Matriz
+from kaog.fora_de_memoria import _distancias_entre_blocos
+from kaog.kaog import KAOG, probabilidades_bertini
+
+METADADOS = 'metadados.pkl'
+
+
+class ModeloMapeado:
+    """KAOG somente para classificação, com os arrays mapeados em memória.
+
+    **ModeloMapeado**
+
+    **Arquivos**
+    x.npy
+        Atributos codificados (e reduzidos, se o KAOG usar redução de dimensionalidade) dos vértices, na ordem da
+        matriz de vizinhos.
+    y.npy
+        Classe codificada de cada vértice.
+    rotulos.npy
+        Componente ótimo de cada vértice.
+    k_componentes.npy, purezas.npy
+        Valor de k e pureza de cada componente ótimo.
+    pesos.npy
+        Multiplicidade de cada vértice, apenas se o KAOG tiver sido criado com `comprimir_duplicados`.
+    metadados.pkl
+        Classes, colunas, codificador das colunas categóricas, redução de dimensionalidade, métrica e nome da coluna de
+        classe.
+    """
+    ARRAYS = ('x', 'y', 'rotulos', 'k_componentes', 'purezas')
+    TAMANHO_BLOCO = 4096
+
+    def __init__(self, diretorio: str):
+        """
+        Abre, somente para leitura, um modelo gravado por :meth:`salvar`.
+
+        :param diretorio: Diretório com os arquivos do modelo.
+        :type diretorio: str
+        """
+        self.diretorio = diretorio
+        for nome in self.ARRAYS:
+            setattr(self, nome, np.load(os.path.join(diretorio, f'{nome}.npy'), mmap_mode='r'))
+        caminho_pesos = os.path.join(diretorio, 'pesos.npy')
+        self.pesos = np.load(caminho_pesos, mmap_mode='r') if os.path.exists(caminho_pesos) else None
+        with open(os.path.join(diretorio, METADADOS), 'rb') as arquivo:
+            metadados = pickle.load(arquivo)
+        self.classes = metadados['classes']
+        self.colunas = metadados['colunas']
+        self.codificador = metadados['codificador']
+        self.reducao = metadados['reducao']
+        self.metrica = metadados['metrica']
+        self.coluna_y = metadados['coluna_y']
+        self.k_max = int(self.k_componentes.max())
+
+    @classmethod
+    def salvar(cls, modelo: KAOG, diretorio: str) -> 'ModeloMapeado':
+        """
+        Grava os arrays de classificação de um KAOG em `diretorio`.
+
+        :param modelo: KAOG ajustado.
+        :type modelo: KAOG
+        :param diretorio: Diretório de destino, criado se não existir.
+        :type diretorio: str
+        :return: Modelo gravado, aberto para leitura.
+        :rtype: ModeloMapeado
+        :raises ValueError: Se os atributos do KAOG forem uma matriz esparsa.
+        """
+        dist = modelo._dist
+        x = dist._matriz(dist.x)
+        if sparse.issparse(x):
+            raise ValueError('Matrizes esparsas não podem ser mapeadas em memória.')
+        rotulos, k_componentes, purezas, y, classes = modelo._componentes_por_vertice()
+
+        os.makedirs(diretorio, exist_ok=True)
+        arrays = {'x': np.ascontiguousarray(x), 'y': y, 'rotulos': rotulos, 'k_componentes': k_componentes,
+                  'purezas': purezas}
+        if modelo.multiplicidades is not None:
+            arrays['pesos'] = modelo.multiplicidades.to_numpy()
+        elif os.path.exists(os.path.join(diretorio, 'pesos.npy')):
+            os.remove(os.path.join(diretorio, 'pesos.npy'))
+        for nome, array in arrays.items():
+            np.save(os.path.join(diretorio, f'{nome}.npy'), array)
+        metadados = {
+            'classes': classes,
+            'colunas': modelo.x.columns if isinstance(modelo.x, pd.DataFrame) else None,
+            'codificador': dist.codificador if modelo.reducao is None else None,
+            'reducao': modelo.reducao,
+            'metrica': dist.metrica,
+            'coluna_y': modelo.coluna_y,
+        }
+        with open(os.path.join(diretorio, METADADOS), 'wb') as arquivo:
+            pickle.dump(metadados, arquivo)
+        return cls(diretorio)
+
+    def predict_proba(self, x: Matriz) -> pd.DataFrame:
+        """
+        Probabilidade de cada classe para novos pontos, como em :meth:`kaog.KAOG.predict_proba`.
+
+        :param x: Pontos a serem classificados, com as mesmas colunas usadas no treino, ou uma matriz.
+        :type x: Union[pandas.DataFrame, numpy.ndarray]
+        :return: Probabilidade de cada classe (colunas) para cada ponto (linhas).
+        :rtype: pandas.DataFrame
+        """
+        indice = x.index if isinstance(x, pd.DataFrame) else pd.RangeIndex(x.shape[0])
+        return pd.DataFrame(self._probabilidades(x), index=indice, columns=self.classes)
+
+    def predict(self, x: Matriz) -> pd.Series:
+        """
+        Classe mais provável de cada ponto, conforme :meth:`predict_proba`.
+
+        :param x: Pontos a serem classificados, como em :meth:`predict_proba`.
+        :type x: Union[pandas.DataFrame, numpy.ndarray]
+        :return: Classe de cada ponto.
+        :rtype: pandas.Series
+        """
+        probabilidades = self.predict_proba(x)
+        return pd.Series(self.classes[probabilidades.to_numpy().argmax(axis=1)], index=probabilidades.index,
+                         name=self.coluna_y)
+
+    def _probabilidades(self, x: Matriz) -> np.ndarray:
+        """Matriz de probabilidades, sem índice nem nomes de classes."""
+        return probabilidades_bertini(self._vizinhos(self._preparar(x)), self.rotulos, self.k_componentes, self.purezas,
+                                      self.y, len(self.classes), self.pesos)
+
+    def _vizinhos(self, consultas: np.ndarray) -> np.ndarray:
+        """
+        `k_max` vizinhos mais próximos de cada consulta, ordenados pela distância e pelo índice. A matriz mapeada é
+        percorrida em blocos de `TAMANHO_BLOCO` pontos, mantendo apenas os `k_max` melhores candidatos, como em
+        :class:`kaog.KAOGForaDeMemoria`.
+        """
+        consultas = np.asarray(consultas, dtype=np.float64)
+        melhores_d = np.empty((len(consultas), 0))
+        melhores_i = np.empty((len(consultas), 0), dtype=np.int64)
+        for inicio in range(0, len(self.x), self.TAMANHO_BLOCO):
+            fim = min(inicio + self.TAMANHO_BLOCO, len(self.x))
+            distancias = _distancias_entre_blocos(consultas, np.asarray(self.x[inicio:fim]), self.metrica)
+            melhores_d = np.hstack([melhores_d, distancias])
+            melhores_i = np.hstack([melhores_i, np.broadcast_to(np.arange(inicio, fim), distancias.shape)])
+            if melhores_d.shape[1] > self.k_max:
+                ordem = np.lexsort((melhores_i, melhores_d))[:, :self.k_max]
+                melhores_d = np.take_along_axis(melhores_d, ordem, axis=1)
+                melhores_i = np.take_along_axis(melhores_i, ordem, axis=1)
+        return melhores_i
+
+    def _preparar(self, x: Matriz) -> np.ndarray:
+        """Aplica às consultas a mesma codificação e redução usadas nos pontos de treino."""
+        if isinstance(x, pd.DataFrame) and self.colunas is not None:
+            x = x[self.colunas]
+            x = x.to_numpy() if self.reducao is not None else self.codificador.transformar(x).to_numpy()
+        if self.reducao is not None:
+            x = self.reducao.transformar(x)
+        return x
+
+
+class PoolInferencia:
+    """Processos de classificação que compartilham um mesmo :class:`ModeloMapeado`.
+
+    **PoolInferencia**
+
+    Cada processo abre o modelo uma única vez, ao iniciar. As consultas são divididas em blocos de `tamanho_bloco`
+    pontos, distribuídos entre os processos.
+    """
+
+    def __init__(self, diretorio: str, processos: Optional[int] = None, tamanho_bloco: int = 256):
+        """
+        :param diretorio: Diretório de um modelo gravado por :meth:`ModeloMapeado.salvar`.
+        :type diretorio: str
+        :param processos: Quantidade de processos. Por padrão, definida pelo `ProcessPoolExecutor`.
+        :type processos: int
+        :param tamanho_bloco: Quantidade de pontos enviados a um processo por vez.
+        :type tamanho_bloco: int
+        """
+        self.diretorio = diretorio
+        self.tamanho_bloco = tamanho_bloco
+        self.modelo = ModeloMapeado(diretorio)
+        self._executor = ProcessPoolExecutor(max_workers=processos, initializer=_abrir_modelo, initargs=(diretorio,))
+
+    def __enter__(self) -> 'PoolInferencia':
+        return self
+
+    def __exit__(self, *args):
+        self.fechar()
+
+    def fechar(self):
+        """Encerra os processos."""
+        self._executor.shutdown()
+
+    def predict_proba(self, x: Matriz) -> pd.DataFrame:
+        """
+        Probabilidade de cada classe para novos pontos, calculada nos processos.
+
+        :param x: Pontos a serem classificados, como em :meth:`ModeloMapeado.predict_proba`.
+        :type x: Union[pandas.DataFrame, numpy.ndarray]
+        :return: Probabilidade de cada classe (colunas) para cada ponto (linhas).
+        :rtype: pandas.DataFrame
+        """
+        probabilidades = np.concatenate(list(self._executor.map(_probabilidades_no_processo, self._blocos(x))))
+        indice = x.index if isinstance(x, pd.DataFrame) else pd.RangeIndex(x.shape[0])
+        return pd.DataFrame(probabilidades, index=indice, columns=self.modelo.classes)
+
+    def predict(self, x: Matriz) -> pd.Series:
+        """
+        Classe mais provável de cada ponto, conforme :meth:`predict_proba`.
+
+        :param x: Pontos a serem classificados, como em :meth:`ModeloMapeado.predict_proba`.
+        :type x: Union[pandas.DataFrame, numpy.ndarray]
+        :return: Classe de cada ponto.
+        :rtype: pandas.Series
+        """
+        probabilidades = self.predict_proba(x)
+        return pd.Series(self.modelo.classes[probabilidades.to_numpy().argmax(axis=1)], index=probabilidades.index,
+                         name=self.modelo.coluna_y)
+
+    def _blocos(self, x: Matriz) -> Iterable[Matriz]:
+        """Divide as consultas em blocos de `tamanho_bloco` pontos."""
+        for inicio in range(0, x.shape[0], self.tamanho_bloco):
+            yield x.iloc[inicio:inicio + self.tamanho_bloco] if isinstance(x, pd.DataFrame) else \
+                x[inicio:inicio + self.tamanho_bloco]
+
+
+def medir_escalabilidade(diretorio: str, consultas: Matriz, processos: Iterable[int] = (1, 2, 4),
+                         tamanho_bloco: int = 256, repeticoes: int = 1) -> pd.DataFrame:
+    """
+    Mede a vazão e a memória de cada processo à medida que processos são adicionados ao :class:`PoolInferencia`.
+
+    A memória é lida de `/proc/self/status` e `/proc/self/smaps_rollup` de cada processo depois de classificar ao menos
+    um bloco. `rss_arquivo_mib` inclui as páginas mapeadas do modelo, compartilhadas entre os processos, e
+    `rss_anonimo_mib` é a memória privada. `pss_mib` divide as páginas compartilhadas entre os processos que as usam.
+    Em sistemas sem `/proc`, as colunas de memória são `NaN`.
+
+    :param diretorio: Diretório de um modelo gravado por :meth:`ModeloMapeado.salvar`.
+    :type diretorio: str
+    :param consultas: Pontos classificados em cada medição.
+    :type consultas: Union[pandas.DataFrame, numpy.ndarray]
+    :param processos: Quantidades de processos avaliadas.
+    :type processos: Iterable[int]
+    :param tamanho_bloco: Quantidade de pontos enviados a um processo por vez.
+    :type tamanho_bloco: int
+    :param repeticoes: Quantidade de vezes que as consultas são classificadas em cada medição.
+    :type repeticoes: int
+    :return: Uma linha por quantidade de processos, com a quantidade de processos que classificaram algum bloco, a
+        vazão (pontos por segundo) e a média, por processo, de `rss_mib`, `rss_anonimo_mib`, `rss_arquivo_mib` e
+        `pss_mib`.
+    :rtype: pandas.DataFrame
+    """
+    linhas = []
+    for quantidade in processos:
+        with PoolInferencia(diretorio, quantidade, tamanho_bloco) as pool:
+            # Abre o modelo em todos os processos antes da medição
+            list(pool._executor.map(_medir_no_processo, [consultas[:1]] * quantidade))
+            memoria = {}
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                for pid, medida in pool._executor.map(_medir_no_processo, pool._blocos(consultas)):
+                    memoria[pid] = medida
+            duracao = time.perf_counter() - inicio
+        medidas = pd.DataFrame(list(memoria.values()))
+        linhas.append({'processos': quantidade, 'processos_ativos': len(memoria),
+                       'pontos_por_segundo': repeticoes * consultas.shape[0] / duracao, **medidas.mean().to_dict()})
+    return pd.DataFrame(linhas)
+
+
+def memoria_do_processo() -> Dict[str, float]:
+    """
+    Memória residente do processo atual, em MiB.
+
+    :return: `rss_mib`, `rss_anonimo_mib`, `rss_arquivo_mib` e `pss_mib`, ou `NaN` para os valores indisponíveis.
+    :rtype: Dict[str, float]
+    """
+    campos = {'VmRSS': 'rss_mib', 'RssAnon': 'rss_anonimo_mib', 'RssFile': 'rss_arquivo_mib', 'Pss': 'pss_mib'}
+    memoria = dict.fromkeys(campos.values(), float('nan'))
+    for caminho in ('/proc/self/status', '/proc/self/smaps_rollup'):
+        try:
+            with open(caminho) as arquivo:
+                for linha in arquivo:
+                    nome, _, valor = linha.partition(':')
+                    if nome in campos:
+                        memoria[campos[nome]] = int(valor.split()[0]) / 1024
+        except OSError:
+            pass
+    return memoria
+
+
+_MODELO_PROCESSO: Optional[ModeloMapeado] = None
+
+
+def _abrir_modelo(diretorio: str):
+    """Inicialização de cada processo do pool: abre o modelo mapeado."""
+    global _MODELO_PROCESSO
+    _MODELO_PROCESSO = ModeloMapeado(diretorio)
+
+
+def _probabilidades_no_processo(x: Matriz) -> np.ndarray:
+    """Probabilidades de um bloco de consultas, calculadas com o modelo do processo."""
+    return _MODELO_PROCESSO._probabilidades(x)
+
+
+def _medir_no_processo(x: Matriz) -> Tuple[int, Dict[str, float]]:
+    """Classifica um bloco de consultas e retorna o identificador e a memória do processo."""
+    _MODELO_PROCESSO._probabilidades(x)
+    return os.getpid(), memoria_do_processo()
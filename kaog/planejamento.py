@@ -0,0 +1,338 @@
+"""
+Planejamento da execução do KAOG a partir do tamanho dos dados e do orçamento de memória.
+
+O :class:`kaog.KAOG` mantém as distâncias e os vizinhos de todos os pares de pontos, com memória O(n²). Antes de criar o
+modelo, :func:`planejar` estima a memória e o tempo de cada estratégia e escolhe a primeira que respeita o orçamento,
+nesta ordem:
+
+denso
+    :class:`kaog.KAOG` com o motor vetorizado e a precisão pedida.
+denso_float32
+    O mesmo, com distâncias em `numpy.float32` e índices em `numpy.int32`, usando metade da memória.
+fora_de_memoria
+    :class:`kaog.KAOGForaDeMemoria`, com apenas os `k_max` vizinhos de cada ponto, em arquivos mapeados em memória.
+prototipos
+    :class:`kaog.KAOG` sobre uma amostra estratificada dos pontos (:class:`kaog.prototipos.SelecaoPrototipos`), com o
+    maior tamanho que respeita o orçamento. O resultado é uma aproximação.
+
+As estimativas de tempo são apenas a ordem de grandeza esperada, supondo `OPERACOES_POR_SEGUNDO` por thread.
+"""
+import logging
+import math
+import os
+import tempfile
+from typing import Callable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from kaog.distancias import Distancias, tipos_precisao, _quantidade_threads
+from kaog.fora_de_memoria import KAOGForaDeMemoria
+from kaog.kaog import KAOG
+from kaog.prototipos import SelecaoPrototipos
+from kaog.util import ColunaYSingleton
+from kaog.util.leitura import ler_em_blocos
+
+ESTRATEGIAS = ('denso', 'denso_float32', 'fora_de_memoria', 'prototipos')
+OPERACOES_POR_SEGUNDO = 1e8
+# Métricas calculadas em código compilado pelo scikit-learn; as demais são consideradas 10 vezes mais lentas
+_METRICAS_RAPIDAS = ('euclidean', 'l2', 'minkowski', 'manhattan', 'cityblock', 'l1', 'chebyshev', 'cosine')
+# Memória auxiliar por par (consulta, ponto) em cada bloco de consultas: distâncias e índices em precisão dupla,
+# máscara do próprio ponto, cópias sem o próprio ponto e a ordenação
+_BYTES_AUXILIARES_POR_PAR = 40
+_ORCAMENTO_BLOCO_FORA_DE_MEMORIA = 256 * 2 ** 20
+
+
+class Plano:
+    """Estratégia escolhida por :func:`planejar`, com as estimativas de recursos.
+
+    **Plano**
+
+    **Atributos**
+    estrategia
+        Uma dentre `ESTRATEGIAS`.
+    n, d
+        Quantidade de pontos e de atributos.
+    n_jobs
+        Quantidade de threads da busca de vizinhos.
+    dtype
+        Precisão das distâncias.
+    k_max
+        Quantidade de vizinhos mantidos por ponto. Nas estratégias densas, n - 1.
+    fracao_prototipos
+        Fração dos pontos usada, menor que 1 apenas na estratégia `prototipos`.
+    memoria_estimada, disco_estimado
+        Pico estimado de memória e espaço em disco, em bytes.
+    tempo_estimado
+        Ordem de grandeza do tempo de criação, em segundos.
+    orcamento_memoria
+        Orçamento considerado, em bytes.
+    rebaixado
+        Se a estratégia densa com a precisão pedida não coube no orçamento.
+    metrica
+        Métrica de distância usada na criação.
+    """
+
+    def __init__(self, estrategia: str, n: int, d: int, n_jobs: int, dtype: np.dtype, k_max: int,
+                 fracao_prototipos: float, memoria_estimada: int, disco_estimado: int, tempo_estimado: float,
+                 orcamento_memoria: int, rebaixado: bool, metrica: Union[str, Callable, None] = None):
+        self.estrategia = estrategia
+        self.n = n
+        self.d = d
+        self.n_jobs = n_jobs
+        self.dtype = np.dtype(dtype)
+        self.k_max = k_max
+        self.fracao_prototipos = fracao_prototipos
+        self.memoria_estimada = memoria_estimada
+        self.disco_estimado = disco_estimado
+        self.tempo_estimado = tempo_estimado
+        self.orcamento_memoria = orcamento_memoria
+        self.rebaixado = rebaixado
+        self.metrica = metrica
+
+    def __str__(self) -> str:
+        linhas = [
+            f'Estratégia: {self.estrategia}{" (rebaixada)" if self.rebaixado else ""}',
+            f'Pontos: {self.n}, atributos: {self.d}',
+            f'Precisão: {self.dtype.name}, threads: {self.n_jobs}, vizinhos por ponto: {self.k_max}',
+            f'Memória estimada: {_formatar_bytes(self.memoria_estimada)} de '
+            f'{_formatar_bytes(self.orcamento_memoria)}',
+            f'Disco estimado: {_formatar_bytes(self.disco_estimado)}',
+            f'Tempo estimado: ~{self.tempo_estimado:.3g} s',
+        ]
+        if self.estrategia == 'prototipos':
+            linhas.append(f'Fração dos pontos usada: {self.fracao_prototipos:.3g} (resultado aproximado)')
+        return '\n'.join(linhas)
+
+
+def memoria_disponivel() -> int:
+    """
+    Memória física disponível no momento, em bytes.
+
+    :return: Memória disponível.
+    :rtype: int
+    :raises OSError: Se o sistema não informar a memória disponível.
+    """
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError) as e:
+        raise OSError('Não foi possível obter a memória disponível, informe `orcamento_memoria`.') from e
+
+
+def estimar_memoria_denso(n: int, d: int, dtype: Union[type, np.dtype] = np.float64, n_jobs: int = 1,
+                          k_esperado: int = 32) -> int:
+    """
+    Pico estimado de memória de :class:`kaog.KAOG` com o motor vetorizado.
+
+    :param n: Quantidade de pontos.
+    :type n: int
+    :param d: Quantidade de atributos.
+    :type d: int
+    :param dtype: Precisão das distâncias.
+    :type dtype: Union[type, numpy.dtype]
+    :param n_jobs: Quantidade de threads da busca de vizinhos, cada uma com os seus blocos auxiliares.
+    :type n_jobs: int
+    :param k_esperado: Valor de k esperado ao fim do algoritmo.
+    :type k_esperado: int
+    :return: Memória, em bytes.
+    :rtype: int
+    """
+    dtype, dtype_indices = tipos_precisao(dtype)
+    vizinhos = n * (n - 1) * (dtype.itemsize + dtype_indices.itemsize)
+    atributos = 2 * n * d * 8
+    auxiliar = min(n, Distancias.TAMANHO_BLOCO_CONSULTAS) * n * _BYTES_AUXILIARES_POR_PAR * n_jobs
+    grafo = 4 * n * min(k_esperado, n - 1) * dtype_indices.itemsize
+    return int(vizinhos + atributos + auxiliar + grafo)
+
+
+def estimar_memoria_fora_de_memoria(n: int, d: int, k_max: int = 32, dtype: Union[type, np.dtype] = np.float64,
+                                    orcamento_bloco: int = _ORCAMENTO_BLOCO_FORA_DE_MEMORIA) -> (int, int):
+    """
+    Pico estimado de memória e espaço em disco de :class:`kaog.KAOGForaDeMemoria`.
+
+    :param n: Quantidade de pontos.
+    :type n: int
+    :param d: Quantidade de atributos.
+    :type d: int
+    :param k_max: Quantidade de vizinhos mantidos por ponto.
+    :type k_max: int
+    :param dtype: Precisão das distâncias.
+    :type dtype: Union[type, numpy.dtype]
+    :param orcamento_bloco: Memória de cada bloco de distâncias (`orcamento_memoria` do KAOGForaDeMemoria).
+    :type orcamento_bloco: int
+    :return: Memória e disco, em bytes.
+    :rtype: Tuple[int, int]
+    """
+    dtype, dtype_indices = tipos_precisao(dtype)
+    k_max = min(k_max, n - 1)
+    # A análise dos componentes cria a matriz de adjacência de cada k em memória
+    componentes = n * k_max * (2 * dtype_indices.itemsize + 8) + 4 * n * 8
+    disco = n * d * 8 + n * dtype_indices.itemsize + n * k_max * (dtype.itemsize + 3 * dtype_indices.itemsize)
+    return int(orcamento_bloco + componentes), int(disco)
+
+
+def planejar(n: int, d: int, orcamento_memoria: Optional[int] = None, k_esperado: int = 32,
+             metrica: Union[str, Callable, None] = None, dtype: Union[type, np.dtype] = np.float64,
+             n_jobs: int = -1, rebaixar: bool = True, permitir_aproximacao: bool = True) -> Plano:
+    """
+    Escolhe a estratégia de criação do KAOG que respeita o orçamento de memória.
+
+    :param n: Quantidade de pontos.
+    :type n: int
+    :param d: Quantidade de atributos.
+    :type d: int
+    :param orcamento_memoria: Memória disponível, em bytes. Por padrão, :func:`memoria_disponivel`.
+    :type orcamento_memoria: int
+    :param k_esperado: Valor de k esperado ao fim do algoritmo, usado como `k_max` fora de memória.
+    :type k_esperado: int
+    :param metrica: Métrica de distância. Por padrão, `Distancias.METRIC`.
+    :type metrica: Union[str, Callable]
+    :param dtype: Precisão pedida para as distâncias.
+    :type dtype: Union[type, numpy.dtype]
+    :param n_jobs: Quantidade máxima de threads, reduzida se os blocos auxiliares não couberem no orçamento.
+    :type n_jobs: int
+    :param rebaixar: Se `False`, apenas a estratégia densa com a precisão pedida é considerada.
+    :type rebaixar: bool
+    :param permitir_aproximacao: Se a estratégia `prototipos`, que não cria o grafo sobre todos os pontos, pode ser
+        escolhida.
+    :type permitir_aproximacao: bool
+    :return: Plano escolhido.
+    :rtype: Plano
+    :raises MemoryError: Se nenhuma estratégia permitida couber no orçamento.
+    """
+    orcamento_memoria = memoria_disponivel() if orcamento_memoria is None else int(orcamento_memoria)
+    metrica = Distancias.METRIC if metrica is None else metrica
+    fator_metrica = 1 if isinstance(metrica, str) and metrica in _METRICAS_RAPIDAS else 10
+    dtype = np.dtype(dtype)
+    threads = _quantidade_threads(n_jobs)
+
+    tipos = [dtype] if not rebaixar or dtype == np.float32 else [dtype, np.dtype(np.float32)]
+    for i, tipo in enumerate(tipos):
+        plano = _plano_denso(n, d, n, tipo, threads, k_esperado, fator_metrica, orcamento_memoria)
+        if plano is not None:
+            plano.estrategia = 'denso' if i == 0 else 'denso_float32'
+            plano.rebaixado = i > 0
+            plano.metrica = metrica
+            return plano
+    if not rebaixar:
+        raise MemoryError(f'O KAOG denso requer cerca de {_formatar_bytes(estimar_memoria_denso(n, d, dtype))}, '
+                          f'acima do orçamento de {_formatar_bytes(orcamento_memoria)}.')
+
+    orcamento_bloco = min(_ORCAMENTO_BLOCO_FORA_DE_MEMORIA, orcamento_memoria // 2)
+    memoria, disco = estimar_memoria_fora_de_memoria(n, d, k_esperado, dtype, orcamento_bloco)
+    if memoria <= orcamento_memoria:
+        k_max = min(k_esperado, n - 1)
+        tempo = (n * n * d * fator_metrica + n * n * math.log2(k_max + 1)) / OPERACOES_POR_SEGUNDO
+        return Plano('fora_de_memoria', n, d, 1, dtype, k_max, 1.0, memoria, disco, tempo, orcamento_memoria, True,
+                     metrica)
+
+    if permitir_aproximacao:
+        # Maior quantidade de pontos cujo KAOG denso, em precisão simples e com uma thread, cabe no orçamento
+        menor, maior = 1, n
+        while menor < maior:
+            meio = (menor + maior + 1) // 2
+            if estimar_memoria_denso(meio, d, np.float32, 1, k_esperado) <= orcamento_memoria:
+                menor = meio
+            else:
+                maior = meio - 1
+        if menor >= 2:
+            plano = _plano_denso(menor, d, n, np.dtype(np.float32), threads, k_esperado, fator_metrica,
+                                 orcamento_memoria)
+            plano.estrategia, plano.rebaixado, plano.metrica = 'prototipos', True, metrica
+            plano.fracao_prototipos = menor / n
+            return plano
+
+    raise MemoryError(f'Nenhuma estratégia permitida cabe no orçamento de {_formatar_bytes(orcamento_memoria)} para '
+                      f'{n} pontos com {d} atributos.')
+
+
+def ajustar(data: Union[str, pd.DataFrame], orcamento_memoria: Optional[int] = None, coluna_y: Optional[str] = None,
+            diretorio: Optional[str] = None, plano: Optional[Plano] = None, random_state: Optional[int] = None,
+            **kwargs) -> Union[KAOG, KAOGForaDeMemoria]:
+    """
+    Planeja e cria o KAOG conforme o plano, registrando o plano no log.
+
+    :param data: Conjunto de dados, contendo também a coluna de classe, ou caminho de um arquivo CSV ou Parquet.
+    :type data: Union[str, pandas.DataFrame]
+    :param orcamento_memoria: Ver :func:`planejar`.
+    :type orcamento_memoria: int
+    :param coluna_y: Nome da coluna de classe. Por padrão, `ColunaYSingleton().NOME_COLUNA_Y`.
+    :type coluna_y: str
+    :param diretorio: Diretório dos arquivos da estratégia `fora_de_memoria`. Por padrão, um diretório temporário.
+    :type diretorio: str
+    :param plano: Plano já calculado. Por padrão, calculado aqui.
+    :type plano: Plano
+    :param random_state: Semente da amostragem da estratégia `prototipos`.
+    :type random_state: int
+    :param kwargs: Demais parâmetros de :func:`planejar`.
+    :return: Modelo criado, :class:`kaog.KAOGForaDeMemoria` na estratégia `fora_de_memoria` e :class:`kaog.KAOG` nas
+        demais.
+    :rtype: Union[KAOG, KAOGForaDeMemoria]
+    :raises MemoryError: Se nenhuma estratégia permitida couber no orçamento.
+    """
+    coluna_y = ColunaYSingleton().NOME_COLUNA_Y if coluna_y is None else coluna_y
+    if plano is None:
+        n, d = dimensoes(data, coluna_y)
+        plano = planejar(n, d, orcamento_memoria, **kwargs)
+    logging.info(f'Plano de execução do KAOG:\n{plano}')
+
+    if plano.estrategia == 'fora_de_memoria':
+        diretorio = tempfile.mkdtemp(prefix='kaog_') if diretorio is None else diretorio
+        if isinstance(data, pd.DataFrame):
+            caminho = os.path.join(diretorio, 'entrada.csv')
+            data.to_csv(caminho, index=False)
+            data = caminho
+        return KAOGForaDeMemoria(data, plano.k_max, min(_ORCAMENTO_BLOCO_FORA_DE_MEMORIA, plano.orcamento_memoria // 2),
+                                 diretorio=diretorio, metrica=plano.metrica, coluna_y=coluna_y, dtype=plano.dtype)
+
+    if not isinstance(data, pd.DataFrame):
+        data = pd.concat(ler_em_blocos(data), ignore_index=True)
+    prototipos = None
+    if plano.estrategia == 'prototipos':
+        prototipos = SelecaoPrototipos('amostragem', plano.fracao_prototipos, random_state)
+    return KAOG(data, coluna_y=coluna_y, metrica=plano.metrica, n_jobs=plano.n_jobs, dtype=plano.dtype,
+                motor='vetorizado', prototipos=prototipos)
+
+
+def _plano_denso(n_usado: int, d: int, n: int, dtype: np.dtype, threads: int, k_esperado: int, fator_metrica: int,
+                 orcamento_memoria: int) -> Optional[Plano]:
+    """Plano denso com a maior quantidade de threads que cabe no orçamento, ou `None` se nem uma thread couber."""
+    for n_jobs in range(threads, 0, -1):
+        memoria = estimar_memoria_denso(n_usado, d, dtype, n_jobs, k_esperado)
+        if memoria <= orcamento_memoria:
+            tempo = n_usado * n_usado * (d * fator_metrica + math.log2(n_usado)) / OPERACOES_POR_SEGUNDO / n_jobs
+            return Plano('denso', n, d, n_jobs, dtype, n_usado - 1, n_usado / n, memoria, 0, tempo,
+                         orcamento_memoria, False)
+    return None
+
+
+def dimensoes(data: Union[str, pd.DataFrame], coluna_y: Optional[str] = None,
+              tamanho_bloco: int = 100_000) -> (int, int):
+    """
+    Quantidade de pontos e de atributos, lendo o arquivo em blocos quando `data` é um caminho.
+
+    :param data: Conjunto de dados, contendo também a coluna de classe, ou caminho de um arquivo CSV ou Parquet.
+    :type data: Union[str, pandas.DataFrame]
+    :param coluna_y: Nome da coluna de classe. Por padrão, `ColunaYSingleton().NOME_COLUNA_Y`.
+    :type coluna_y: str
+    :param tamanho_bloco: Quantidade de linhas lidas por vez.
+    :type tamanho_bloco: int
+    :return: Quantidade de pontos e de atributos.
+    :rtype: Tuple[int, int]
+    """
+    coluna_y = ColunaYSingleton().NOME_COLUNA_Y if coluna_y is None else coluna_y
+    if isinstance(data, pd.DataFrame):
+        return len(data), data.shape[1] - 1
+    n, d = 0, 0
+    for bloco in ler_em_blocos(data, tamanho_bloco):
+        n, d = n + len(bloco), bloco.drop(columns=coluna_y).shape[1]
+    return n, d
+
+
+def _formatar_bytes(quantidade: int) -> str:
+    """Quantidade de bytes em uma unidade legível."""
+    for unidade in ('B', 'KiB', 'MiB', 'GiB'):
+        if quantidade < 1024:
+            return f'{quantidade:.1f} {unidade}'
+        quantidade /= 1024
+    return f'{quantidade:.1f} TiB'
@@ -0,0 +1,193 @@
+"""
+Seleção de protótipos: redução do conjunto de treino a um subconjunto representativo de cada classe, sobre o qual o
+KAOG é criado.
+
+Em conjuntos muito redundantes, a maior parte dos vértices pertence a componentes grandes e puros, e o grafo ótimo
+criado sobre os protótipos é praticamente o mesmo. O tempo de criação passa a depender da quantidade de protótipos, e
+não de n.
+"""
+import time
+from typing import Callable, Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import NearestNeighbors
+
+from kaog.distancias import Distancias
+from kaog.util import ColunaYSingleton
+from kaog.util.codificacao import CodificadorCategorico
+
+
+class SelecaoPrototipos:
+    """Seleção de protótipos por classe.
+
+    **SelecaoPrototipos**
+
+    **Métodos**
+    amostragem
+        Amostragem estratificada: `fracao` dos pontos de cada classe, com ao menos um ponto por classe.
+    kmeans
+        Centróides do k-means aplicado a cada classe, com `fracao` dos pontos de cada classe como quantidade de
+        grupos. Os protótipos são novos pontos, com índice numerado a partir de 0. Requer atributos numéricos.
+    cnn
+        *Condensed nearest neighbor* (Hart): partindo de um ponto por classe, adiciona os pontos classificados
+        incorretamente pelo vizinho mais próximo dentre os protótipos, até que todos sejam classificados corretamente
+        ou que `max_passadas` seja atingido. Os pontos são avaliados em blocos, com uma única busca de vizinhos por
+        bloco. O vizinho mais próximo é definido pela mesma métrica e pela mesma codificação das colunas categóricas
+        usadas pelo KAOG. `fracao` não é usada.
+    """
+    METODOS = ('amostragem', 'kmeans', 'cnn')
+
+    def __init__(self, metodo: str = 'amostragem', fracao: float = 0.1, random_state: Optional[int] = None,
+                 max_passadas: int = 10, tamanho_bloco: int = 1024):
+        """
+        :param metodo: `'amostragem'`, `'kmeans'` ou `'cnn'`.
+        :type metodo: str
+        :param fracao: Fração dos pontos de cada classe mantida como protótipos.
+        :type fracao: float
+        :param random_state: Semente dos sorteios.
+        :type random_state: int
+        :param max_passadas: Quantidade máxima de passadas pelos dados no método `'cnn'`.
+        :type max_passadas: int
+        :param tamanho_bloco: Quantidade de pontos avaliados por vez no método `'cnn'`.
+        :type tamanho_bloco: int
+        :raises ValueError: Se o método for desconhecido ou se `fracao` estiver fora do intervalo (0, 1].
+        """
+        if metodo not in self.METODOS:
+            raise ValueError(f'Método {metodo} desconhecido, use um dentre {self.METODOS}.')
+        if not 0 < fracao <= 1:
+            raise ValueError('A fração de protótipos deve estar no intervalo (0, 1].')
+        self.metodo = metodo
+        self.fracao = fracao
+        self.random_state = random_state
+        self.max_passadas = max_passadas
+        self.tamanho_bloco = tamanho_bloco
+
+    def selecionar(self, data: pd.DataFrame, coluna_y: Optional[str] = None,
+                   colunas_categoricas: pd.Index = pd.Index([]), metrica: Union[str, Callable] = None) -> pd.DataFrame:
+        """
+        Seleciona os protótipos.
+
+        :param data: Conjunto de dados contendo também a coluna de classe.
+        :type data: pandas.DataFrame
+        :param coluna_y: Nome da coluna de classe. Por padrão, `ColunaYSingleton().NOME_COLUNA_Y`.
+        :type coluna_y: str
+        :param colunas_categoricas: Colunas categóricas, codificadas como em :class:`kaog.distancias.Distancias` no
+            método `'cnn'`.
+        :type colunas_categoricas: pandas.Index
+        :param metrica: Métrica do vizinho mais próximo no método `'cnn'`. Por padrão, `Distancias.METRIC`.
+        :type metrica: Union[str, Callable]
+        :return: Protótipos, com as mesmas colunas de `data`.
+        :rtype: pandas.DataFrame
+        """
+        coluna_y = ColunaYSingleton().NOME_COLUNA_Y if coluna_y is None else coluna_y
+        rng = np.random.default_rng(self.random_state)
+        if self.metodo == 'amostragem':
+            return self._amostragem(data, coluna_y, rng)
+        if self.metodo == 'kmeans':
+            return self._kmeans(data, coluna_y, rng)
+        return self._cnn(data, coluna_y, rng, colunas_categoricas, metrica)
+
+    def _quantidade(self, n: int) -> int:
+        """Quantidade de protótipos de uma classe com `n` pontos."""
+        return min(n, max(1, int(round(self.fracao * n))))
+
+    def _amostragem(self, data: pd.DataFrame, coluna_y: str, rng: np.random.Generator) -> pd.DataFrame:
+        """Amostragem estratificada, mantendo a ordem original dos pontos."""
+        posicoes = [rng.choice(grupo, self._quantidade(len(grupo)), replace=False)
+                    for grupo in data.groupby(coluna_y, sort=False).indices.values()]
+        return data.iloc[np.sort(np.concatenate(posicoes))]
+
+    def _kmeans(self, data: pd.DataFrame, coluna_y: str, rng: np.random.Generator) -> pd.DataFrame:
+        """Centróides do k-means de cada classe."""
+        from sklearn.cluster import MiniBatchKMeans
+
+        prototipos = []
+        for classe, grupo in data.groupby(coluna_y, sort=False):
+            x = grupo.drop(columns=coluna_y)
+            quantidade = self._quantidade(len(grupo))
+            if quantidade == len(grupo):
+                centroides = x.to_numpy()
+            else:
+                semente = int(rng.integers(2 ** 31))
+                centroides = MiniBatchKMeans(n_clusters=quantidade, n_init=3, random_state=semente).fit(x).cluster_centers_
+            prototipo = pd.DataFrame(centroides, columns=x.columns)
+            prototipo[coluna_y] = classe
+            prototipos.append(prototipo)
+        return pd.concat(prototipos, ignore_index=True)[data.columns]
+
+    def _cnn(self, data: pd.DataFrame, coluna_y: str, rng: np.random.Generator, colunas_categoricas: pd.Index,
+             metrica: Union[str, Callable]) -> pd.DataFrame:
+        """*Condensed nearest neighbor*, avaliando os pontos em blocos."""
+        x = data.drop(columns=coluna_y)
+        x = CodificadorCategorico(colunas_categoricas).ajustar(x).transformar(x).to_numpy()
+        metrica = Distancias.METRIC if metrica is None else metrica
+        y = pd.factorize(data[coluna_y])[0]
+        ordem = rng.permutation(len(data))
+        escolhidos = np.zeros(len(data), dtype=bool)
+        escolhidos[ordem[np.unique(y[ordem], return_index=True)[1]]] = True
+
+        for _ in range(self.max_passadas):
+            adicionados = 0
+            for inicio in range(0, len(ordem), self.tamanho_bloco):
+                bloco = ordem[inicio:inicio + self.tamanho_bloco]
+                bloco = bloco[~escolhidos[bloco]]
+                if len(bloco) == 0:
+                    continue
+                prototipos = np.flatnonzero(escolhidos)
+                nn = NearestNeighbors(n_neighbors=1, metric=metrica).fit(x[prototipos])
+                mais_proximo = prototipos[nn.kneighbors(x[bloco], return_distance=False)[:, 0]]
+                errados = bloco[y[mais_proximo] != y[bloco]]
+                escolhidos[errados] = True
+                adicionados += len(errados)
+            if adicionados == 0:
+                break
+        return data.iloc[np.flatnonzero(escolhidos)]
+
+
+def comparar_com_completo(data: pd.DataFrame, selecao: SelecaoPrototipos, fracao_validacao: float = 0.2,
+                          coluna_y: Optional[str] = None, random_state: Optional[int] = None,
+                          **kwargs) -> Dict[str, float]:
+    """
+    Compara, em um conjunto de validação, o KAOG criado sobre os protótipos com o KAOG criado sobre todo o treino.
+
+    :param data: Conjunto de dados contendo também a coluna de classe.
+    :type data: pandas.DataFrame
+    :param selecao: Seleção de protótipos avaliada.
+    :type selecao: SelecaoPrototipos
+    :param fracao_validacao: Fração estratificada dos pontos separada para validação.
+    :type fracao_validacao: float
+    :param coluna_y: Nome da coluna de classe. Por padrão, `ColunaYSingleton().NOME_COLUNA_Y`.
+    :type coluna_y: str
+    :param random_state: Semente da separação.
+    :type random_state: int
+    :param kwargs: Demais parâmetros de :class:`kaog.KAOG`.
+    :return: Quantidade de pontos de treino e de protótipos, acurácia e tempo de criação de cada KAOG e a diferença de
+        acurácia (protótipos menos completo).
+    :rtype: Dict[str, float]
+    """
+    from kaog.kaog import KAOG
+
+    coluna_y = ColunaYSingleton().NOME_COLUNA_Y if coluna_y is None else coluna_y
+    validacao = SelecaoPrototipos('amostragem', fracao_validacao, random_state).selecionar(data, coluna_y)
+    treino = data.drop(index=validacao.index)
+    x_validacao, y_validacao = validacao.drop(columns=coluna_y), validacao[coluna_y]
+
+    inicio = time.perf_counter()
+    completo = KAOG(treino, coluna_y=coluna_y, **kwargs)
+    tempo_completo = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    reduzido = KAOG(treino, coluna_y=coluna_y, prototipos=selecao, **kwargs)
+    tempo_prototipos = time.perf_counter() - inicio
+
+    acuracia_completo = float((completo.predict(x_validacao) == y_validacao).mean())
+    acuracia_prototipos = float((reduzido.predict(x_validacao) == y_validacao).mean())
+    return {
+        'pontos_treino': len(treino),
+        'prototipos': len(reduzido.data),
+        'acuracia_completo': acuracia_completo,
+        'acuracia_prototipos': acuracia_prototipos,
+        'diferenca_acuracia': acuracia_prototipos - acuracia_completo,
+        'tempo_completo': tempo_completo,
+        'tempo_prototipos': tempo_prototipos,
+    }
@@ -0,0 +1,148 @@
+"""Redução de dimensionalidade aplicada aos atributos antes da busca de vizinhos."""
+from typing import Dict, Optional, Union
+
+import numpy as np
+from scipy import sparse
+from sklearn.neighbors import NearestNeighbors
+
+
+class ReducaoDimensionalidade:
+    """Projeção dos atributos em um espaço de menor dimensão.
+
+    **ReducaoDimensionalidade**
+
+    Com muitos atributos, as árvores do NearestNeighbors perdem eficiência e a busca de vizinhos passa a dominar o tempo
+    de criação do KAOG. A redução é ajustada sobre os pontos de treino e aplicada da mesma forma às consultas.
+
+    **Métodos**
+    pca
+        Análise de componentes principais. `componentes` pode ser a quantidade de componentes (int) ou a fração da
+        variância explicada a ser mantida (float). Requer dados densos.
+    svd
+        SVD truncado com algoritmo aleatorizado, que aceita matrizes esparsas. `componentes` deve ser um int.
+    projecao
+        Projeção aleatória esparsa. `componentes` pode ser a quantidade de componentes (int) ou a distorção máxima
+        aceita (float), usada para determinar a dimensão pelo lema de Johnson-Lindenstrauss.
+    """
+    METODOS = ('pca', 'svd', 'projecao')
+
+    def __init__(self, metodo: str = 'pca', componentes: Union[int, float] = 0.95,
+                 random_state: Optional[int] = None):
+        """
+        :param metodo: `'pca'`, `'svd'` ou `'projecao'`.
+        :type metodo: str
+        :param componentes: Dimensão final ou, conforme o método, variância explicada ou distorção máxima.
+        :type componentes: Union[int, float]
+        :param random_state: Semente dos métodos aleatorizados.
+        :type random_state: int
+        :raises ValueError: Se o método for desconhecido ou se `componentes` não for válido para o método.
+        """
+        if metodo not in self.METODOS:
+            raise ValueError(f'Método {metodo} desconhecido, use um dentre {self.METODOS}.')
+        if metodo == 'svd' and not isinstance(componentes, (int, np.integer)):
+            raise ValueError('O SVD truncado requer a quantidade de componentes (int).')
+        self.metodo = metodo
+        self.componentes = componentes
+        self.random_state = random_state
+        self.estimador = None
+
+    @property
+    def ajustada(self) -> bool:
+        """Se a redução já foi ajustada."""
+        return self.estimador is not None
+
+    @property
+    def dimensao(self) -> int:
+        """Quantidade de atributos após a redução."""
+        if self.metodo == 'projecao':
+            return self.estimador.n_components_
+        return self.estimador.components_.shape[0]
+
+    def ajustar_transformar(self, x: Union[np.ndarray, sparse.spmatrix]) -> np.ndarray:
+        """
+        Ajusta a redução sobre os pontos de treino e os projeta.
+
+        :param x: Pontos de treino.
+        :type x: Union[numpy.ndarray, scipy.sparse.spmatrix]
+        :return: Pontos projetados, em uma matriz densa.
+        :rtype: numpy.ndarray
+        :raises ValueError: Se o PCA receber uma matriz esparsa.
+        """
+        if self.metodo == 'pca' and sparse.issparse(x):
+            raise ValueError('O PCA requer dados densos, use o método `svd` ou `projecao` para matrizes esparsas.')
+        self.estimador = self._criar_estimador()
+        return _densa(self.estimador.fit_transform(x))
+
+    def transformar(self, x: Union[np.ndarray, sparse.spmatrix]) -> np.ndarray:
+        """
+        Projeta novos pontos com a redução já ajustada.
+
+        :param x: Pontos a serem projetados.
+        :type x: Union[numpy.ndarray, scipy.sparse.spmatrix]
+        :return: Pontos projetados, em uma matriz densa.
+        :rtype: numpy.ndarray
+        :raises RuntimeError: Se a redução não tiver sido ajustada.
+        """
+        if not self.ajustada:
+            raise RuntimeError('A redução ainda não foi ajustada.')
+        return _densa(self.estimador.transform(x))
+
+    def alteracao_vizinhos(self, x: Union[np.ndarray, sparse.spmatrix], vizinhos_reduzidos: np.ndarray, k: int = 10,
+                           amostra: int = 500, metrica: str = 'euclidean',
+                           random_state: Optional[int] = None) -> Dict[str, float]:
+        """
+        Compara, para uma amostra dos pontos, os `k` vizinhos mais próximos no espaço original com os obtidos no espaço
+        reduzido.
+
+        :param x: Pontos de treino, no espaço original.
+        :type x: Union[numpy.ndarray, scipy.sparse.spmatrix]
+        :param vizinhos_reduzidos: Vizinhos ordenados de cada ponto no espaço reduzido, com pelo menos `k` colunas.
+        :type vizinhos_reduzidos: numpy.ndarray
+        :param k: Quantidade de vizinhos comparados.
+        :type k: int
+        :param amostra: Quantidade de pontos comparados.
+        :type amostra: int
+        :param metrica: Métrica usada no espaço original.
+        :type metrica: str
+        :param random_state: Semente do sorteio da amostra.
+        :type random_state: int
+        :return: Fração média e mínima dos `k` vizinhos originais mantidos no espaço reduzido (`recall_medio` e
+            `recall_minimo`) e fração dos pontos com todos os vizinhos mantidos (`pontos_inalterados`).
+        :rtype: Dict[str, float]
+        """
+        n = x.shape[0]
+        k = min(k, n - 1, vizinhos_reduzidos.shape[1])
+        posicoes = np.random.default_rng(random_state).choice(n, min(amostra, n), replace=False)
+        nn = NearestNeighbors(metric=metrica, algorithm='brute').fit(x)
+        vizinhos_originais = nn.kneighbors(x[posicoes], n_neighbors=k + 1, return_distance=False)
+        # O próprio ponto é removido, mantendo os k primeiros demais
+        vizinhos_originais = np.array([linha[linha != p][:k] for linha, p in zip(vizinhos_originais, posicoes)])
+
+        reduzidos = np.sort(np.asarray(vizinhos_reduzidos[posicoes, :k]), axis=1)
+        originais = np.sort(vizinhos_originais, axis=1)
+        mantidos = np.array([len(np.intersect1d(a, b, assume_unique=True)) for a, b in zip(originais, reduzidos)]) / k
+        return {
+            'recall_medio': float(mantidos.mean()),
+            'recall_minimo': float(mantidos.min()),
+            'pontos_inalterados': float(np.mean(mantidos == 1)),
+        }
+
+    def _criar_estimador(self):
+        """Cria o estimador do scikit-learn correspondente ao método."""
+        if self.metodo == 'pca':
+            from sklearn.decomposition import PCA
+            return PCA(n_components=self.componentes, random_state=self.random_state)
+        if self.metodo == 'svd':
+            from sklearn.decomposition import TruncatedSVD
+            return TruncatedSVD(n_components=self.componentes, algorithm='randomized', random_state=self.random_state)
+        from sklearn.random_projection import SparseRandomProjection
+        if isinstance(self.componentes, (int, np.integer)):
+            return SparseRandomProjection(n_components=self.componentes, dense_output=True,
+                                          random_state=self.random_state)
+        return SparseRandomProjection(n_components='auto', eps=self.componentes, dense_output=True,
+                                      random_state=self.random_state)
+
+
+def _densa(x: Union[np.ndarray, sparse.spmatrix]) -> np.ndarray:
+    """Converte o resultado da projeção em um array denso."""
+    return x.toarray() if sparse.issparse(x) else np.asarray(x)
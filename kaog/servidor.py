@@ -0,0 +1,269 @@
+"""
+Servidor assíncrono de classificação, que agrupa as requisições recebidas em lotes.
+
+Cada requisição classificada individualmente exige uma busca de vizinhos com um único ponto. O
+:class:`ServidorPredicao` enfileira as requisições, reúne as que chegam dentro de uma janela de latência e executa uma
+única chamada de :meth:`kaog.KAOG.predict_proba` para todo o lote, respondendo a cada requisição com as suas linhas.
+
+Exemplo de uso em processo::
+
+    async with ServidorPredicao.carregar('modelo.pkl', janela=0.005) as servidor:
+        classes = await asyncio.gather(*(servidor.classificar(ponto) for ponto in pontos))
+        print(servidor.metricas())
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Dict, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from kaog.kaog import KAOG
+
+Pontos = Union[pd.DataFrame, pd.Series, Mapping]
+
+
+class MetricasServidor:
+    """Vazão, latência e tamanho dos lotes de um :class:`ServidorPredicao`.
+
+    **MetricasServidor**
+
+    As latências e os tamanhos dos lotes são mantidos apenas para as últimas `janela_amostras` ocorrências.
+    """
+
+    def __init__(self, janela_amostras: int = 10_000):
+        """
+        :param janela_amostras: Quantidade de latências e de tamanhos de lote armazenados.
+        :type janela_amostras: int
+        """
+        self.requisicoes = 0
+        self.pontos = 0
+        self.lotes = 0
+        self.erros = 0
+        self.inicio = time.perf_counter()
+        self.latencias = deque(maxlen=janela_amostras)
+        self.tamanhos_lotes = deque(maxlen=janela_amostras)
+
+    def registrar_lote(self, tamanho: int, latencias: List[float]):
+        """
+        Registra um lote processado.
+
+        :param tamanho: Quantidade de pontos do lote.
+        :type tamanho: int
+        :param latencias: Tempo, em segundos, entre a chegada e a resposta de cada requisição do lote.
+        :type latencias: List[float]
+        """
+        self.lotes += 1
+        self.requisicoes += len(latencias)
+        self.pontos += tamanho
+        self.tamanhos_lotes.append(tamanho)
+        self.latencias.extend(latencias)
+
+    def resumo(self) -> Dict[str, float]:
+        """
+        Resumo das métricas.
+
+        :return: Quantidade de requisições, pontos, lotes e erros, vazão (requisições e pontos por segundo), latências
+            média, p50, p95 e p99 (em segundos) e tamanho médio e máximo dos lotes.
+        :rtype: Dict[str, float]
+        """
+        duracao = time.perf_counter() - self.inicio
+        latencias = np.asarray(self.latencias) if self.latencias else np.zeros(1)
+        tamanhos = np.asarray(self.tamanhos_lotes) if self.tamanhos_lotes else np.zeros(1)
+        p50, p95, p99 = np.percentile(latencias, [50, 95, 99])
+        return {
+            'requisicoes': self.requisicoes,
+            'pontos': self.pontos,
+            'lotes': self.lotes,
+            'erros': self.erros,
+            'requisicoes_por_segundo': self.requisicoes / duracao,
+            'pontos_por_segundo': self.pontos / duracao,
+            'latencia_media': float(latencias.mean()),
+            'latencia_p50': float(p50),
+            'latencia_p95': float(p95),
+            'latencia_p99': float(p99),
+            'tamanho_medio_lote': float(tamanhos.mean()),
+            'tamanho_maximo_lote': int(tamanhos.max()),
+        }
+
+
+class ServidorPredicao:
+    """Servidor de classificação com agrupamento de requisições em lotes.
+
+    **ServidorPredicao**
+
+    Um lote é fechado quando `janela` segundos se passam desde a chegada da sua primeira requisição ou quando atinge
+    `tamanho_maximo_lote` pontos. O cálculo de cada lote é executado em uma thread, de forma que o laço de eventos
+    continua recebendo requisições enquanto o lote anterior é processado. Os lotes são processados um de cada vez.
+    """
+
+    def __init__(self, modelo: KAOG, janela: float = 0.005, tamanho_maximo_lote: int = 1024):
+        """
+        :param modelo: Modelo já treinado.
+        :type modelo: KAOG
+        :param janela: Tempo máximo, em segundos, que uma requisição aguarda por outras para formar um lote.
+        :type janela: float
+        :param tamanho_maximo_lote: Quantidade máxima de pontos por lote. Uma requisição maior que esse limite forma um
+            lote sozinha.
+        :type tamanho_maximo_lote: int
+        """
+        self.modelo = modelo
+        self.janela = janela
+        self.tamanho_maximo_lote = tamanho_maximo_lote
+        self.metricas_servidor = MetricasServidor()
+        self._fila: Optional[asyncio.Queue] = None
+        self._tarefa: Optional[asyncio.Task] = None
+        self._colunas = getattr(modelo.x, 'columns', None)
+
+    @classmethod
+    def carregar(cls, caminho: str, **kwargs) -> 'ServidorPredicao':
+        """
+        Cria um servidor para um modelo salvo com :meth:`kaog.KAOG.salvar`.
+
+        :param caminho: Caminho do arquivo do modelo.
+        :type caminho: str
+        :param kwargs: Demais parâmetros de :class:`ServidorPredicao`.
+        :return: Servidor, ainda não iniciado.
+        :rtype: ServidorPredicao
+        """
+        return cls(KAOG.carregar(caminho), **kwargs)
+
+    @property
+    def ativo(self) -> bool:
+        """Se o servidor está processando requisições."""
+        return self._tarefa is not None and not self._tarefa.done()
+
+    async def iniciar(self):
+        """Inicia o processamento das requisições no laço de eventos atual."""
+        if self.ativo:
+            return
+        self._fila = asyncio.Queue()
+        self.metricas_servidor = MetricasServidor()
+        self._tarefa = asyncio.get_running_loop().create_task(self._processar())
+
+    async def parar(self):
+        """Responde às requisições pendentes e encerra o processamento."""
+        if not self.ativo:
+            return
+        await self._fila.put(None)
+        await self._tarefa
+        self._tarefa = None
+
+    async def __aenter__(self) -> 'ServidorPredicao':
+        await self.iniciar()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.parar()
+
+    async def predict_proba(self, x: Pontos) -> pd.DataFrame:
+        """
+        Probabilidade de cada classe para os pontos de uma requisição.
+
+        :param x: Um ponto (`pandas.Series` ou dicionário com o valor de cada coluna) ou vários pontos
+            (`pandas.DataFrame`).
+        :type x: Union[pandas.DataFrame, pandas.Series, Mapping]
+        :return: Probabilidade de cada classe (colunas) para cada ponto (linhas), com o mesmo índice de `x`.
+        :rtype: pandas.DataFrame
+        :raises RuntimeError: Se o servidor não tiver sido iniciado.
+        """
+        if not self.ativo:
+            raise RuntimeError('O servidor não foi iniciado.')
+        pontos = self._como_dataframe(x)
+        futuro = asyncio.get_running_loop().create_future()
+        await self._fila.put((pontos, futuro, time.perf_counter()))
+        probabilidades = await futuro
+        probabilidades.index = pontos.index
+        return probabilidades
+
+    async def predict(self, x: Pontos) -> pd.Series:
+        """
+        Classe mais provável dos pontos de uma requisição.
+
+        :param x: Pontos, como em :meth:`predict_proba`.
+        :type x: Union[pandas.DataFrame, pandas.Series, Mapping]
+        :return: Classe de cada ponto.
+        :rtype: pandas.Series
+        """
+        probabilidades = await self.predict_proba(x)
+        return pd.Series(probabilidades.columns[probabilidades.to_numpy().argmax(axis=1)], index=probabilidades.index,
+                         name=self.modelo.coluna_y)
+
+    async def classificar(self, ponto: Union[pd.Series, Mapping]):
+        """
+        Classe mais provável de um único ponto.
+
+        :param ponto: Valor de cada coluna.
+        :type ponto: Union[pandas.Series, Mapping]
+        :return: Classe do ponto.
+        """
+        return (await self.predict(ponto)).iloc[0]
+
+    def metricas(self) -> Dict[str, float]:
+        """
+        Métricas de vazão, latência e tamanho dos lotes desde que o servidor foi iniciado.
+
+        :return: Ver :meth:`MetricasServidor.resumo`.
+        :rtype: Dict[str, float]
+        """
+        return self.metricas_servidor.resumo()
+
+    def _como_dataframe(self, x: Pontos) -> pd.DataFrame:
+        """Converte os pontos de uma requisição em um DataFrame com as colunas do modelo."""
+        if isinstance(x, pd.DataFrame):
+            return x
+        if isinstance(x, pd.Series):
+            return x.to_frame().T
+        return pd.DataFrame([x], columns=self._colunas)
+
+    async def _processar(self):
+        """Laço que forma os lotes e os envia ao modelo até receber o sinal de parada."""
+        parar = False
+        while not parar:
+            lote, parar = await self._formar_lote()
+            if lote:
+                await self._executar_lote(lote)
+
+    async def _formar_lote(self) -> Tuple[List[tuple], bool]:
+        """Aguarda a primeira requisição e reúne as seguintes até o fim da janela ou até o tamanho máximo."""
+        primeira = await self._fila.get()
+        if primeira is None:
+            return [], True
+        lote = [primeira]
+        tamanho = len(primeira[0])
+        prazo = time.perf_counter() + self.janela
+        while tamanho < self.tamanho_maximo_lote:
+            restante = prazo - time.perf_counter()
+            try:
+                requisicao = self._fila.get_nowait() if restante <= 0 else \
+                    await asyncio.wait_for(self._fila.get(), restante)
+            except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                break
+            if requisicao is None:
+                return lote, True
+            lote.append(requisicao)
+            tamanho += len(requisicao[0])
+        return lote, False
+
+    async def _executar_lote(self, lote: List[tuple]):
+        """Executa uma única classificação para todo o lote e responde a cada requisição."""
+        pontos = pd.concat([requisicao[0] for requisicao in lote], ignore_index=True)
+        try:
+            probabilidades = await asyncio.get_running_loop().run_in_executor(None, self.modelo.predict_proba,
+                                                                              pontos)
+        except Exception as erro:
+            self.metricas_servidor.erros += len(lote)
+            for _, futuro, _ in lote:
+                if not futuro.done():
+                    futuro.set_exception(erro)
+            return
+
+        agora = time.perf_counter()
+        inicio = 0
+        for requisicao, futuro, chegada in lote:
+            fim = inicio + len(requisicao)
+            if not futuro.done():
+                futuro.set_result(probabilidades.iloc[inicio:fim].copy())
+            inicio = fim
+        self.metricas_servidor.registrar_lote(len(pontos), [agora - chegada for _, _, chegada in lote])
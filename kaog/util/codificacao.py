@@ -0,0 +1,70 @@
+"""Codificação das colunas categóricas em valores numéricos, ajustada uma única vez sobre os dados de treino."""
+from typing import Dict
+
+import pandas as pd
+
+
+class CodificadorCategorico:
+    """Converte categorias em códigos inteiros, mantendo os mesmos códigos para os dados de treino e para as consultas.
+
+    **CodificadorCategorico**
+
+    As categorias de cada coluna são numeradas a partir de 1, pela ordem de aparição nos dados de treino, assim como
+    `pandas.factorize(coluna)[0] + 1`. Valores ausentes recebem o código 0 e categorias não vistas no treino recebem o
+    código seguinte ao da última categoria conhecida.
+
+    **Atributos**
+    categorias
+        Categorias conhecidas de cada coluna, na ordem dos códigos.
+    """
+
+    def __init__(self, colunas: pd.Index):
+        """
+        :param colunas: Colunas categóricas.
+        :type colunas: pandas.Index
+        """
+        self.colunas = pd.Index(colunas)
+        self.categorias: Dict[object, pd.Index] = {}
+
+    @property
+    def ajustado(self) -> bool:
+        """Se as categorias já foram aprendidas."""
+        return len(self.categorias) == len(self.colunas)
+
+    def ajustar(self, x: pd.DataFrame) -> 'CodificadorCategorico':
+        """
+        Aprende as categorias de cada coluna.
+
+        :param x: Dados de treino.
+        :type x: pandas.DataFrame
+        :return: O próprio codificador.
+        :rtype: CodificadorCategorico
+        """
+        self.categorias = {coluna: pd.Index(pd.unique(x[coluna].dropna())) for coluna in self.colunas}
+        return self
+
+    def transformar(self, x: pd.DataFrame) -> pd.DataFrame:
+        """
+        Substitui as categorias pelos seus códigos, sem alterar as demais colunas.
+
+        :param x: Dados com as colunas categóricas.
+        :type x: pandas.DataFrame
+        :return: Cópia de `x` com as colunas categóricas codificadas. Sem colunas categóricas, o próprio `x`.
+        :rtype: pandas.DataFrame
+        :raises RuntimeError: Se o codificador não tiver sido ajustado.
+        """
+        if len(self.colunas) == 0:
+            return x
+        if not self.ajustado:
+            raise RuntimeError('O codificador ainda não foi ajustado.')
+        x = x.copy()
+        for coluna, categorias in self.categorias.items():
+            valores = x[coluna]
+            codigos = categorias.get_indexer(valores) + 1
+            codigos[(codigos == 0) & valores.notna().to_numpy()] = len(categorias) + 1
+            x[coluna] = codigos
+        return x
+
+    def ajustar_transformar(self, x: pd.DataFrame) -> pd.DataFrame:
+        """Ajusta o codificador e codifica `x`."""
+        return self.ajustar(x).transformar(x)
@@ -1,16 +1,80 @@
+"""
+Desenho dos grafos.
+
+O *matplotlib* e os métodos de projeção do *scikit-learn* são importados apenas quando algum desenho é feito, de forma
+que o algoritmo pode ser importado e executado sem as dependências de desenho (instaladas com `pip install kaog[draw]`).
+"""
+import hashlib
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from itertools import cycle
 from random import shuffle
 
 import networkx as nx
 import numpy as np
 import pandas as pd
-from matplotlib import pyplot as plt
-from matplotlib.lines import Line2D
-from sklearn.manifold import TSNE
-from sklearn.preprocessing import MinMaxScaler
 
-from kaog.util import ColunaYSingleton
+
+def _pyplot():
+    """
+    Importa o `matplotlib.pyplot` sob demanda.
+
+    :raises ImportError: Se o *matplotlib* não estiver instalado.
+    """
+    try:
+        from matplotlib import pyplot as plt
+    except ImportError as e:
+        raise ImportError('O desenho dos grafos requer o pacote `matplotlib`, instale com `pip install kaog[draw]`.') from e
+    return plt
+
+
+class _CacheCoordenadas:
+    """Cache das coordenadas de desenho, compartilhado por todos os grafos.
+
+    As coordenadas são identificadas pelo conteúdo dos dados (valores, índices e colunas), de forma que o KAOG e todos
+    os seus grafos k-associados reutilizam o mesmo t-SNE. Alterar os dados resulta em uma nova chave.
+    """
+    TAMANHO_MAXIMO = 8
+
+    def __init__(self):
+        self._coordenadas = OrderedDict()
+
+    @staticmethod
+    def chave(x: pd.DataFrame, metodo: str = 'tsne') -> str:
+        """Identificador do conteúdo de `x` e do método de projeção."""
+        hash_ = hashlib.sha1(pd.util.hash_pandas_object(x, index=True).to_numpy().tobytes())
+        hash_.update(repr(list(x.columns)).encode())
+        hash_.update(metodo.encode())
+        return hash_.hexdigest()
+
+    def obter(self, x: pd.DataFrame, calcular, metodo: str = 'tsne') -> np.ndarray:
+        """
+        Retorna as coordenadas de `x`, calculando-as com `calcular(x)` apenas se não estiverem no cache.
+
+        :param x: Dados sem classe.
+        :type x: pandas.DataFrame
+        :param calcular: Função que recebe `x` e retorna um array (n, 2) com as coordenadas.
+        :type calcular: Callable
+        :param metodo: Nome do método de projeção, parte da chave do cache.
+        :type metodo: str
+        :return: Coordenadas, na mesma ordem de `x`.
+        :rtype: numpy.ndarray
+        """
+        chave = self.chave(x, metodo)
+        if chave in self._coordenadas:
+            self._coordenadas.move_to_end(chave)
+        else:
+            self._coordenadas[chave] = calcular(x)
+            if len(self._coordenadas) > self.TAMANHO_MAXIMO:
+                self._coordenadas.popitem(last=False)
+        return self._coordenadas[chave]
+
+    def limpar(self):
+        """Remove todas as coordenadas armazenadas."""
+        self._coordenadas.clear()
+
+
+cache_coordenadas = _CacheCoordenadas()
 
 
 class DrawableGraph(ABC):
@@ -51,15 +115,28 @@ class DrawableGraph(ABC):
         """Classe associada aos dados do grafo."""
         raise NotImplementedError
 
-    def draw(self, title=None, color_by_component=False):
+    def draw(self, title=None, color_by_component=False, arquivo=None, with_labels=True):
         """
         Realiza o plot do grafo. Para dados em `self.x` que estejam em 2D, o plot é feito sem t-SNE, enquanto maiores
-        dimensões são plotados com t-SNE.
+        dimensões são plotados com t-SNE. As coordenadas são armazenadas em cache e compartilhadas entre grafos com os
+        mesmos dados.
         Por padrão, a cor dos vértices é a cor da classe associada.
 
+        Todas as arestas são desenhadas em uma única coleção de linhas e os vértices em uma coleção por classe (ou uma
+        única, ao colorir por componente).
+
+        :param title: Título do gráfico.
+        :type title: str
         :param color_by_component: Se `True`, a cor dos vértices é a cor do componente conectado ao vértice, ao invés da classe.
-        :type color_by_component: object
+        :type color_by_component: bool
+        :param arquivo: Se definido, a figura é salva nesse arquivo e fechada, sem ser exibida.
+        :type arquivo: str
+        :param with_labels: Se os índices dos vértices devem ser escritos.
+        :type with_labels: bool
+        :return: Figura criada.
+        :rtype: matplotlib.figure.Figure
         """
+        plt = _pyplot()
         scala_fig = 2.5
         scale_coords = 1
         fig = plt.figure(figsize=(6.4 * scala_fig, 4.8 * scala_fig))
@@ -67,78 +144,189 @@ class DrawableGraph(ABC):
         ax.set_aspect('equal')
         if title is not None:
             ax.set_title(title)
-        pos = nx.kamada_kawai_layout(self.grafo)
-        markers = [*Line2D.markers.keys()][3:-4]
-        y_unique = self.y.unique()
-        replace = {k: v for k, v in zip(y_unique, cycle(markers))}
-        scaller = MinMaxScaler()
-        scaller.fit(y_unique.reshape(-1, 1))
 
         # Obeter coordenadas utilizando t-SNE
         cords = self._get_coords(scale_coords)
 
+        self._draw_edges(ax, cords)
         if color_by_component:
             self._draw_color_by_component(ax, cords)
         else:
-            self._draw_color_by_class(ax, cords, replace, scaller, y_unique)
+            self._draw_color_by_class(ax, cords)
+        if with_labels:
+            self._draw_labels(ax, cords)
+        ax.autoscale_view()
+
+        if arquivo is not None:
+            fig.savefig(arquivo)
+            plt.close(fig)
+        else:
+            plt.show()
+        return fig
+
+    def draw_agregado(self, title=None, color_by='pureza', amostra=0, projecao='pca', arquivo=None):
+        """
+        Desenho agregado, adequado para grafos com muitos vértices. Cada componente é representado por um único marcador,
+        posicionado no centroide de seus vértices, com área proporcional à quantidade de vértices e cor dada pela pureza
+        ou pelo valor de k do componente. Arestas e índices não são desenhados.
+
+        As coordenadas são obtidas por uma projeção rápida (PCA ou projeção aleatória), ao invés do t-SNE.
+
+        :param title: Título do gráfico.
+        :type title: str
+        :param color_by: `'pureza'` ou `'k'`.
+        :type color_by: str
+        :param amostra: Quantidade máxima de vértices de cada componente desenhados ao redor do marcador.
+        :type amostra: int
+        :param projecao: `'pca'` ou `'aleatoria'`. Ignorado para dados 2D.
+        :type projecao: str
+        :param arquivo: Se definido, a figura é salva nesse arquivo e fechada, sem ser exibida.
+        :type arquivo: str
+        :return: Figura criada.
+        :rtype: matplotlib.figure.Figure
+        :raises ValueError: Se `color_by` ou `projecao` não forem reconhecidos.
+        """
+        if color_by not in ('pureza', 'k'):
+            raise ValueError(f'Não é possível colorir por {color_by}, use `pureza` ou `k`.')
+        cords = cache_coordenadas.obter(self.x, lambda x: self._calcular_projecao(x, projecao), projecao)
+
+        componentes = self.componentes
+        rotulos = np.empty(len(self.x.index), dtype=np.int64)
+        for i, componente in enumerate(componentes):
+            rotulos[self.x.index.get_indexer(list(componente))] = i
+        tamanhos = np.bincount(rotulos, minlength=len(componentes))
+        centroides = np.column_stack([np.bincount(rotulos, weights=cords[:, i]) / tamanhos for i in range(2)])
+        purezas, ks = self._pureza_e_k_componentes(componentes)
+        cores, cmap = (purezas, 'viridis') if color_by == 'pureza' else (ks, 'plasma')
+        vmin, vmax = (0, 1) if color_by == 'pureza' else (ks.min(), ks.max())
+
+        plt = _pyplot()
+        scala_fig = 2.5
+        fig = plt.figure(figsize=(6.4 * scala_fig, 4.8 * scala_fig))
+        ax = fig.gca()
+        if title is not None:
+            ax.set_title(title)
+
+        if amostra > 0:
+            # Sortear até `amostra` vértices de cada componente
+            ordem = np.random.permutation(len(rotulos))
+            ordem = ordem[np.argsort(rotulos[ordem], kind='stable')]
+            inicio_grupo = np.concatenate([[0], np.cumsum(tamanhos)[:-1]])
+            posicao_no_grupo = np.arange(len(ordem)) - inicio_grupo[rotulos[ordem]]
+            amostrados = ordem[posicao_no_grupo < amostra]
+            ax.scatter(cords[amostrados, 0], cords[amostrados, 1], c=cores[rotulos[amostrados]], cmap=cmap,
+                       vmin=vmin, vmax=vmax, s=4, alpha=0.5, zorder=1)
+
+        glifos = ax.scatter(centroides[:, 0], centroides[:, 1], c=cores, cmap=cmap, vmin=vmin, vmax=vmax,
+                            s=20 + 980 * tamanhos / tamanhos.max(), alpha=0.8, edgecolors='k', zorder=2)
+        fig.colorbar(glifos, ax=ax, label=color_by)
+
+        if arquivo is not None:
+            fig.savefig(arquivo)
+            plt.close(fig)
+        else:
+            plt.show()
+        return fig
+
+    @abstractmethod
+    def _pureza_e_k_componentes(self, componentes) -> (np.ndarray, np.ndarray):
+        """
+        Pureza e valor de k de cada componente, usados no desenho agregado.
+
+        :param componentes: Componentes do grafo.
+        :type componentes: List[FrozenSet[int]]
+        :return: Arrays com a pureza e o valor de k de cada componente.
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+        """
+        raise NotImplementedError
+
+    def _draw_edges(self, ax, cords):
+        """Desenha todas as arestas em uma única coleção."""
+        from matplotlib.collections import LineCollection
+
+        arestas = np.array(self.grafo.edges, dtype=object).reshape(-1, 2)
+        posicoes = self.x.index.get_indexer(arestas.ravel()).reshape(-1, 2)
+        ax.add_collection(LineCollection(cords[posicoes], colors='k', linewidths=1, zorder=1))
 
     def _draw_color_by_component(self, ax, cords):
         """Colorir os vértices de acordo com o componente conectado ao vértice."""
-        colors = list(range(len(self.componentes)))
+        plt = _pyplot()
+        componentes = self.componentes
+        colors = list(range(len(componentes)))
         shuffle(colors)
-        for i, componente in zip(colors, self.componentes):
-            vertices = componente
-
-            nx.draw(
-                self.grafo,
-                nodelist=vertices,
-                with_labels=True,
-                ax=ax,
-                pos=cords,
-                node_color=[i] * len(vertices),
-                cmap=plt.cm.get_cmap('hsv'),
-                vmin=0,
-                vmax=len(self.componentes),
-            )
-        plt.show()
-
-    def _draw_color_by_class(self, ax, cords, replace, scaller, y_unique):
+        cor_vertices = np.empty(len(self.x.index))
+        for i, componente in zip(colors, componentes):
+            cor_vertices[self.x.index.get_indexer(list(componente))] = i
+
+        ax.scatter(cords[:, 0], cords[:, 1], c=cor_vertices, cmap=plt.get_cmap('hsv'), vmin=0,
+                   vmax=len(componentes), s=300, zorder=2)
+
+    def _draw_color_by_class(self, ax, cords):
         """Colorir os vértices de acordo com a classe."""
-        # Iterar os vértices de cada classe
+        from matplotlib.lines import Line2D
+        from sklearn.preprocessing import MinMaxScaler
+
+        plt = _pyplot()
+        markers = [*Line2D.markers.keys()][3:-4]
+        y = self.y.to_numpy()
+        y_unique = self.y.unique()
+        replace = {k: v for k, v in zip(y_unique, cycle(markers))}
+        scaller = MinMaxScaler()
+        scaller.fit(np.arange(len(y_unique)).reshape(-1, 1))
+
+        # Uma coleção para cada classe, já que cada uma possui um marcador
         for i, classe in enumerate(y_unique):
-            vertices = self.data[self.data[ColunaYSingleton().NOME_COLUNA_Y] == classe].index
-            # color = scaller.transform(np.array([1]).reshape(1, -1))[0][0]
-
-            nx.draw(
-                self.grafo,
-                nodelist=vertices,
-                with_labels=True,
-                ax=ax,
-                pos=cords,
-                node_shape=replace[classe],
-                node_color=[i] * len(vertices),
-                cmap=plt.cm.get_cmap('plasma'),
-                vmin=scaller.data_min_[0],
-                vmax=scaller.data_max_[0],
-            )
-        plt.show()
-
-    def _get_coords(self, scale_coords=1):
-        """Obter coordenadas utilizando t-SNE, se necessário."""
-        if self.x.shape[1] == 2:
+            vertices = y == classe
+            ax.scatter(cords[vertices, 0], cords[vertices, 1], c=[i] * np.count_nonzero(vertices),
+                       marker=replace[classe], cmap=plt.get_cmap('plasma'), vmin=scaller.data_min_[0],
+                       vmax=scaller.data_max_[0], s=300, zorder=2)
+
+    def _draw_labels(self, ax, cords):
+        """Escreve o índice de cada vértice sobre sua posição."""
+        for (x, y), indice in zip(cords, self.x.index):
+            ax.text(x, y, str(indice), ha='center', va='center', fontsize=12, zorder=3)
+
+    def _get_coords(self, scale_coords=1) -> np.ndarray:
+        """
+        Obter coordenadas utilizando t-SNE, se necessário. As coordenadas são calculadas apenas uma vez para cada
+        conjunto de dados.
+
+        :return: Array (n, 2) com as coordenadas, na mesma ordem de `self.x`.
+        :rtype: numpy.ndarray
+        """
+        return cache_coordenadas.obter(self.x, self._calcular_coords) * scale_coords
+
+    @classmethod
+    def _calcular_coords(cls, x: pd.DataFrame) -> np.ndarray:
+        """Coordenadas dos pontos: os próprios atributos, para dados 2D, ou o t-SNE."""
+        if x.shape[1] == 2:
             # 2D, não precisa de t-SNE
-            cords = self.x.to_dict(orient='index')
-        else:
-            # Precisa de t-SNE
-            tsne_cords = self._get_tsne()
-            cords = tsne_cords.to_dict(orient='index')
+            return x.to_numpy(dtype=float)
+        # Precisa de t-SNE
+        return cls._get_tsne(x).to_numpy()
+
+    @staticmethod
+    def _calcular_projecao(x: pd.DataFrame, metodo: str) -> np.ndarray:
+        """
+        Projeção rápida dos pontos em 2D.
+
+        :raises ValueError: Se o método não for reconhecido.
+        """
+        from sklearn.decomposition import PCA
+        from sklearn.random_projection import GaussianRandomProjection
+
+        if x.shape[1] == 2:
+            return x.to_numpy(dtype=float)
+        if metodo == 'pca':
+            return PCA(n_components=2, svd_solver='randomized', random_state=0).fit_transform(x)
+        if metodo == 'aleatoria':
+            return GaussianRandomProjection(n_components=2, random_state=0).fit_transform(x)
+        raise ValueError(f'Projeção {metodo} desconhecida, use `pca` ou `aleatoria`.')
 
-        # Remover os dicionários internos e utilizar listas
-        for k, v in cords.items():
-            cords[k] = np.array([x for x in v.values()]) * scale_coords
-        return cords
+    @staticmethod
+    def _get_tsne(x: pd.DataFrame) -> pd.DataFrame:
+        from sklearn.manifold import TSNE
 
-    def _get_tsne(self):
         tsne = TSNE(init='pca', learning_rate='auto', n_jobs=-1)
-        tsne_cords = pd.DataFrame(tsne.fit_transform(self.x), index=self.x.index)
+        tsne_cords = pd.DataFrame(tsne.fit_transform(x), index=x.index)
         return tsne_cords
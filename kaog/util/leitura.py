@@ -0,0 +1,107 @@
+"""Leitura de conjuntos de dados em blocos, sem carregar todo o arquivo em memória."""
+import os
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def ler_em_blocos(caminho: str, tamanho_bloco: int = 100_000, colunas: Optional[list] = None) -> Iterator[pd.DataFrame]:
+    """
+    Lê um arquivo CSV ou Parquet em blocos de linhas. O formato é definido pela extensão do arquivo.
+
+    A leitura de arquivos Parquet depende do *pyarrow*, que é opcional.
+
+    :param caminho: Caminho do arquivo.
+    :type caminho: str
+    :param tamanho_bloco: Quantidade máxima de linhas em cada bloco.
+    :type tamanho_bloco: int
+    :param colunas: Colunas a serem lidas. Por padrão, todas.
+    :type colunas: list
+    :return: Gerador de DataFrames, um para cada bloco.
+    :rtype: Iterator[pandas.DataFrame]
+    :raises ImportError: Se o arquivo for Parquet e o *pyarrow* não estiver instalado.
+    """
+    if _eh_parquet(caminho):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError('A leitura de arquivos Parquet requer o pacote `pyarrow`.') from e
+        arquivo = pq.ParquetFile(caminho)
+        for batch in arquivo.iter_batches(batch_size=tamanho_bloco, columns=colunas):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(caminho, chunksize=tamanho_bloco, usecols=colunas)
+
+
+def contar_linhas(caminho: str, tamanho_bloco: int = 100_000) -> int:
+    """
+    Quantidade de linhas de um arquivo CSV ou Parquet. Em arquivos Parquet, é lida dos metadados; em CSV, apenas a
+    primeira coluna é lida, em blocos.
+
+    :param caminho: Caminho do arquivo.
+    :type caminho: str
+    :param tamanho_bloco: Quantidade máxima de linhas lidas por vez.
+    :type tamanho_bloco: int
+    :return: Quantidade de linhas, sem o cabeçalho.
+    :rtype: int
+    :raises ImportError: Se o arquivo for Parquet e o *pyarrow* não estiver instalado.
+    """
+    if _eh_parquet(caminho):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError('A leitura de arquivos Parquet requer o pacote `pyarrow`.') from e
+        return pq.ParquetFile(caminho).metadata.num_rows
+    return sum(len(bloco) for bloco in pd.read_csv(caminho, chunksize=tamanho_bloco, usecols=[0]))
+
+
+def ler_completo(caminho: str, tamanho_bloco: int = 100_000, n: Optional[int] = None) -> pd.DataFrame:
+    """
+    Lê um arquivo CSV ou Parquet inteiro, bloco a bloco, preenchendo colunas alocadas uma única vez com `n` linhas. Ao
+    contrário de concatenar os blocos, a memória máxima é a do resultado mais a de um bloco.
+
+    Colunas cujo tipo muda entre os blocos (por exemplo, inteiros seguidos de valores ausentes) são convertidas para o
+    tipo comum. Colunas com tipos do pandas, como `category`, são preenchidas como objetos e convertidas ao final.
+
+    :param caminho: Caminho do arquivo.
+    :type caminho: str
+    :param tamanho_bloco: Quantidade máxima de linhas lidas por vez.
+    :type tamanho_bloco: int
+    :param n: Quantidade de linhas do arquivo. Por padrão, obtida com :func:`contar_linhas`.
+    :type n: int
+    :return: Conteúdo do arquivo, com índice de 0 a n - 1.
+    :rtype: pandas.DataFrame
+    :raises ValueError: Se o arquivo tiver mais linhas do que `n`.
+    :raises ImportError: Se o arquivo for Parquet e o *pyarrow* não estiver instalado.
+    """
+    n = contar_linhas(caminho, tamanho_bloco) if n is None else n
+    colunas: Dict[str, np.ndarray] = {}
+    tipos_finais = {}
+    inicio = 0
+    for bloco in ler_em_blocos(caminho, tamanho_bloco):
+        fim = inicio + len(bloco)
+        if fim > n:
+            raise ValueError(f'O arquivo {caminho} tem mais do que as {n} linhas esperadas.')
+        if not colunas:
+            for nome, tipo in bloco.dtypes.items():
+                if not isinstance(tipo, np.dtype):
+                    tipos_finais[nome] = tipo
+                colunas[nome] = np.empty(n, dtype=tipo if isinstance(tipo, np.dtype) else object)
+        for nome, coluna in colunas.items():
+            valores = bloco[nome].to_numpy(dtype=None if nome not in tipos_finais else object)
+            tipo = np.result_type(coluna.dtype, valores.dtype)
+            if tipo != coluna.dtype:
+                coluna = colunas[nome] = coluna.astype(tipo)
+            coluna[inicio:fim] = valores
+        inicio = fim
+
+    data = pd.DataFrame({nome: coluna[:inicio] for nome, coluna in colunas.items()}, copy=False)
+    for nome, tipo in tipos_finais.items():
+        data[nome] = data[nome].astype('category' if isinstance(tipo, pd.CategoricalDtype) else tipo)
+    return data
+
+
+def _eh_parquet(caminho: str) -> bool:
+    """Verifica, pela extensão, se o arquivo é Parquet."""
+    return os.path.splitext(str(caminho))[1].lower() in ('.parquet', '.pq')
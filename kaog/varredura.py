@@ -0,0 +1,84 @@
+"""Execução concorrente do KAOG para várias configurações, como em uma busca de hiperparâmetros."""
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Hashable, Tuple
+
+import numpy as np
+import pandas as pd
+
+from kaog.distancias import Distancias
+from kaog.kaog import KAOG
+from kaog.util import ColunaYSingleton
+
+# Parâmetros que alteram os pontos sobre os quais as distâncias são calculadas; configurações que usam algum deles
+# calculam as próprias distâncias
+_PARAMETROS_DOS_PONTOS = ('reducao', 'prototipos', 'comprimir_duplicados')
+
+
+def varrer_configuracoes(data: pd.DataFrame, configuracoes: List[Dict[str, Any]], max_workers: int = None) -> List[KAOG]:
+    """
+    Cria um KAOG para cada configuração, em paralelo.
+
+    Cada configuração é um dicionário com os parâmetros nomeados de :class:`kaog.KAOG` (por exemplo, `metrica`,
+    `coluna_y`, `colunas_categoricas` e `modo_enxuto`). Configurações que resultam nos mesmos atributos, com a mesma
+    métrica, o mesmo algoritmo e a mesma precisão, compartilham um único objeto :class:`kaog.distancias.Distancias`,
+    calculado apenas uma vez. Configurações com `reducao`, `prototipos` ou `comprimir_duplicados` não compartilham
+    distâncias, já que elas são calculadas sobre os atributos reduzidos, apenas sobre os protótipos ou apenas sobre os
+    pontos distintos. Os `pesos` não alteram os pontos e não impedem o compartilhamento. Nenhuma coluna de classe usada
+    nas configurações é tratada como atributo: cada KAOG recebe apenas os atributos e a sua própria coluna de classe.
+
+    :param data: Conjunto de dados, contendo todas as colunas de classe usadas nas configurações.
+    :type data: pandas.DataFrame
+    :param configuracoes: Parâmetros de cada KAOG.
+    :type configuracoes: List[Dict[str, Any]]
+    :param max_workers: Quantidade máxima de threads. Por padrão, definida pelo `ThreadPoolExecutor`.
+    :type max_workers: int
+    :return: Um KAOG para cada configuração, na mesma ordem.
+    :rtype: List[KAOG]
+    """
+    colunas_y = pd.Index(list(dict.fromkeys(_coluna_y(configuracao) for configuracao in configuracoes)))
+    atributos = data.drop(columns=colunas_y)
+    chaves = [_chave_distancias(atributos, configuracao) if _compartilha_distancias(configuracao) else None
+              for configuracao in configuracoes]
+    primeira_configuracao = {}
+    for chave, configuracao in zip(chaves, configuracoes):
+        if chave is not None:
+            primeira_configuracao.setdefault(chave, configuracao)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # As distâncias são calculadas antes, evitando que as threads dos KAOG fiquem bloqueadas esperando por elas
+        futures = {chave: executor.submit(_calcular_distancias, atributos, configuracao)
+                   for chave, configuracao in primeira_configuracao.items()}
+        distancias = {chave: future.result() for chave, future in futures.items()}
+        distancias[None] = None
+
+        futures = [executor.submit(KAOG, data[list(atributos.columns) + [_coluna_y(configuracao)]],
+                                   distancias=distancias[chave], **configuracao)
+                   for chave, configuracao in zip(chaves, configuracoes)]
+        return [future.result() for future in futures]
+
+
+def _coluna_y(configuracao: Dict[str, Any]) -> Hashable:
+    """Nome da coluna de classe de uma configuração."""
+    return configuracao.get('coluna_y') or ColunaYSingleton().NOME_COLUNA_Y
+
+
+def _compartilha_distancias(configuracao: Dict[str, Any]) -> bool:
+    """Se a configuração calcula as distâncias sobre os próprios atributos, podendo compartilhá-las."""
+    return all(configuracao.get(parametro) is None or configuracao.get(parametro) is False
+               for parametro in _PARAMETROS_DOS_PONTOS)
+
+
+def _chave_distancias(atributos: pd.DataFrame, configuracao: Dict[str, Any]) -> Tuple[Hashable, ...]:
+    """Identifica as configurações que resultam nas mesmas distâncias."""
+    colunas = tuple(atributos.columns)
+    colunas_categoricas = tuple(configuracao.get('colunas_categoricas', pd.Index([])))
+    metrica = configuracao.get('metrica') or Distancias.METRIC
+    dtype = np.dtype(configuracao.get('dtype', np.float64))
+    return colunas, colunas_categoricas, metrica, configuracao.get('algoritmo', 'ball_tree'), dtype
+
+
+def _calcular_distancias(atributos: pd.DataFrame, configuracao: Dict[str, Any]) -> Distancias:
+    """Calcula as distâncias usadas por uma configuração, sobre os atributos sem nenhuma coluna de classe."""
+    return Distancias(atributos, configuracao.get('colunas_categoricas', pd.Index([])),
+                      configuracao.get('metrica'), configuracao.get('algoritmo', 'ball_tree'),
+                      configuracao.get('n_jobs', 1), configuracao.get('dtype', np.float64))
@@ -0,0 +1,25 @@
+# %%
+# Tempo de import do algoritmo, sem as dependências de desenho, comparado ao import com desenho.
+# Executar com: python main/benchmark_importacao.py
+import subprocess
+import sys
+
+COMANDOS = {
+    'kaog': 'import kaog',
+    'kaog + desenho': 'import kaog, matplotlib.pyplot, sklearn.manifold',
+}
+
+
+def tempo_import(codigo, repeticoes=5):
+    """Menor tempo acumulado, em segundos, reportado por `-X importtime` para os módulos importados em `codigo`."""
+    tempos = []
+    for _ in range(repeticoes):
+        saida = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo], capture_output=True, text=True)
+        linhas = [linha.split('|') for linha in saida.stderr.splitlines() if linha.startswith('import time:')]
+        # Módulos de nível superior (sem indentação) somam o tempo de seus imports
+        tempos.append(sum(int(cumulativo) for _, cumulativo, nome in linhas[1:] if not nome.startswith('  ')) / 1e6)
+    return min(tempos)
+
+
+for nome, codigo in COMANDOS.items():
+    print(f'{nome}: {tempo_import(codigo):.3f} s')
@@ -1,7 +1,10 @@
 from setuptools import setup
 
 with open("requirements.txt", "r") as fh:
-    requirements = fh.readlines()
+    requirements = [req.strip() for req in fh.readlines() if req[:2] != "# "]
+
+# Dependências usadas apenas no desenho dos grafos, instaladas com `pip install kaog[draw]`
+draw_requirements = [req for req in requirements if req.startswith('matplotlib')]
 
 setup(
     name='kaog',
@@ -9,6 +12,13 @@ setup(
     description='A module implementing KAOG',
     author='Ariel Tadeu da Silva',
     author_email='silva.ariel@icloud.com',
-    packages=['kaog'],
-    install_requires=[req.strip() for req in requirements if req[:2] != "# "],
+    packages=['kaog', 'kaog.util'],
+    install_requires=[req for req in requirements if req not in draw_requirements],
+    extras_require={
+        'draw': draw_requirements,
+        'parquet': ['pyarrow'],
+    },
+    entry_points={
+        'console_scripts': ['kaog = kaog.cli:main'],
+    },
 )
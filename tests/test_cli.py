@@ -0,0 +1,88 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+from sklearn.datasets import load_iris
+
+from kaog import KAOG
+from kaog.cli import main
+from kaog.util.leitura import ler_completo
+
+
+class CliTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        iris = load_iris()
+        x = pd.DataFrame(iris.data, columns=iris.feature_names)
+        x = x.drop(columns=['sepal width (cm)', 'petal length (cm)'])
+        y = pd.DataFrame(iris.target, columns=['classe'])
+        self.data = pd.concat([x, y], axis=1).drop_duplicates().reset_index(drop=True)
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.entrada = os.path.join(self.diretorio.name, 'treino.csv')
+        self.data.to_csv(self.entrada, index=False)
+        self.saida = os.path.join(self.diretorio.name, 'saida')
+
+    def tearDown(self) -> None:
+        self.diretorio.cleanup()
+
+    def _executar(self, *argv) -> int:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return main(list(argv))
+
+    def test_treinar(self):
+        codigo = self._executar('treinar', self.entrada, self.saida, '--coluna-y', 'classe', '--motor', 'vetorizado',
+                                '--tamanho-bloco', '40', '--formato', 'npz')
+        self.assertEqual(0, codigo)
+        with open(os.path.join(self.saida, 'relatorio.json')) as arquivo:
+            relatorio = json.load(arquivo)
+        self.assertEqual(len(self.data), relatorio['pontos'])
+        self.assertEqual({'leitura', 'ajuste', 'serializacao', 'exportacao'}, set(relatorio['tempos']))
+        for caminho in relatorio['arquivos'].values():
+            self.assertTrue(os.path.exists(caminho))
+
+        esperado = KAOG(self.data.copy(), coluna_y='classe')
+        modelo = KAOG.carregar(relatorio['arquivos']['modelo'])
+        self.assertEqual('vetorizado', modelo.motor)
+        self.assertEqual(set(esperado.grafo_otimo.edges), set(modelo.grafo_otimo.edges))
+
+    def test_classificar(self):
+        self._executar('fit', self.entrada, self.saida, '--coluna-y', 'classe', '--formato', 'npz')
+        modelo = os.path.join(self.saida, 'modelo.pkl')
+        saida = os.path.join(self.diretorio.name, 'classes.csv')
+        self.assertEqual(0, self._executar('predict', modelo, self.entrada, saida, '--tamanho-bloco', '25',
+                                           '--probabilidades'))
+
+        kaog = KAOG.carregar(modelo)
+        x = self.data.drop(columns='classe')
+        resultado = pd.read_csv(saida)
+        self.assertEqual(kaog.predict(x).tolist(), resultado['classe'].tolist())
+        proba = kaog.predict_proba(x)
+        pd.testing.assert_frame_equal(proba.reset_index(drop=True),
+                                      resultado[[str(c) for c in proba.columns]].set_axis(proba.columns, axis=1),
+                                      check_names=False)
+
+    def test_planejar(self):
+        with contextlib.redirect_stdout(io.StringIO()) as saida:
+            self.assertEqual(0, main(['planejar', self.entrada, '--coluna-y', 'classe', '--orcamento-memoria', '1G']))
+        self.assertIn('Estratégia: denso', saida.getvalue())
+
+        # O plano é feito antes de carregar o arquivo
+        with contextlib.redirect_stderr(io.StringIO()) as erros, \
+                mock.patch('kaog.cli.ler_completo', wraps=ler_completo) as leitura:
+            codigo = self._executar('treinar', self.entrada, self.saida, '--coluna-y', 'classe',
+                                    '--orcamento-memoria', '1K')
+        self.assertEqual(1, codigo)
+        self.assertIn('orçamento', erros.getvalue())
+        self.assertFalse(os.path.exists(os.path.join(self.saida, 'modelo.pkl')))
+        leitura.assert_not_called()
+
+        with mock.patch('kaog.cli.ler_completo', wraps=ler_completo) as leitura:
+            self.assertEqual(0, self._executar('treinar', self.entrada, self.saida, '--coluna-y', 'classe',
+                                               '--orcamento-memoria', '1G', '--tamanho-bloco', '40'))
+        # A quantidade de linhas obtida no planejamento é usada na alocação
+        leitura.assert_called_once_with(self.entrada, 40, len(self.data))
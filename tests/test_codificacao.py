@@ -0,0 +1,56 @@
+import pickle
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from kaog.distancias import Distancias
+from kaog.util.codificacao import CodificadorCategorico
+
+
+class CodificadorCategoricoTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.x = pd.DataFrame({
+            'a': [1.0, 2.0, 3.0, 4.0, 5.0],
+            'cor': ['azul', 'verde', 'azul', None, 'roxo'],
+            'tamanho': [3, 1, 3, 2, 1],
+        })
+        self.colunas = pd.Index(['cor', 'tamanho'])
+
+    def test_mesmos_codigos_do_factorize(self):
+        codificado = CodificadorCategorico(self.colunas).ajustar_transformar(self.x)
+        for coluna in self.colunas:
+            with self.subTest(coluna=coluna):
+                np.testing.assert_array_equal(pd.factorize(self.x[coluna])[0] + 1, codificado[coluna])
+        pd.testing.assert_series_equal(self.x['a'], codificado['a'])
+
+    def test_consultas(self):
+        codificador = CodificadorCategorico(self.colunas).ajustar(self.x)
+        consultas = pd.DataFrame({'a': [0.0, 0.0, 0.0], 'cor': ['roxo', 'amarelo', None], 'tamanho': [2, 7, 1]})
+        codificado = codificador.transformar(consultas)
+        self.assertEqual([3, 4, 0], codificado['cor'].tolist())
+        self.assertEqual([3, 4, 2], codificado['tamanho'].tolist())
+        self.assertEqual('roxo', consultas['cor'][0])
+
+    def test_nao_ajustado(self):
+        self.assertRaises(RuntimeError, CodificadorCategorico(self.colunas).transformar, self.x)
+        self.assertIs(self.x, CodificadorCategorico(pd.Index([])).transformar(self.x))
+
+    def test_serializacao(self):
+        codificador = pickle.loads(pickle.dumps(CodificadorCategorico(self.colunas).ajustar(self.x)))
+        pd.testing.assert_frame_equal(CodificadorCategorico(self.colunas).ajustar_transformar(self.x),
+                                      codificador.transformar(self.x))
+
+    def test_distancias_compartilham_codificador(self):
+        distancias = Distancias(self.x, self.colunas)
+        self.assertIs(distancias.codificador, distancias.truncado(2).codificador)
+        instancia = pd.Series({'a': 2.0, 'cor': 'verde', 'tamanho': 1}, name=10)
+        # A consulta é codificada com os códigos do treino, então o ponto idêntico é o vizinho mais próximo
+        self.assertEqual(1, distancias.k_vizinhos_mais_proximos_de(instancia, 1)[0])
+        _, vizinhos = distancias.vizinhos_de_consultas(instancia.to_frame().T, 1)
+        self.assertEqual(1, vizinhos[0, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import load_iris
+
+from kaog import KAOG
+from kaog.comite import ComiteKAOG
+from kaog.distancias import Distancias
+
+
+class ComiteKAOGTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        iris = load_iris()
+        data = pd.DataFrame(iris.data, columns=['a', 'b', 'c', 'd'])
+        data['target'] = iris.target
+        cls.data = data.drop_duplicates()
+        cls.consultas = cls.data.drop(columns='target').iloc[::10] + 0.05
+
+    def test_membros_iguais_a_kaog_independentes(self):
+        comite = ComiteKAOG(self.data, n_membros=3, fracao_linhas=0.6, random_state=0)
+        for membro, linhas, pesos in zip(comite.membros, comite.linhas_membros, comite.pesos_membros):
+            # As linhas sorteadas mais de uma vez são vértices com peso igual à quantidade de sorteios
+            self.assertEqual(round(0.6 * len(self.data)), pesos.sum())
+            np.testing.assert_array_equal(pesos, membro.multiplicidades.to_numpy())
+            repetidas = np.repeat(linhas, pesos)
+            esperado = KAOG(self.data.iloc[repetidas].reset_index(drop=True), motor='vetorizado',
+                            comprimir_duplicados=True)
+            self.assertEqual({tuple(self.data.index[repetidas[[a, b]]]) for a, b in esperado.grafo_otimo.edges},
+                             set(membro.grafo_otimo.edges))
+
+        comite = ComiteKAOG(self.data, n_membros=2, fracao_linhas=0.6, bootstrap=False, random_state=0)
+        self.assertEqual([None, None], comite.pesos_membros)
+        for membro, linhas in zip(comite.membros, comite.linhas_membros):
+            esperado = KAOG(self.data.iloc[linhas])
+            self.assertEqual(set(esperado.grafo_otimo.edges), set(membro.grafo_otimo.edges))
+
+    def test_distancias_calculadas_uma_vez(self):
+        with mock.patch('kaog.comite.Distancias', wraps=Distancias) as distancias:
+            ComiteKAOG(self.data, n_membros=5, random_state=0, motor='vetorizado')
+        self.assertEqual(1, distancias.call_count)
+
+    def test_amostragem_de_atributos(self):
+        comite = ComiteKAOG(self.data, n_membros=4, fracao_atributos=0.5, random_state=0, motor='vetorizado')
+        for membro, atributos in zip(comite.membros, comite.atributos_membros):
+            self.assertEqual(2, len(atributos))
+            self.assertEqual(list(atributos), list(membro.x.columns))
+
+    def test_predict_proba(self):
+        comite = ComiteKAOG(self.data, n_membros=5, bootstrap=False, fracao_linhas=0.8, random_state=0,
+                            motor='vetorizado')
+        probabilidades = comite.predict_proba(self.consultas)
+
+        esperado = sum(membro.predict_proba(self.consultas)[comite.classes] for membro in comite.membros) / 5
+        np.testing.assert_allclose(esperado.to_numpy(), probabilidades.to_numpy())
+        np.testing.assert_allclose(1, probabilidades.sum(axis=1))
+        self.assertEqual(list(self.consultas.index), list(comite.predict(self.consultas).index))
+
+    def test_fracao_invalida(self):
+        self.assertRaises(ValueError, ComiteKAOG, self.data, fracao_linhas=0)
+        self.assertRaises(ValueError, ComiteKAOG, self.data, fracao_atributos=1.5)
+        self.assertRaises(ValueError, ComiteKAOG, self.data, motor='referencia')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,13 @@
 import unittest
 from math import sqrt
+from unittest import mock
 
 import numpy as np
 import pandas as pd
+from scipy import sparse
 
 from kaog.distancias import Distancias
+from kaog.equivalencia import gerar_conjunto
 
 
 class DistanciasTest(unittest.TestCase):
@@ -82,6 +85,151 @@ class DistanciasTest(unittest.TestCase):
         distancia = instance.distancia_entre(0, 1)
         self.assertEqual(sqrt(1), distancia)
 
+    def test_dtype(self):
+        instance = Distancias(self.x, dtype=np.float32)
+        self.assertEqual(np.float32, instance.distancias.dtype)
+        self.assertEqual(np.int32, instance.vizinhos.dtype)
+        np.testing.assert_array_equal(Distancias(self.x).vizinhos, instance.vizinhos)
+        self.assertRaises(ValueError, Distancias, self.x, dtype=np.int64)
+
+    def test_blocos_em_paralelo(self):
+        rng = np.random.default_rng(0)
+        x = pd.DataFrame(rng.integers(0, 4, (60, 2)))
+        esperado = Distancias(x)
+        with mock.patch.object(Distancias, 'TAMANHO_BLOCO_CONSULTAS', 7):
+            for n_jobs in (1, 3, -1):
+                with self.subTest(n_jobs=n_jobs):
+                    instance = Distancias(x, n_jobs=n_jobs)
+                    np.testing.assert_array_equal(esperado.distancias, instance.distancias)
+                    np.testing.assert_array_equal(esperado.vizinhos, instance.vizinhos)
+                    self.assertFalse((instance.vizinhos == np.arange(len(x))[:, None]).any())
+
+    def test_subconjunto(self):
+        rng = np.random.default_rng(0)
+        x = pd.DataFrame(rng.integers(0, 4, (40, 2)), index=rng.permutation(100)[:40])
+        instance = Distancias(x)
+        posicoes = np.array([30, 2, 5, 11, 17, 39, 0, 23])
+        esperado = Distancias(x.iloc[np.sort(posicoes)])
+
+        subconjunto = instance.subconjunto(posicoes)
+        self.assertTrue(esperado.x.index.equals(subconjunto.x.index))
+        np.testing.assert_array_equal(esperado.vizinhos, subconjunto.vizinhos)
+        np.testing.assert_array_equal(esperado.distancias, subconjunto.distancias)
+        self.assertEqual(40, instance.vizinhos.shape[0])
+        self.assertRaises(ValueError, instance.subconjunto, [1, 1, 2])
+        self.assertRaises(ValueError, instance.truncado(3).subconjunto, posicoes)
+
+    def test_entrada_esparsa(self):
+        esperado = Distancias(self.x)
+        instance = Distancias(sparse.csr_matrix(self.x.to_numpy()), algoritmo='ball_tree')
+        self.assertEqual('brute', instance.algoritmo)
+        self.assertTrue(pd.RangeIndex(len(self.x)).equals(instance.indices))
+        np.testing.assert_array_equal(esperado.vizinhos, instance.vizinhos)
+        np.testing.assert_allclose(esperado.distancias, instance.distancias)
+        self.assertRaises(ValueError, Distancias, self.x.to_numpy(), pd.Index([0]))
+
+    def test_distancias_entre_pares(self):
+        x = self.x.set_index(self.x.index + 10)
+        for metrica in ('euclidean', 'manhattan', 'chebyshev', 'canberra', lambda a, b: np.abs(a - b).sum()):
+            with self.subTest(metrica=metrica):
+                instance = Distancias(x, metrica=metrica)
+                origem = np.repeat(np.arange(len(x)), len(x) - 1)
+                pares = instance.distancias_entre_pares(origem, instance.vizinhos.ravel(), posicoes=True)
+                np.testing.assert_allclose(instance.distancias.ravel(), pares, atol=1e-12)
+
+        instance = Distancias(x)
+        np.testing.assert_allclose([sqrt(1), sqrt(5)], instance.distancias_entre_pares([10, 13], [11, 16]))
+        self.assertAlmostEqual(sqrt(10), instance.distancia_entre(12, 16))
+        self.assertRaises(KeyError, instance.distancias_entre_pares, [0], [10])
+        self.assertRaises(ValueError, instance.distancias_entre_pares, [10, 11], [12])
+
+    def test_pre_calculadas(self):
+        esperado = Distancias(self.x)
+        vizinhos, distancias = esperado.vizinhos[:, :4].copy(), esperado.distancias[:, :4].copy()
+        # Empates em outra ordem são reordenados pelo índice do vizinho
+        vizinhos[0, :2] = vizinhos[0, 1::-1]
+        instance = Distancias.pre_calculadas(vizinhos, distancias, self.x)
+        np.testing.assert_array_equal(esperado.vizinhos[:, :4], instance.vizinhos)
+        np.testing.assert_array_equal(esperado.distancias[:, :4], instance.distancias)
+        self.assertTrue(self.x.index.equals(instance.indices))
+
+        sem_atributos = Distancias.pre_calculadas(vizinhos, distancias, indices=self.x.index + 10, dtype=np.float32)
+        self.assertTrue((self.x.index + 10).equals(sem_atributos.indices))
+        self.assertEqual(np.int32, sem_atributos.vizinhos.dtype)
+        self.assertRaises(ValueError, sem_atributos.vizinhos_de_consultas, self.x, 2)
+
+        invalidos = {
+            'formato': (vizinhos[:, :3], distancias),
+            'posicao': (np.where(vizinhos == 0, 7, vizinhos), distancias),
+            'proprio': (np.arange(7)[:, None].repeat(4, axis=1), distancias),
+            'repetido': (vizinhos[:, [0, 0, 1, 2]], distancias),
+            'negativa': (vizinhos, -distancias),
+            'ordem': (vizinhos, distancias[:, ::-1]),
+        }
+        for nome, (v, d) in invalidos.items():
+            with self.subTest(nome):
+                self.assertRaises(ValueError, Distancias.pre_calculadas, v, d)
+        self.assertRaises(ValueError, Distancias.pre_calculadas, vizinhos, distancias, self.x.iloc[:3])
+
+    def test_de_matriz_distancias(self):
+        from scipy.spatial.distance import cdist
+        from sklearn.neighbors import NearestNeighbors
+
+        esperado = Distancias(self.x)
+        instance = Distancias.de_matriz_distancias(cdist(self.x, self.x), self.x)
+        np.testing.assert_array_equal(esperado.vizinhos, instance.vizinhos)
+        np.testing.assert_allclose(esperado.distancias, instance.distancias)
+        truncado = Distancias.de_matriz_distancias(cdist(self.x, self.x), k=3)
+        np.testing.assert_array_equal(esperado.vizinhos[:, :3], truncado.vizinhos)
+
+        grafo = NearestNeighbors(n_neighbors=3).fit(self.x).kneighbors_graph(mode='distance')
+        esparsa = Distancias.de_matriz_distancias(grafo)
+        self.assertEqual((7, 3), esparsa.vizinhos.shape)
+        np.testing.assert_allclose(esperado.distancias[:, :3], esparsa.distancias)
+        self.assertRaises(ValueError, Distancias.de_matriz_distancias, grafo, k=4)
+        self.assertRaises(ValueError, Distancias.de_matriz_distancias, np.zeros((3, 4)))
+
+    def test_distancia_entre_sem_atributos(self):
+        from scipy.spatial.distance import cdist
+
+        esperado = Distancias(self.x)
+        a, b, c = self.x.index[[0, 3, 5]]
+        completos = {
+            'pre_calculadas': Distancias.pre_calculadas(esperado.vizinhos, esperado.distancias, indices=self.x.index),
+            'matriz': Distancias.de_matriz_distancias(cdist(self.x, self.x), indices=self.x.index, k=2),
+            'esparsa': Distancias.de_matriz_distancias(sparse.csr_matrix(cdist(self.x, self.x)),
+                                                       indices=self.x.index),
+        }
+        for nome, instance in completos.items():
+            with self.subTest(nome):
+                self.assertAlmostEqual(esperado.distancia_entre(a, b), instance.distancia_entre(a, b))
+                self.assertEqual(0, instance.distancia_entre(c, c))
+                np.testing.assert_allclose(esperado.distancias_entre_pares([a, b, c], [c, a, b]),
+                                           instance.distancias_entre_pares([a, b, c], [c, a, b]))
+
+        # Com apenas o vizinho mais próximo, os pares são procurados nas linhas dos dois pontos
+        truncado = Distancias.pre_calculadas(esperado.vizinhos[:, :1], esperado.distancias[:, :1])
+        origem, destino = 0, int(esperado.vizinhos[0, 0])
+        self.assertAlmostEqual(esperado.distancias[0, 0], truncado.distancia_entre(destino, origem))
+        distantes = [p for p in range(7) if p not in (truncado.vizinhos[0, 0], 0) and truncado.vizinhos[p, 0] != 0]
+        with self.assertRaisesRegex(ValueError, 'atributos'):
+            truncado.distancia_entre(0, distantes[0])
+
+    def test_vizinhos_de_consultas_empatados(self):
+        # Numa grade inteira, muitos pontos empatam com o k-ésimo vizinho; o resultado deve ser o da busca exata por
+        # distância e índice, qualquer que seja o algoritmo
+        k = 4
+        for semente in range(5):
+            x = gerar_conjunto(120, 2, 3, valores_distintos=5, random_state=semente).iloc[:, :2]
+            consultas = pd.DataFrame(np.random.default_rng(semente).integers(-1, 6, (40, 2)), columns=x.columns)
+            exatas = np.sqrt(((consultas.to_numpy()[:, None, :] - x.to_numpy()[None, :, :]) ** 2).sum(axis=2))
+            esperados = np.lexsort((np.broadcast_to(np.arange(len(x)), exatas.shape), exatas))[:, :k]
+            for algoritmo in ('ball_tree', 'kd_tree', 'brute'):
+                with self.subTest(semente=semente, algoritmo=algoritmo):
+                    distancias, vizinhos = Distancias(x, algoritmo=algoritmo).vizinhos_de_consultas(consultas, k)
+                    np.testing.assert_array_equal(esperados, vizinhos)
+                    np.testing.assert_allclose(np.take_along_axis(exatas, esperados, axis=1), distancias)
+
     def test_distancias_is_sorted(self):
         k, x = self.k, self.x.copy()
         instance = Distancias(x)
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import matplotlib
+import numpy as np
+import pandas as pd
+
+from kaog import KAOG
+from kaog.util import ColunaYSingleton
+from kaog.util.draw import DrawableGraph, cache_coordenadas
+
+matplotlib.use('Agg')
+
+
+class DrawableGraphTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        x = [
+            (-1, -1, 0),
+            (-2, -1, 1),
+            (-3, -2, 0),
+            (1, 1, 1),
+            (2, 1, 0),
+            (3, 2, 1),
+            (0, -1, 0),
+            (1, -3, 1),
+            (2, -2, 0),
+        ]
+        self.x = pd.DataFrame(x)
+        self.y = pd.Series([0, 0, 0, 1, 1, 1, 0, 0, 0], index=self.x.index, name=ColunaYSingleton().NOME_COLUNA_Y)
+        self.data = pd.concat([self.x, self.y], axis=1)
+        self.diretorio = tempfile.TemporaryDirectory()
+        cache_coordenadas.limpar()
+
+    def tearDown(self) -> None:
+        self.diretorio.cleanup()
+        cache_coordenadas.limpar()
+
+    def test_draw_arquivo(self):
+        instance = KAOG(self.data.drop(columns=2))
+        for color_by_component in (False, True):
+            with self.subTest(color_by_component=color_by_component):
+                arquivo = os.path.join(self.diretorio.name, f'{color_by_component}.png')
+                instance.draw(color_by_component=color_by_component, arquivo=arquivo)
+                self.assertTrue(os.path.isfile(arquivo))
+
+    def test_coordenadas_compartilhadas(self):
+        instance = KAOG(self.data.copy())
+        tsne = pd.DataFrame(np.random.rand(len(self.x), 2), index=self.x.index)
+        with mock.patch.object(DrawableGraph, '_get_tsne', return_value=tsne) as get_tsne:
+            coords = instance._get_coords()
+            for grafo in instance.grafos_associados.values():
+                np.testing.assert_array_equal(coords, grafo._get_coords())
+            self.assertEqual(1, get_tsne.call_count)
+
+            # Dados diferentes invalidam o cache
+            data = self.data.copy()
+            data.iloc[0, 0] = 10
+            KAOG(data)._get_coords()
+            self.assertEqual(2, get_tsne.call_count)
+
+    def test_draw_agregado(self):
+        instance = KAOG(self.data.copy())
+        with mock.patch.object(DrawableGraph, '_get_tsne') as get_tsne:
+            for grafo, color_by in ((instance, 'pureza'), (instance, 'k'), (instance.grafos_associados[2], 'k')):
+                with self.subTest(grafo=grafo, color_by=color_by):
+                    arquivo = os.path.join(self.diretorio.name, 'agregado.png')
+                    grafo.draw_agregado(color_by=color_by, amostra=2, arquivo=arquivo)
+                    self.assertTrue(os.path.isfile(arquivo))
+            get_tsne.assert_not_called()
+
+    def test_draw_agregado_invalido(self):
+        instance = KAOG(self.data.copy())
+        self.assertRaises(ValueError, instance.draw_agregado, color_by='classe')
+        self.assertRaises(ValueError, instance.draw_agregado, projecao='tsne')
+
+
+if __name__ == '__main__':
+    unittest.main()
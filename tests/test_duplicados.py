@@ -0,0 +1,130 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from kaog import KAOG
+from kaog.duplicados import agrupar_duplicados
+from kaog.kaog import probabilidades_bertini
+from kaog.util import ColunaYSingleton
+
+
+class DuplicadosTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        base = pd.DataFrame(rng.integers(0, 6, (60, 2)).astype(float), columns=['a', 'b'])
+        base[ColunaYSingleton().NOME_COLUNA_Y] = rng.integers(0, 2, len(base))
+        repeticoes = np.repeat(np.arange(len(base)), rng.integers(1, 4, len(base)))
+        self.data = base.iloc[rng.permutation(repeticoes)].reset_index(drop=True)
+        self.data.index = self.data.index * 2 + 1
+        self.x = self.data.drop(columns=ColunaYSingleton().NOME_COLUNA_Y)
+        self.y = self.data[ColunaYSingleton().NOME_COLUNA_Y]
+
+    def test_agrupar_duplicados(self):
+        representantes, grupos, multiplicidades = agrupar_duplicados(self.x, self.y)
+        unicos = self.data.drop_duplicates()
+        np.testing.assert_array_equal(self.data.index.get_indexer(unicos.index), representantes)
+        np.testing.assert_array_equal(np.arange(len(representantes)), grupos[representantes])
+        pd.testing.assert_frame_equal(self.data.iloc[representantes[grupos]].reset_index(drop=True),
+                                      self.data.reset_index(drop=True))
+        self.assertEqual(len(self.data), multiplicidades.sum())
+
+        matriz = agrupar_duplicados(self.x.to_numpy(), self.y.to_numpy())
+        for esperado, obtido in zip((representantes, grupos, multiplicidades), matriz):
+            np.testing.assert_array_equal(esperado, obtido)
+        self.assertRaises(ValueError, agrupar_duplicados, sparse.csr_matrix(self.x.to_numpy()), self.y)
+        self.assertRaises(ValueError, agrupar_duplicados, self.x, self.y[:3])
+
+    def test_sem_duplicados_igual_ao_vetorizado(self):
+        data = self.data.drop_duplicates()
+        esperado = KAOG(data.copy(), motor='vetorizado')
+        instance = KAOG(data.copy(), motor='vetorizado', comprimir_duplicados=True)
+        self.assertTrue((instance.multiplicidades == 1).all())
+        self.assertEqual(set(esperado.grafo_otimo.edges), set(instance.grafo_otimo.edges))
+        pd.testing.assert_frame_equal(esperado.predict_proba(data.iloc[:, :2]),
+                                      instance.predict_proba(data.iloc[:, :2]))
+
+    def test_comprimir_duplicados(self):
+        instance = KAOG(self.data.copy(), motor='vetorizado', comprimir_duplicados=True)
+        unicos = self.data.drop_duplicates()
+        self.assertTrue(unicos.index.equals(instance.data.index))
+        self.assertEqual(len(self.data), instance.multiplicidades.sum())
+        self.assertTrue(self.data.index.equals(instance.representantes.index))
+        pd.testing.assert_frame_equal(instance.data.loc[instance.representantes].set_axis(self.data.index),
+                                      self.data)
+
+        # Pureza ponderada: média do grau de saída ponderada pela multiplicidade, dividida por k
+        componentes = instance.componentes_vetorizados
+        graus_saida = pd.Series([instance.grafo_otimo.out_degree(v) for v in instance.y.index], index=instance.y.index)
+        for rotulo, k in enumerate(componentes.k):
+            vertices = instance.y.index[componentes.rotulos == rotulo]
+            pesos = instance.multiplicidades[vertices]
+            esperado = (graus_saida[vertices] * pesos).sum() / pesos.sum() / k
+            self.assertAlmostEqual(esperado, componentes.purezas[rotulo])
+            self.assertAlmostEqual(esperado, instance.grafo_otimo.pureza(frozenset(vertices)))
+
+        particionado = KAOG(self.data.copy(), motor='particionado', comprimir_duplicados=True)
+        self.assertEqual(set(instance.grafo_otimo.edges), set(particionado.grafo_otimo.edges))
+
+        componente = pd.Series(componentes.rotulos, index=instance.y.index)
+        originais = instance.para_indices_originais(componente)
+        self.assertTrue(self.data.index.equals(originais.index))
+        np.testing.assert_array_equal(componente[instance.representantes].to_numpy(), originais.to_numpy())
+
+        matriz = KAOG(self.x.to_numpy(), y=self.y.to_numpy(), motor='vetorizado', comprimir_duplicados=True)
+        self.assertEqual(set(instance.grafo_otimo.edges),
+                         {tuple(instance.y.index[[a, b]]) for a, b in matriz.grafo_otimo.edges})
+        self.assertRaises(ValueError, instance.reajustar_classes, instance.y.to_numpy())
+        self.assertRaises(ValueError, KAOG, self.data.copy(), comprimir_duplicados=True)
+
+    def test_pesos(self):
+        comprimido = KAOG(self.data.copy(), motor='vetorizado', comprimir_duplicados=True)
+        unicos = comprimido.data
+        contagens = comprimido.multiplicidades.to_numpy()
+        consultas = self.x.iloc[::7] + 0.25
+        for pesos in (contagens, pd.Series(contagens[::-1], index=unicos.index[::-1])):
+            with self.subTest(pesos=type(pesos).__name__):
+                instance = KAOG(unicos.copy(), motor='vetorizado', pesos=pesos)
+                pd.testing.assert_series_equal(comprimido.multiplicidades, instance.multiplicidades)
+                self.assertIsNone(instance.representantes)
+                self.assertEqual(set(comprimido.grafo_otimo.edges), set(instance.grafo_otimo.edges))
+                pd.testing.assert_frame_equal(comprimido.predict_proba(consultas), instance.predict_proba(consultas))
+
+        # Com a compressão, os pesos das linhas de cada grupo são somados
+        duplicado = KAOG(pd.concat([unicos, unicos]).reset_index(drop=True), motor='vetorizado',
+                         pesos=np.concatenate([contagens, np.ones_like(contagens)]), comprimir_duplicados=True)
+        np.testing.assert_array_equal(contagens + 1, duplicado.multiplicidades.to_numpy())
+
+        novas_classes = 1 - instance.y.to_numpy()
+        reajustado = instance.reajustar_classes(novas_classes)
+        pd.testing.assert_series_equal(instance.multiplicidades, reajustado.multiplicidades)
+        esperado = KAOG(unicos.assign(**{instance.coluna_y: novas_classes}), motor='vetorizado', pesos=pesos)
+        self.assertEqual(set(esperado.grafo_otimo.edges), set(reajustado.grafo_otimo.edges))
+
+        self.assertRaises(ValueError, KAOG, unicos.copy(), pesos=contagens)
+        for invalidos in (contagens[1:], np.where(contagens == 1, 0, contagens), contagens + 0.5):
+            self.assertRaises(ValueError, KAOG, unicos.copy(), motor='vetorizado', pesos=invalidos)
+
+    def test_predict_proba_com_multiplicidades(self):
+        """Cada vizinho ocupa tantas posições dentre os k vizinhos quanto a sua multiplicidade."""
+        x = pd.DataFrame({'a': [0.0, 0.0, 0.0, 1.0, 3.0, 3.0, 4.0, 4.0]})
+        y = pd.Series([0, 0, 0, 0, 1, 1, 1, 1], name=ColunaYSingleton().NOME_COLUNA_Y)
+        data = pd.concat([x, y], axis=1)
+        instance = KAOG(data.copy(), motor='vetorizado', comprimir_duplicados=True)
+        self.assertEqual([3, 1, 2, 2], instance.multiplicidades.tolist())
+        probabilidades = instance.predict_proba(pd.DataFrame({'a': [0.4, 3.6]}))
+        np.testing.assert_allclose([[1, 0], [0, 1]], probabilidades.to_numpy())
+        self.assertEqual([0, 1], instance.predict(pd.DataFrame({'a': [-1.0, 5.0]})).tolist())
+
+        argumentos = dict(vizinhos=np.array([[0, 1, 2]]), rotulos=np.array([0, 1, 1]), k_componentes=np.array([2, 2]),
+                          purezas=np.array([1.0, 1.0]), y=np.array([0, 1, 1]), n_classes=2)
+        np.testing.assert_allclose([[0.5, 0.5]], probabilidades_bertini(**argumentos))
+        # Com peso 2, o primeiro vizinho ocupa as duas posições do componente do segundo
+        np.testing.assert_allclose([[1, 0]], probabilidades_bertini(**argumentos, pesos=np.array([2, 1, 1])))
+        np.testing.assert_allclose([[0.5, 0.5]], probabilidades_bertini(**argumentos, pesos=np.array([1, 1, 5])))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+import numpy as np
+
+from kaog import KAOG
+from kaog.equivalencia import gerar_conjunto, comparar, verificar_caminhos, CAMINHOS_EXATOS, CAMINHOS_APROXIMADOS
+
+
+class EquivalenciaTest(unittest.TestCase):
+    # Diferenças esperadas dos caminhos aproximados, com folga, nos conjuntos de test_caminhos_exatos
+    TOLERANCIAS = {
+        'parada_por_classe': {'vizinhos': 0, 'arestas': 0.1, 'componentes': 0.1, 'k': 0.1, 'pureza': 0.01,
+                              'grafos_associados': 0},
+        'prototipos': {'arestas': 0.5, 'componentes': 0.7, 'k': 0.8, 'pureza': 1, 'grafos_associados': 0.7},
+        'reducao': {'vizinhos': 1, 'arestas': 0.8, 'componentes': 0.9, 'k': 0.8, 'pureza': 1,
+                    'grafos_associados': 0.8},
+        'duplicados': {'arestas': 0.8, 'componentes': 0.85, 'k': 0.85, 'pureza': 1, 'grafos_associados': 0.8},
+    }
+
+    def test_gerar_conjunto(self):
+        data = gerar_conjunto(80, 3, 4, valores_distintos=4, fracao_duplicatas=0.25, random_state=0)
+        self.assertEqual((80, 4), data.shape)
+        self.assertTrue(data.drop(columns='target').duplicated().any())
+        self.assertLessEqual(data['target'].nunique(), 4)
+        np.testing.assert_array_equal(data['x0'], np.round(data['x0']))
+
+    def test_caminhos_exatos(self):
+        """Com muitos empates e pontos duplicados, os caminhos exatos devem reproduzir a referência."""
+        for semente, (n, d) in enumerate([(70, 2), (60, 3)]):
+            data = gerar_conjunto(n, d, 3, random_state=semente)
+            diferencas = verificar_caminhos(data, random_state=semente)
+            self.assertEqual(set(CAMINHOS_EXATOS) | set(CAMINHOS_APROXIMADOS), set(diferencas))
+            for caminho in CAMINHOS_EXATOS:
+                with self.subTest(semente=semente, caminho=caminho):
+                    self.assertTrue(diferencas[caminho].equivalente, str(diferencas[caminho]))
+                    self.assertEqual(0, diferencas[caminho].vizinhos)
+            for caminho in CAMINHOS_APROXIMADOS:
+                with self.subTest(semente=semente, caminho=caminho):
+                    self.assertTrue(diferencas[caminho].dentro_da_tolerancia(**self.TOLERANCIAS[caminho]),
+                                    str(diferencas[caminho]))
+            # A parada por classe mantém os mesmos grafos k-associados
+            self.assertEqual(0, diferencas['parada_por_classe'].vizinhos)
+            self.assertEqual(0, diferencas['parada_por_classe'].grafos_associados)
+            # Uma tolerância menor que a diferença encontrada é rejeitada
+            apertadas = {**self.TOLERANCIAS['duplicados'], 'arestas': diferencas['duplicados'].arestas / 2}
+            self.assertFalse(diferencas['duplicados'].dentro_da_tolerancia(**apertadas))
+            self.assertFalse(diferencas['parada_por_classe'].dentro_da_tolerancia())
+
+    def test_diferencas_detectadas(self):
+        data = gerar_conjunto(50, 2, 2, random_state=1)
+        outra = data.copy()
+        outra['target'] = np.random.default_rng(0).permutation(outra['target'].to_numpy())
+        diferencas = comparar(KAOG(data.copy()), KAOG(outra), grafos_associados=True)
+        self.assertFalse(diferencas.equivalente)
+        self.assertEqual(0, diferencas.vizinhos)
+        self.assertGreater(diferencas.arestas, 0)
+        self.assertGreater(diferencas.grafos_associados, 0)
+        self.assertTrue(diferencas.dentro_da_tolerancia(arestas=1, componentes=1, k=1, pureza=1,
+                                                        grafos_associados=1))
+        self.assertRaises(ValueError, diferencas.dentro_da_tolerancia, outra_metrica=1)
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import load_iris
+
+from kaog import KAOG
+from kaog.exportacao import tabela_arestas, tabela_componentes, estatisticas_por_k, escrever_tabela, ler_tabela, \
+    exportar
+from kaog.fora_de_memoria import KAOGForaDeMemoria
+
+
+class ExportacaoTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        iris = load_iris()
+        x = pd.DataFrame(iris.data, columns=iris.feature_names)
+        x = x.drop(columns=['sepal width (cm)', 'petal length (cm)'])
+        y = pd.DataFrame(iris.target, columns=['target'])
+        cls.data = pd.concat([x, y], axis=1).drop_duplicates()
+        cls.kaog = KAOG(cls.data.copy())
+
+    def setUp(self) -> None:
+        self.diretorio = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.diretorio.cleanup()
+
+    def test_tabela_arestas(self):
+        tabela = tabela_arestas(self.kaog)
+        self.assertEqual(set(self.kaog.grafo_otimo.edges), set(zip(tabela['origem'], tabela['destino'])))
+        self.assertEqual(self.kaog.grafo_otimo.number_of_edges(), len(tabela))
+
+    def test_tabela_componentes(self):
+        tabela = tabela_componentes(self.kaog).set_index('vertice')
+        grafo = self.kaog.grafo_otimo
+        self.assertEqual(len(self.kaog.componentes), tabela['componente'].nunique())
+        for componente in self.kaog.componentes:
+            linhas = tabela.loc[list(componente)]
+            self.assertEqual(1, linhas['componente'].nunique())
+            self.assertTrue((linhas['k'] == grafo.obter_k_de_componente(componente)).all())
+            np.testing.assert_allclose(linhas['pureza'], grafo.pureza(componente))
+
+    def test_estatisticas_por_k(self):
+        tabela = estatisticas_por_k(self.kaog)
+        self.assertEqual(sorted(self.kaog.grafos_associados), tabela['k'].tolist())
+        for _, linha in tabela.iterrows():
+            k_associado = self.kaog.grafos_associados[linha['k']]
+            self.assertEqual(k_associado.grafo.number_of_edges(), linha['arestas'])
+            self.assertEqual(len(k_associado.componentes), linha['componentes'])
+            self.assertAlmostEqual(k_associado.media_grau_componentes() / linha['k'], linha['taxa'])
+
+    def test_estatisticas_por_k_com_pesos(self):
+        pesos = np.arange(len(self.data)) % 4 + 1
+        instance = KAOG(self.data.copy(), motor='vetorizado', pesos=pesos)
+        tabela = estatisticas_por_k(instance)
+        # As taxas são as ponderadas do treino, e não as do grafo sem pesos
+        np.testing.assert_allclose(instance.historico.taxas, tabela['taxa'])
+        self.assertFalse(np.allclose(estatisticas_por_k(self.kaog)['taxa'][:len(tabela)], tabela['taxa']))
+
+    def test_escrever_ler_npz(self):
+        tabela = tabela_componentes(self.kaog)
+        caminho = escrever_tabela(tabela, os.path.join(self.diretorio.name, 'componentes.parquet'), 'npz')
+        self.assertTrue(caminho.endswith('componentes.npz'))
+        pd.testing.assert_frame_equal(tabela, ler_tabela(caminho))
+
+    def test_formato_desconhecido(self):
+        self.assertRaises(ValueError, escrever_tabela, pd.DataFrame(), os.path.join(self.diretorio.name, 'a'), 'csv')
+
+    def test_exportar_fora_de_memoria(self):
+        caminho = os.path.join(self.diretorio.name, 'dados.csv')
+        self.data.to_csv(caminho, index=False)
+        instance = KAOGForaDeMemoria(caminho, k_max=20, diretorio=self.diretorio.name)
+
+        arquivos = exportar(instance, os.path.join(self.diretorio.name, 'saida'), 'npz')
+        self.assertEqual({'arestas', 'componentes', 'estatisticas_k'}, set(arquivos))
+        esperado = exportar(self.kaog, os.path.join(self.diretorio.name, 'esperado'), 'npz')
+        posicoes = pd.Series(np.arange(len(self.data)), index=self.data.index)
+        for nome in ('arestas', 'estatisticas_k'):
+            with self.subTest(tabela=nome):
+                tabela = ler_tabela(esperado[nome])
+                if nome == 'arestas':
+                    tabela = tabela.apply(lambda coluna: posicoes[coluna].to_numpy())
+                pd.testing.assert_frame_equal(tabela, ler_tabela(arquivos[nome]), check_dtype=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import load_iris
+
+from kaog import KAOG
+from kaog.fora_de_memoria import KAOGForaDeMemoria, _tamanho_bloco_vizinhos
+
+
+class KAOGForaDeMemoriaTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        iris = load_iris()
+        x = pd.DataFrame(iris.data, columns=iris.feature_names)
+        x = x.drop(columns=['sepal width (cm)', 'petal length (cm)'])
+        y = pd.DataFrame(iris.target, columns=['target'])
+        cls.data = pd.concat([x, y], axis=1).drop_duplicates()
+        cls.kaog = KAOG(cls.data.copy())
+
+    def setUp(self) -> None:
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self.diretorio.name, 'dados.csv')
+        self.data.to_csv(self.caminho, index=False)
+
+    def tearDown(self) -> None:
+        self.diretorio.cleanup()
+
+    def test_vizinhos(self):
+        instance = KAOGForaDeMemoria(self.caminho, k_max=10, orcamento_memoria=2 ** 14, tamanho_bloco=17,
+                                     diretorio=self.diretorio.name)
+        esperado = self.kaog.distancias_e_vizinhos
+        np.testing.assert_array_equal(esperado.vizinhos[:, :10], instance.vizinhos)
+        np.testing.assert_array_equal(esperado.distancias[:, :10], instance.distancias)
+
+    def test_grafo_otimo(self):
+        instance = KAOGForaDeMemoria(self.caminho, k_max=20, orcamento_memoria=2 ** 14, tamanho_bloco=17,
+                                     diretorio=self.diretorio.name)
+        self.assertTrue(instance.componentes_otimos.convergiu)
+        indices = self.data.index
+        esperado = self.kaog.grafo_otimo
+        grafo = instance.grafo_otimo
+
+        componentes = {frozenset(indices[list(c)]): grafo.obter_k_de_componente(c) for c in grafo.componentes}
+        self.assertEqual({c: esperado.obter_k_de_componente(c) for c in esperado.componentes}, componentes)
+        self.assertEqual(set(esperado.edges), {(indices[a], indices[b]) for a, b in grafo.edges})
+
+    def test_precisao_simples(self):
+        instance = KAOGForaDeMemoria(self.caminho, k_max=20, diretorio=self.diretorio.name, dtype=np.float32)
+        self.assertEqual(np.int32, instance.vizinhos.dtype)
+        self.assertEqual(np.float32, instance.distancias.dtype)
+        self.assertEqual(np.int32, instance.rotulos.dtype)
+        np.testing.assert_array_equal(self.kaog.distancias_e_vizinhos.vizinhos[:, :20], instance.vizinhos)
+        indices = self.data.index
+        self.assertEqual(set(self.kaog.grafo_otimo.edges),
+                         {(indices[a], indices[b]) for a, b in instance.grafo_otimo.edges})
+
+    def test_arquivo_vazio(self):
+        self.data.iloc[:0].to_csv(self.caminho, index=False)
+        self.assertRaises(ValueError, KAOGForaDeMemoria, self.caminho, diretorio=self.diretorio.name)
+
+    def test_tamanho_bloco_vizinhos(self):
+        orcamento = 2 ** 20
+        bloco = _tamanho_bloco_vizinhos(orcamento, 10, 4)
+        self.assertLessEqual(48 * bloco * (bloco + 10) + 16 * 4 * bloco, orcamento)
+        self.assertEqual(1, _tamanho_bloco_vizinhos(0, 10, 4))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_classification
+
+from kaog.distancias import Distancias
+from kaog.grafo_particionado import PARADAS, componentes_otimos_por_classe, medir_tempos
+from kaog.grafo_vetorizado import ComponentesOtimos
+
+
+def _componentes(componentes: ComponentesOtimos) -> list:
+    """Vértices, k e pureza de cada componente ótimo, independentemente da numeração dos rótulos."""
+    grupos = pd.Series(np.arange(len(componentes.rotulos))).groupby(np.asarray(componentes.rotulos))
+    return sorted((tuple(vertices), int(componentes.k[rotulo]), componentes.purezas[rotulo])
+                  for rotulo, vertices in grupos)
+
+
+class GrafoParticionadoTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.casos = []
+        for semente in range(3):
+            x, y = make_classification(200, 4, n_informative=3, n_redundant=0, n_classes=4, n_clusters_per_class=1,
+                                       flip_y=0.2, random_state=semente)
+            distancias = Distancias(pd.DataFrame(x), pd.Index([]), None, 'ball_tree', 1, np.float64)
+            cls.casos.append((distancias.vizinhos, y.astype(distancias.dtype_indices)))
+
+    def test_parada_global(self):
+        for i, (vizinhos, y) in enumerate(self.casos):
+            with self.subTest(caso=i):
+                esperado = ComponentesOtimos(vizinhos, y)
+                instance = componentes_otimos_por_classe(vizinhos, y, max_workers=2)
+                self.assertEqual(_componentes(esperado), _componentes(instance))
+                self.assertEqual((esperado.ultimo_k, esperado.convergiu), (instance.ultimo_k, instance.convergiu))
+                np.testing.assert_array_equal(esperado.historico.taxas, instance.historico.taxas)
+                for k_max in range(1, esperado.ultimo_k + 1):
+                    self.assertEqual(
+                        _componentes(ComponentesOtimos.de_historico(esperado.historico, k_max=k_max)),
+                        _componentes(ComponentesOtimos.de_historico(instance.historico, k_max=k_max)))
+
+    def test_colunas_iniciais(self):
+        # Com poucas colunas iniciais, as classes são continuadas várias vezes, com o mesmo resultado
+        vizinhos, y = self.casos[0]
+        for parada in PARADAS:
+            with self.subTest(parada=parada):
+                esperado = componentes_otimos_por_classe(vizinhos, y, parada, max_workers=2)
+                instance = componentes_otimos_por_classe(vizinhos, y, parada, max_workers=2, colunas_iniciais=1)
+                self.assertEqual(_componentes(esperado), _componentes(instance))
+                self.assertEqual((esperado.ultimo_k, esperado.convergiu), (instance.ultimo_k, instance.convergiu))
+
+    def test_medir_tempos(self):
+        vizinhos, y = self.casos[1]
+        tempos = medir_tempos(vizinhos, y, max_workers=2)
+        self.assertEqual(['vetorizado', 'particionado'], tempos['motor'].tolist())
+        self.assertTrue(tempos['iguais'].all())
+        self.assertEqual(1, tempos['ultimo_k'].nunique())
+        self.assertTrue((tempos['segundos'] > 0).all())
+
+    def test_parada_por_classe(self):
+        vizinhos, y = self.casos[0]
+        instance = componentes_otimos_por_classe(vizinhos, y, 'por_classe', max_workers=2)
+        self.assertIsNone(instance.historico)
+        for classe in np.unique(y):
+            posicoes = np.flatnonzero(y == classe)
+            # Os vizinhos de outras classes são trocados por um vértice fictício de outra classe
+            locais = np.full(len(y), len(posicoes))
+            locais[posicoes] = np.arange(len(posicoes))
+            y_classe = np.append(np.zeros(len(posicoes), dtype=y.dtype), 1)
+            esperado = ComponentesOtimos(locais[vizinhos[posicoes]], y_classe)
+            rotulos = instance.rotulos[posicoes]
+            self.assertEqual(len(esperado.k), len(np.unique(rotulos)))
+            self.assertEqual(sorted(esperado.k.tolist()), sorted(instance.k[np.unique(rotulos)].tolist()))
+
+    def test_parada_desconhecida(self):
+        vizinhos, y = self.casos[0]
+        self.assertRaises(ValueError, componentes_otimos_por_classe, vizinhos, y, 'outra')
@@ -0,0 +1,120 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from kaog import KAOG
+from kaog.grafo_vetorizado import GrafoKAssociadoVetorizado, ComponentesOtimos
+from kaog.k_associado import KAssociado
+from kaog.util import ColunaYSingleton
+
+
+class GrafoVetorizadoTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        x = [
+            (-1, -1),
+            (-2, -1),
+            (-3, -2),
+            (1, 1),
+            (2, 1),
+            (3, 2),
+            (0, -1),
+            (1, -3),
+            (2, -2),
+        ]
+        self.x = pd.DataFrame(x)
+        self.y = pd.Series([0, 0, 0, 1, 1, 1, 0, 0, 0], index=self.x.index, name=ColunaYSingleton().NOME_COLUNA_Y)
+        self.data = pd.concat([self.x, self.y], axis=1)
+
+    def test_grafo_k_associado(self):
+        for k in range(1, 5):
+            with self.subTest(k=k):
+                k_associado = KAssociado(k, self.data.copy())
+                vizinhos = k_associado.distancias.vizinhos
+                instance = GrafoKAssociadoVetorizado(vizinhos, self.y.to_numpy(), k)
+
+                arestas = set(zip(instance.origem.tolist(), instance.destino.tolist()))
+                self.assertEqual(set(k_associado.grafo.edges), arestas)
+                self.assertEqual(len(k_associado.componentes), instance.quantidade_componentes)
+                self.assertEqual(k_associado.media_grau_componentes() / k, instance.taxa)
+                for vertice in self.x.index:
+                    self.assertEqual(k_associado.pureza(vertice), instance.purezas[instance.rotulos[vertice]])
+
+    def test_componentes_otimos(self):
+        kaog = KAOG(self.data.copy())
+        vizinhos = kaog.distancias_e_vizinhos.vizinhos
+        instance = ComponentesOtimos(vizinhos, self.y.to_numpy())
+
+        self.assertTrue(instance.convergiu)
+        self.assertEqual(max(kaog.grafos_associados), instance.ultimo_k)
+        for componente in kaog.componentes:
+            with self.subTest(componente=componente):
+                rotulos = np.unique(instance.rotulos[list(componente)])
+                self.assertEqual(1, len(rotulos))
+                self.assertEqual(len(componente), np.count_nonzero(instance.rotulos == rotulos[0]))
+                self.assertEqual(kaog.grafo_otimo.obter_k_de_componente(componente), instance.k[rotulos[0]])
+                self.assertEqual(kaog.grafo_otimo.pureza(componente), instance.purezas[rotulos[0]])
+
+        origem, destino = instance.arestas(vizinhos, self.y.to_numpy())
+        self.assertEqual(set(kaog.grafo_otimo.edges), set(zip(origem.tolist(), destino.tolist())))
+
+    def test_k_max(self):
+        vizinhos = KAssociado(1, self.data.copy()).distancias.vizinhos
+        instance = ComponentesOtimos(vizinhos, self.y.to_numpy(), k_max=2)
+        self.assertEqual(2, instance.ultimo_k)
+        self.assertLessEqual(instance.k.max(), 2)
+
+    def test_historico(self):
+        kaog = KAOG(self.data.copy())
+        vizinhos = kaog.distancias_e_vizinhos.vizinhos
+        instance = ComponentesOtimos(vizinhos, self.y.to_numpy())
+        historico = instance.historico
+
+        self.assertEqual(instance.ultimo_k, historico.ultimo_k)
+        self.assertEqual(len(historico.pai), len(historico.k))
+        self.assertEqual(-1, historico.pai[-1])
+        # Cada nó, exceto os do último nível, está contido em um nó do nível seguinte
+        internos = historico.k < historico.ultimo_k
+        np.testing.assert_array_equal(historico.k[internos] + 1, historico.k[historico.pai[internos]])
+        # O motor de referência registra o mesmo histórico, possivelmente com outra numeração dos componentes
+        np.testing.assert_array_equal(kaog.historico.taxas, historico.taxas)
+        self.assertEqual(sorted(zip(kaog.historico.k, kaog.historico.purezas, kaog.historico.aceitos)),
+                         sorted(zip(historico.k, historico.purezas, historico.aceitos)))
+
+    def test_de_historico(self):
+        vizinhos = KAssociado(1, self.data.copy()).distancias.vizinhos
+        historico = ComponentesOtimos(vizinhos, self.y.to_numpy()).historico
+        for k_max in range(1, historico.ultimo_k + 1):
+            with self.subTest(k_max=k_max):
+                esperado = ComponentesOtimos(vizinhos, self.y.to_numpy(), k_max=k_max)
+                instance = ComponentesOtimos.de_historico(historico, k_max=k_max)
+                np.testing.assert_array_equal(esperado.rotulos, instance.rotulos)
+                np.testing.assert_array_equal(esperado.k, instance.k)
+                np.testing.assert_array_equal(esperado.purezas, instance.purezas)
+                self.assertEqual(esperado.convergiu, instance.convergiu)
+
+        instance = ComponentesOtimos.de_historico(historico, pureza_minima=1.1)
+        np.testing.assert_array_equal(historico.rotulos_iniciais, instance.rotulos)
+        self.assertTrue((instance.k == 1).all())
+
+    def test_continuar(self):
+        vizinhos = KAssociado(1, self.data.copy()).distancias.vizinhos
+        y = self.y.to_numpy()
+        esperado = ComponentesOtimos(vizinhos, y, parar_na_queda=False)
+        for parar_na_queda in (True, False):
+            with self.subTest(parar_na_queda=parar_na_queda):
+                instance = ComponentesOtimos(vizinhos, y, k_max=2, parar_na_queda=parar_na_queda)
+                instance.continuar(vizinhos, y, 5, parar_na_queda=False)
+                instance.continuar(vizinhos, y, vizinhos.shape[1])
+                self.assertEqual((esperado.ultimo_k, esperado.convergiu), (instance.ultimo_k, instance.convergiu))
+                np.testing.assert_array_equal(esperado.rotulos, instance.rotulos)
+                np.testing.assert_array_equal(esperado.k, instance.k)
+                np.testing.assert_array_equal(esperado.purezas, instance.purezas)
+                for atributo in ('pai', 'k', 'purezas', 'aceitos', 'taxas', 'rotulos_iniciais'):
+                    np.testing.assert_array_equal(getattr(esperado.historico, atributo),
+                                                  getattr(instance.historico, atributo))
+
+
+if __name__ == '__main__':
+    unittest.main()
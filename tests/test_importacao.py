@@ -0,0 +1,46 @@
+import json
+import subprocess
+import sys
+import unittest
+
+# Módulos de desenho que não devem ser carregados ao importar o algoritmo
+MODULOS_DESENHO = ['matplotlib', 'matplotlib.pyplot', 'sklearn.manifold']
+
+
+class ImportacaoTest(unittest.TestCase):
+
+    @staticmethod
+    def _executar(codigo: str) -> dict:
+        """Executa `codigo` em um novo interpretador, retornando os módulos de desenho carregados e o tempo de import."""
+        script = (
+            'import json, sys, time\n'
+            'inicio = time.perf_counter()\n'
+            f'{codigo}\n'
+            'tempo = time.perf_counter() - inicio\n'
+            f'print(json.dumps({{"modulos": [m for m in {MODULOS_DESENHO!r} if m in sys.modules], "tempo": tempo}}))\n'
+        )
+        saida = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+        return json.loads(saida.stdout.splitlines()[-1])
+
+    def test_import_sem_desenho(self):
+        resultado = self._executar('import kaog')
+        self.assertEqual([], resultado['modulos'])
+
+    def test_ajuste_sem_desenho(self):
+        resultado = self._executar(
+            'import pandas as pd\n'
+            'from kaog import KAOG\n'
+            'data = pd.DataFrame({"a": [0, 1, 2, 10, 11, 12], "target": [0, 0, 0, 1, 1, 1]})\n'
+            'KAOG(data)'
+        )
+        self.assertEqual([], resultado['modulos'])
+
+    def test_tempo_import(self):
+        """O import do algoritmo deve ser mais rápido que o import com as dependências de desenho."""
+        sem_desenho = min(self._executar('import kaog')['tempo'] for _ in range(2))
+        com_desenho = min(self._executar('import kaog, matplotlib.pyplot, sklearn.manifold')['tempo'] for _ in range(2))
+        self.assertLess(sem_desenho, com_desenho)
+
+
+if __name__ == '__main__':
+    unittest.main()
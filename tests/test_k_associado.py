@@ -85,6 +85,13 @@ class KAssociadoTest(unittest.TestCase):
         for idx, expec in expected.items():
             self.assertEqual(expec, instance.pureza(idx))
 
+    def test_pureza_e_k_componentes(self):
+        instance = self._create_new_instance()
+        componentes = list(instance.componentes)
+        purezas, ks = instance.pureza_e_k_componentes(componentes)
+        self.assertEqual([instance.pureza(c) for c in componentes], purezas.tolist())
+        self.assertEqual([instance.k] * len(componentes), ks.tolist())
+
     def test_media_grau_componentes(self):
         instance = self._create_new_instance()
         expected = 14
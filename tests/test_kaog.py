@@ -1,8 +1,13 @@
+import os
+import tempfile
 import unittest
 
 import pandas as pd
+from scipy import sparse
 
 from kaog import KAOG, KAssociado
+from kaog.distancias import Distancias
+from kaog.kaog import GrafosAssociadosSobDemanda
 from kaog.util import ColunaYSingleton
 
 
@@ -59,6 +64,105 @@ class KAOGTest(unittest.TestCase):
         expected = 7
         self.assertEqual(expected, taxa)
 
+    def test_distancias_compartilhadas(self):
+        instance = KAOG(self.data.copy())
+        for k_associado in instance.grafos_associados.values():
+            self.assertIs(instance.distancias_e_vizinhos, k_associado.distancias)
+
+    def test_modo_enxuto(self):
+        esperado = KAOG(self.data.copy())
+        instance = KAOG(self.data.copy(), modo_enxuto=True)
+
+        self.assertIsInstance(instance.grafos_associados, GrafosAssociadosSobDemanda)
+        self.assertEqual(list(esperado.grafos_associados), list(instance.grafos_associados))
+        self.assertEqual((len(self.data), max(esperado.grafos_associados)), instance.distancias_e_vizinhos.vizinhos.shape)
+        self.assertEqual(set(esperado.grafo_otimo.edges), set(instance.grafo_otimo.edges))
+        for k, k_associado in esperado.grafos_associados.items():
+            with self.subTest(k=k):
+                self.assertEqual(list(k_associado.grafo.edges), list(instance.grafos_associados[k].grafo.edges))
+        self.assertRaises(KeyError, instance.grafos_associados.__getitem__, max(esperado.grafos_associados) + 1)
+
+    def test_predict(self):
+        instance = KAOG(self.data.copy())
+        consultas = pd.DataFrame([(-2, -2), (2, 2), (1, -2)], index=[10, 11, 12])
+
+        probabilidades = instance.predict_proba(consultas)
+        self.assertEqual(list(consultas.index), list(probabilidades.index))
+        self.assertEqual({0, 1}, set(probabilidades.columns))
+        self.assertTrue((probabilidades.sum(axis=1) - 1).abs().lt(1e-12).all())
+        self.assertEqual([0, 1, 0], instance.predict(consultas).tolist())
+
+    def test_salvar_carregar(self):
+        instance = KAOG(self.data.copy())
+        consultas = pd.DataFrame([(-2, -2), (2, 2)])
+        with tempfile.TemporaryDirectory() as diretorio:
+            caminho = os.path.join(diretorio, 'modelo.pkl')
+            instance.salvar(caminho)
+            carregado = KAOG.carregar(caminho)
+        self.assertEqual(set(instance.grafo_otimo.edges), set(carregado.grafo_otimo.edges))
+        pd.testing.assert_frame_equal(instance.predict_proba(consultas), carregado.predict_proba(consultas))
+
+    def test_entrada_matriz(self):
+        esperado = KAOG(self.data.copy())
+        x = self.x.to_numpy()
+        for matriz in (x, sparse.csr_matrix(x)):
+            for motor in KAOG.MOTORES:
+                with self.subTest(tipo=type(matriz).__name__, motor=motor):
+                    instance = KAOG(matriz, y=self.y.to_numpy(), motor=motor)
+                    self.assertIs(matriz, instance.x)
+                    self.assertEqual(set(esperado.grafo_otimo.edges), set(instance.grafo_otimo.edges))
+                    self.assertEqual(esperado.predict(self.x).tolist(), instance.predict(matriz).tolist())
+        self.assertRaises(ValueError, KAOG, x)
+
+    def test_reconstruir_grafo_otimo(self):
+        for motor in KAOG.MOTORES:
+            with self.subTest(motor=motor):
+                instance = KAOG(self.data.copy(), motor=motor)
+                self.assertEqual(set(instance.grafo_otimo.edges), set(instance.reconstruir_grafo_otimo().edges))
+                grafo_1 = instance.reconstruir_grafo_otimo(k_max=1)
+                self.assertEqual(set(instance.grafos_associados[1].grafo.edges), set(grafo_1.edges))
+                self.assertEqual(1, max(grafo_1.obter_k_de_componente(c) for c in grafo_1.componentes))
+
+    def test_reajustar_classes(self):
+        novas_classes = [0, 1, 0, 1, 1, 1, 0, 0, 1]
+        data = self.data.copy()
+        data[self.y.name] = novas_classes
+        esperado = KAOG(data)
+
+        for motor in KAOG.MOTORES:
+            with self.subTest(motor=motor):
+                instance = KAOG(self.data.copy(), motor=motor)
+                reajustado = instance.reajustar_classes(pd.Series(novas_classes, index=self.y.index))
+                self.assertIs(instance.distancias_e_vizinhos, reajustado.distancias_e_vizinhos)
+                self.assertEqual(motor, reajustado.motor)
+                self.assertEqual(novas_classes, reajustado.y.tolist())
+                self.assertEqual(set(esperado.grafo_otimo.edges), set(reajustado.grafo_otimo.edges))
+                self.assertEqual(self.y.tolist(), instance.y.tolist())
+
+        instance = KAOG(self.x.to_numpy(), y=self.y.to_numpy())
+        lote = instance.reajustar_classes_em_lote([novas_classes, self.y.to_numpy()])
+        self.assertEqual(set(esperado.grafo_otimo.edges), set(lote[0].grafo_otimo.edges))
+        self.assertEqual(set(instance.grafo_otimo.edges), set(lote[1].grafo_otimo.edges))
+        self.assertRaises(ValueError, instance.reajustar_classes, [0, 1])
+        self.assertRaises(ValueError, KAOG(self.data.copy(), modo_enxuto=True).reajustar_classes, novas_classes)
+
+    def test_distancias_pre_calculadas(self):
+        esperado = KAOG(self.data.copy())
+        k = max(esperado.grafos_associados)
+        dist = esperado.distancias_e_vizinhos
+        pre_calculadas = Distancias.pre_calculadas(dist.vizinhos[:, :k], dist.distancias[:, :k], self.x)
+        for motor in KAOG.MOTORES:
+            with self.subTest(motor=motor):
+                instance = KAOG(self.data.copy(), motor=motor, distancias=pre_calculadas)
+                self.assertEqual(set(esperado.grafo_otimo.edges), set(instance.grafo_otimo.edges))
+                pd.testing.assert_frame_equal(esperado.predict_proba(self.x), instance.predict_proba(self.x))
+
+        # Com menos vizinhos, o algoritmo é interrompido no último k disponível
+        with self.assertLogs(level='WARNING'):
+            instance = KAOG(self.y.to_frame(), distancias=Distancias.pre_calculadas(dist.vizinhos[:, :1],
+                                                                                     dist.distancias[:, :1]))
+        self.assertEqual(1, max(instance.grafos_associados))
+
     def test_inserir_novo_componente_otimo(self):
         data = self.data.copy()
         instance = KAOG(self.data.copy())
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from kaog.util.leitura import contar_linhas, ler_completo, ler_em_blocos
+
+
+class LeituraTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self.diretorio.name, 'dados.csv')
+        # A coluna `b` só tem valores ausentes no último bloco, e `c` só tem texto a partir do segundo
+        self.data = pd.DataFrame({
+            'a': np.arange(10, dtype=float) / 4,
+            'b': [1, 2, 3, 4, 5, 6, 7, 8, None, 10],
+            'c': [1, 2, 3, 'x', 'y', 'z', 'x', 'y', 'z', 'x'],
+            'classe': [0, 1] * 5,
+        })
+        self.data.to_csv(self.caminho, index=False)
+
+    def tearDown(self) -> None:
+        self.diretorio.cleanup()
+
+    def test_contar_linhas(self):
+        for tamanho_bloco in (3, 100):
+            with self.subTest(tamanho_bloco=tamanho_bloco):
+                self.assertEqual(len(self.data), contar_linhas(self.caminho, tamanho_bloco))
+
+    def test_ler_completo(self):
+        for tamanho_bloco in (1, 3, 4, 100):
+            with self.subTest(tamanho_bloco=tamanho_bloco):
+                esperado = pd.concat(ler_em_blocos(self.caminho, tamanho_bloco), ignore_index=True)
+                instance = ler_completo(self.caminho, tamanho_bloco)
+                self.assertEqual(list(esperado.columns), list(instance.columns))
+                np.testing.assert_array_equal(esperado['a'].to_numpy(), instance['a'].to_numpy())
+                np.testing.assert_array_equal(esperado['b'].to_numpy(), instance['b'].to_numpy())
+                self.assertEqual([str(v) for v in esperado['c']], [str(v) for v in instance['c']])
+                np.testing.assert_array_equal(esperado['classe'].to_numpy(), instance['classe'].to_numpy())
+                self.assertTrue(pd.RangeIndex(len(self.data)).equals(instance.index))
+
+    def test_quantidade_de_linhas_informada(self):
+        instance = ler_completo(self.caminho, 4, n=len(self.data) + 5)
+        self.assertEqual(len(self.data), len(instance))
+        self.assertRaises(ValueError, ler_completo, self.caminho, 4, n=len(self.data) - 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
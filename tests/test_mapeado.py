@@ -0,0 +1,90 @@
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from kaog import KAOG
+from kaog.equivalencia import gerar_conjunto
+from kaog.mapeado import ModeloMapeado, PoolInferencia, medir_escalabilidade
+from kaog.reducao import ReducaoDimensionalidade
+from kaog.util import ColunaYSingleton
+
+
+class ModeloMapeadoTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.x = pd.DataFrame(rng.normal(size=(200, 2)), columns=['a', 'b'])
+        self.x['cor'] = rng.choice(['r', 'g', 'b'], len(self.x))
+        self.y = pd.Series(rng.integers(0, 3, len(self.x)), name=ColunaYSingleton().NOME_COLUNA_Y)
+        self.consultas = pd.DataFrame(rng.normal(size=(50, 2)), columns=['a', 'b'],
+                                      index=np.arange(50) + 100)
+        self.consultas['cor'] = rng.choice(['r', 'g', 'b'], len(self.consultas))
+        self.diretorio = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.diretorio.cleanup()
+
+    def test_predict_proba_igual_ao_modelo(self):
+        modelo = KAOG(pd.concat([self.x, self.y], axis=1), colunas_categoricas=pd.Index(['cor']))
+        mapeado = ModeloMapeado.salvar(modelo, self.diretorio.name)
+        self.assertIsInstance(mapeado.x, np.memmap)
+        pd.testing.assert_frame_equal(modelo.predict_proba(self.consultas), mapeado.predict_proba(self.consultas))
+        pd.testing.assert_series_equal(modelo.predict(self.consultas), mapeado.predict(self.consultas))
+
+    def test_matriz_e_reducao(self):
+        x = self.x[['a', 'b']].to_numpy()
+        consultas = self.consultas[['a', 'b']].to_numpy()
+        modelo = KAOG(x, y=self.y.to_numpy())
+        mapeado = ModeloMapeado.salvar(modelo, self.diretorio.name)
+        np.testing.assert_array_equal(modelo.predict_proba(consultas), mapeado.predict_proba(consultas))
+
+        modelo = KAOG(pd.concat([self.x[['a', 'b']], self.y], axis=1), reducao=ReducaoDimensionalidade('pca', 1))
+        mapeado = ModeloMapeado.salvar(modelo, self.diretorio.name)
+        consultas = self.consultas[['a', 'b']]
+        pd.testing.assert_frame_equal(modelo.predict_proba(consultas), mapeado.predict_proba(consultas))
+
+    def test_multiplicidades(self):
+        data = pd.concat([self.x, self.y], axis=1)
+        data = data.iloc[np.repeat(np.arange(len(data)), np.arange(len(data)) % 3 + 1)].reset_index(drop=True)
+        modelo = KAOG(data, colunas_categoricas=pd.Index(['cor']), motor='vetorizado', comprimir_duplicados=True)
+        mapeado = ModeloMapeado.salvar(modelo, self.diretorio.name)
+        np.testing.assert_array_equal(modelo.multiplicidades.to_numpy(), mapeado.pesos)
+        pd.testing.assert_frame_equal(modelo.predict_proba(self.consultas), mapeado.predict_proba(self.consultas))
+
+    def test_pool_inferencia(self):
+        modelo = KAOG(pd.concat([self.x, self.y], axis=1), colunas_categoricas=pd.Index(['cor']))
+        ModeloMapeado.salvar(modelo, self.diretorio.name)
+        with PoolInferencia(self.diretorio.name, processos=2, tamanho_bloco=16) as pool:
+            pd.testing.assert_frame_equal(modelo.predict_proba(self.consultas), pool.predict_proba(self.consultas))
+            pd.testing.assert_series_equal(modelo.predict(self.consultas), pool.predict(self.consultas))
+
+    def test_empates(self):
+        # Grade inteira com duplicatas: a busca exata do modelo mapeado deve desfazer os empates pelo índice, como a
+        # árvore padrão (ball_tree) do KAOG
+        for semente in range(3):
+            with self.subTest(semente=semente):
+                data = gerar_conjunto(120, 2, 3, valores_distintos=5, random_state=semente)
+                consultas = pd.DataFrame(np.random.default_rng(semente).integers(-1, 6, (40, 2)),
+                                         columns=data.columns[:2])
+                modelo = KAOG(data)
+                mapeado = ModeloMapeado.salvar(modelo, self.diretorio.name)
+                esperado = modelo.predict_proba(consultas)
+                pd.testing.assert_frame_equal(esperado, mapeado.predict_proba(consultas))
+                with PoolInferencia(self.diretorio.name, processos=2, tamanho_bloco=16) as pool:
+                    pd.testing.assert_frame_equal(esperado, pool.predict_proba(consultas))
+
+    def test_medir_escalabilidade(self):
+        ModeloMapeado.salvar(KAOG(pd.concat([self.x, self.y], axis=1), colunas_categoricas=pd.Index(['cor'])),
+                             self.diretorio.name)
+        resultado = medir_escalabilidade(self.diretorio.name, self.consultas, processos=(1, 2), tamanho_bloco=8)
+        self.assertEqual([1, 2], resultado['processos'].tolist())
+        self.assertTrue((resultado['processos_ativos'] <= resultado['processos']).all())
+        self.assertTrue((resultado['pontos_por_segundo'] > 0).all())
+        for coluna in ('rss_mib', 'rss_anonimo_mib', 'rss_arquivo_mib', 'pss_mib'):
+            self.assertIn(coluna, resultado.columns)
+
+
+if __name__ == '__main__':
+    unittest.main()
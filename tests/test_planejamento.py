@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import load_iris
+
+from kaog import KAOG, KAOGForaDeMemoria
+from kaog.planejamento import planejar, ajustar, estimar_memoria_denso, estimar_memoria_fora_de_memoria
+
+
+class PlanejamentoTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        iris = load_iris()
+        x = pd.DataFrame(iris.data, columns=iris.feature_names)
+        x = x.drop(columns=['sepal width (cm)', 'petal length (cm)'])
+        y = pd.DataFrame(iris.target, columns=['target'])
+        cls.data = pd.concat([x, y], axis=1).drop_duplicates().reset_index(drop=True)
+        cls.n, cls.d = len(cls.data), 2
+
+    def test_estimativas(self):
+        self.assertLess(estimar_memoria_denso(1000, 10, np.float32), estimar_memoria_denso(1000, 10))
+        self.assertLess(estimar_memoria_denso(1000, 10), estimar_memoria_denso(1000, 10, n_jobs=4))
+        self.assertLess(estimar_memoria_denso(1000, 10), estimar_memoria_denso(2000, 10))
+        memoria, disco = estimar_memoria_fora_de_memoria(10 ** 6, 10, 32, orcamento_bloco=2 ** 20)
+        self.assertLess(memoria, estimar_memoria_denso(10 ** 6, 10))
+        self.assertGreater(disco, 0)
+
+    def test_escolha_da_estrategia(self):
+        denso = estimar_memoria_denso(self.n, self.d, np.float64, 1)
+        denso_32 = estimar_memoria_denso(self.n, self.d, np.float32, 1)
+
+        plano = planejar(self.n, self.d, denso * 4, n_jobs=4)
+        self.assertEqual('denso', plano.estrategia)
+        self.assertFalse(plano.rebaixado)
+        self.assertGreater(plano.n_jobs, 1)
+        self.assertLessEqual(plano.memoria_estimada, denso * 4)
+
+        plano = planejar(self.n, self.d, denso, n_jobs=4)
+        self.assertEqual(('denso', 1), (plano.estrategia, plano.n_jobs))
+
+        plano = planejar(self.n, self.d, denso_32)
+        self.assertEqual(('denso_float32', np.dtype(np.float32)), (plano.estrategia, plano.dtype))
+        self.assertIn('denso_float32', str(plano))
+
+        memoria_fora, _ = estimar_memoria_fora_de_memoria(self.n, self.d, 32, orcamento_bloco=denso_32 // 4)
+        plano = planejar(self.n, self.d, denso_32 // 2)
+        self.assertEqual('fora_de_memoria', plano.estrategia)
+        self.assertLessEqual(memoria_fora, denso_32 // 2)
+
+        plano = planejar(10 ** 6, self.d, 2 ** 28)
+        self.assertEqual('prototipos', plano.estrategia)
+        self.assertLess(plano.fracao_prototipos, 1)
+        self.assertLessEqual(plano.memoria_estimada, 2 ** 28)
+
+        self.assertRaises(MemoryError, planejar, self.n, self.d, denso_32, rebaixar=False)
+        self.assertRaises(MemoryError, planejar, 10 ** 6, self.d, 2 ** 28, permitir_aproximacao=False)
+
+    def test_ajustar(self):
+        esperado = KAOG(self.data.copy())
+        denso_32 = estimar_memoria_denso(self.n, self.d, np.float32, 1)
+
+        modelo = ajustar(self.data, estimar_memoria_denso(self.n, self.d) * 2)
+        self.assertIsInstance(modelo, KAOG)
+        self.assertEqual(set(esperado.grafo_otimo.edges), set(modelo.grafo_otimo.edges))
+
+        with tempfile.TemporaryDirectory() as diretorio:
+            caminho = os.path.join(diretorio, 'dados.csv')
+            self.data.to_csv(caminho, index=False)
+            modelo = ajustar(caminho, denso_32 // 2, diretorio=os.path.join(diretorio, 'mmap'))
+            self.assertIsInstance(modelo, KAOGForaDeMemoria)
+            self.assertEqual(set(esperado.grafo_otimo.edges), set(modelo.grafo_otimo.edges))
+
+        plano = planejar(self.n, self.d, denso_32 // 2, permitir_aproximacao=True)
+        plano.estrategia, plano.fracao_prototipos = 'prototipos', 0.5
+        modelo = ajustar(self.data, plano=plano, random_state=0)
+        self.assertAlmostEqual(self.n * 0.5, len(modelo.data), delta=3)
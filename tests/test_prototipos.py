@@ -0,0 +1,77 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from kaog import KAOG
+from kaog.prototipos import SelecaoPrototipos, comparar_com_completo
+
+
+class SelecaoPrototiposTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        x = np.vstack([rng.normal(size=(60, 2)) - 3, rng.normal(size=(40, 2)) + 3])
+        self.data = pd.DataFrame(x, columns=['a', 'b'], index=rng.permutation(1000)[:100])
+        self.data['target'] = np.repeat([0, 1], [60, 40])
+
+    def test_amostragem(self):
+        prototipos = SelecaoPrototipos('amostragem', 0.1, random_state=0).selecionar(self.data)
+        self.assertEqual({0: 6, 1: 4}, prototipos['target'].value_counts().to_dict())
+        self.assertTrue(prototipos.index.isin(self.data.index).all())
+        self.assertTrue(self.data.loc[prototipos.index].equals(prototipos))
+
+    def test_kmeans(self):
+        prototipos = SelecaoPrototipos('kmeans', 0.1, random_state=0).selecionar(self.data)
+        self.assertEqual(list(self.data.columns), list(prototipos.columns))
+        self.assertEqual({0: 6, 1: 4}, prototipos['target'].value_counts().to_dict())
+        self.assertTrue((prototipos.loc[prototipos['target'] == 0, 'a'] < 0).all())
+
+    def test_cnn(self):
+        prototipos = SelecaoPrototipos('cnn', random_state=0).selecionar(self.data)
+        self.assertLess(len(prototipos), len(self.data))
+        # Todos os pontos são classificados corretamente pelo protótipo mais próximo
+        x, p = self.data[['a', 'b']].to_numpy(), prototipos[['a', 'b']].to_numpy()
+        mais_proximo = np.linalg.norm(x[:, None] - p[None], axis=2).argmin(axis=1)
+        np.testing.assert_array_equal(self.data['target'], prototipos['target'].to_numpy()[mais_proximo])
+
+    def test_cnn_metrica_e_categoricas(self):
+        data = self.data.copy()
+        data.insert(2, 'cor', np.where(data['target'] == 0, 'azul', 'verde'))
+        selecao = SelecaoPrototipos('cnn', random_state=0)
+        prototipos = selecao.selecionar(data, colunas_categoricas=pd.Index(['cor']), metrica='manhattan')
+        # O protótipo mais próximo, pela mesma métrica e codificação do KAOG, classifica todos os pontos corretamente
+        codigos = {'azul': 1, 'verde': 2}
+        x = data[['a', 'b']].assign(cor=data['cor'].map(codigos)).to_numpy()
+        p = prototipos[['a', 'b']].assign(cor=prototipos['cor'].map(codigos)).to_numpy()
+        mais_proximo = np.abs(x[:, None] - p[None]).sum(axis=2).argmin(axis=1)
+        np.testing.assert_array_equal(data['target'], prototipos['target'].to_numpy()[mais_proximo])
+
+        instance = KAOG(data, colunas_categoricas=pd.Index(['cor']), metrica='manhattan', prototipos=selecao,
+                        motor='vetorizado')
+        self.assertEqual(len(prototipos), len(instance.data))
+
+    def test_kaog_com_prototipos(self):
+        selecao = SelecaoPrototipos('amostragem', 0.3, random_state=0)
+        instance = KAOG(self.data, prototipos=selecao)
+        esperado = KAOG(selecao.selecionar(self.data))
+        self.assertEqual(30, len(instance.data))
+        self.assertEqual(set(esperado.grafo_otimo.edges), set(instance.grafo_otimo.edges))
+        self.assertEqual(self.data['target'].tolist(), instance.predict(self.data[['a', 'b']]).tolist())
+        self.assertRaises(ValueError, KAOG, self.data[['a', 'b']].to_numpy(), y=self.data['target'], prototipos=selecao)
+
+    def test_comparar_com_completo(self):
+        relatorio = comparar_com_completo(self.data, SelecaoPrototipos('amostragem', 0.5, random_state=0),
+                                          random_state=0, motor='vetorizado')
+        self.assertEqual(80, relatorio['pontos_treino'])
+        self.assertEqual(40, relatorio['prototipos'])
+        self.assertEqual(1, relatorio['acuracia_completo'])
+        self.assertAlmostEqual(relatorio['acuracia_prototipos'] - 1, relatorio['diferenca_acuracia'])
+
+    def test_parametros_invalidos(self):
+        self.assertRaises(ValueError, SelecaoPrototipos, 'medoides')
+        self.assertRaises(ValueError, SelecaoPrototipos, fracao=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from kaog import KAOG
+from kaog.distancias import Distancias
+from kaog.reducao import ReducaoDimensionalidade
+
+
+class ReducaoDimensionalidadeTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        latentes = np.vstack([rng.normal(size=(30, 3)) + 4, rng.normal(size=(30, 3)) - 4])
+        self.x = pd.DataFrame(latentes @ rng.normal(size=(3, 40)), index=rng.permutation(1000)[:60])
+        self.y = pd.Series(np.repeat([0, 1], 30), index=self.x.index, name='target')
+        self.data = pd.concat([self.x, self.y], axis=1)
+
+    def test_metodos(self):
+        for metodo, componentes, dimensao in (('pca', 3, 3), ('pca', 0.999, 3), ('svd', 5, 5), ('projecao', 8, 8)):
+            with self.subTest(metodo=metodo, componentes=componentes):
+                reducao = ReducaoDimensionalidade(metodo, componentes, random_state=0)
+                reduzido = reducao.ajustar_transformar(self.x.to_numpy())
+                self.assertEqual((60, dimensao), reduzido.shape)
+                self.assertEqual(dimensao, reducao.dimensao)
+                np.testing.assert_allclose(reduzido, reducao.transformar(self.x.to_numpy()), atol=1e-8)
+
+    def test_parametros_invalidos(self):
+        self.assertRaises(ValueError, ReducaoDimensionalidade, 'lda')
+        self.assertRaises(ValueError, ReducaoDimensionalidade, 'svd', 0.9)
+        self.assertRaises(RuntimeError, ReducaoDimensionalidade().transformar, self.x.to_numpy())
+        self.assertRaises(ValueError, ReducaoDimensionalidade('pca', 2).ajustar_transformar,
+                          sparse.csr_matrix(self.x.to_numpy()))
+
+    def test_kaog_com_reducao(self):
+        reducao = ReducaoDimensionalidade('pca', 3)
+        instance = KAOG(self.data.copy(), reducao=reducao)
+        self.assertEqual(list(range(3)), list(instance.distancias_e_vizinhos.x.columns))
+        self.assertTrue(instance.distancias_e_vizinhos.indices.equals(self.x.index))
+
+        esperado = Distancias(pd.DataFrame(reducao.transformar(self.x.to_numpy()), index=self.x.index))
+        np.testing.assert_array_equal(esperado.vizinhos, instance.distancias_e_vizinhos.vizinhos)
+
+        consultas = self.x.iloc[:5] + 0.01
+        self.assertEqual(self.y.iloc[:5].tolist(), instance.predict(consultas).tolist())
+        self.assertTrue(consultas.index.equals(instance.predict_proba(consultas).index))
+
+    def test_alteracao_vizinhos(self):
+        instance = KAOG(self.data.copy(), reducao=ReducaoDimensionalidade('pca', 3), motor='vetorizado')
+        alteracao = instance.alteracao_vizinhos(k=5, amostra=20, random_state=0)
+        self.assertEqual({'recall_medio', 'recall_minimo', 'pontos_inalterados'}, set(alteracao))
+        # Os dados têm apenas três dimensões latentes, então os vizinhos são preservados
+        self.assertAlmostEqual(1, alteracao['recall_medio'])
+        self.assertRaises(RuntimeError, KAOG(self.data.copy()).alteracao_vizinhos)
+
+
+if __name__ == '__main__':
+    unittest.main()
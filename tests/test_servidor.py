@@ -0,0 +1,68 @@
+import asyncio
+import unittest
+
+import pandas as pd
+
+from kaog import KAOG
+from kaog.servidor import ServidorPredicao
+from kaog.util import ColunaYSingleton
+
+
+class ServidorPredicaoTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        x = pd.DataFrame([(-1, -1), (-2, -1), (-3, -2), (1, 1), (2, 1), (3, 2), (0, -1), (1, -3), (2, -2)])
+        y = pd.Series([0, 0, 0, 1, 1, 1, 0, 0, 0], index=x.index, name=ColunaYSingleton().NOME_COLUNA_Y)
+        self.modelo = KAOG(pd.concat([x, y], axis=1))
+        self.consultas = pd.DataFrame([(-2, -2), (2, 2), (1, -2), (3, 3), (-1, 0)])
+
+    def test_resultados_iguais_ao_modelo(self):
+        esperado = self.modelo.predict(self.consultas)
+
+        async def executar():
+            async with ServidorPredicao(self.modelo, janela=0.05) as servidor:
+                classes = await asyncio.gather(*(servidor.classificar(ponto) for _, ponto in self.consultas.iterrows()))
+                return classes, servidor.metricas()
+
+        classes, metricas = asyncio.run(executar())
+        self.assertEqual(esperado.tolist(), list(classes))
+        self.assertEqual(len(self.consultas), metricas['requisicoes'])
+        self.assertEqual(1, metricas['lotes'])
+        self.assertEqual(len(self.consultas), metricas['tamanho_maximo_lote'])
+
+    def test_tamanho_maximo_lote(self):
+        async def executar():
+            async with ServidorPredicao(self.modelo, janela=0.05, tamanho_maximo_lote=2) as servidor:
+                await asyncio.gather(*(servidor.predict_proba(dict(ponto)) for _, ponto in self.consultas.iterrows()))
+                return servidor.metricas()
+
+        metricas = asyncio.run(executar())
+        self.assertEqual(3, metricas['lotes'])
+        self.assertEqual(2, metricas['tamanho_maximo_lote'])
+
+    def test_requisicao_com_varios_pontos(self):
+        async def executar():
+            async with ServidorPredicao(self.modelo) as servidor:
+                return await servidor.predict_proba(self.consultas.set_index(self.consultas.index + 100))
+
+        probabilidades = asyncio.run(executar())
+        esperado = self.modelo.predict_proba(self.consultas)
+        self.assertEqual(list(self.consultas.index + 100), list(probabilidades.index))
+        self.assertTrue((esperado.to_numpy() == probabilidades.to_numpy()).all())
+
+    def test_erro_propagado(self):
+        async def executar():
+            async with ServidorPredicao(self.modelo) as servidor:
+                with self.assertRaises(Exception):
+                    await servidor.predict_proba(pd.DataFrame({'a': ['x']}))
+                return servidor.metricas()
+
+        self.assertEqual(1, asyncio.run(executar())['erros'])
+
+    def test_servidor_nao_iniciado(self):
+        servidor = ServidorPredicao(self.modelo)
+        self.assertRaises(RuntimeError, asyncio.run, servidor.predict_proba(self.consultas))
+
+
+if __name__ == '__main__':
+    unittest.main()
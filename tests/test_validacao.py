@@ -1,5 +1,6 @@
 import unittest
 
+import numpy as np
 import pandas as pd
 from sklearn.datasets import load_iris
 
@@ -20,6 +21,7 @@ class ValidacaoTest(unittest.TestCase):
         data = pd.concat([x, y], axis=1)
         data = data.drop_duplicates()
 
+        self.data = data
         self.kaog = KAOG(data)
 
     def test_k1(self):
@@ -69,6 +71,34 @@ class ValidacaoTest(unittest.TestCase):
         self.assertEqual(pureza_15, otimo.pureza(comp_15))
         self.assertEqual(k_comp_15, otimo.obter_k_de_componente(comp_15))
 
+    def test_precisao_simples(self):
+        """Com float32, os vizinhos e desempates devem ser os mesmos da precisão dupla."""
+        for motor in KAOG.MOTORES:
+            with self.subTest(motor=motor):
+                kaog = KAOG(self.data, dtype=np.float32, motor=motor)
+                dist = kaog.distancias_e_vizinhos
+                self.assertEqual(np.float32, dist.distancias.dtype)
+                self.assertEqual(np.int32, dist.vizinhos.dtype)
+                np.testing.assert_array_equal(self.kaog.distancias_e_vizinhos.vizinhos, dist.vizinhos)
+
+                otimo = kaog.grafo_otimo
+                self.assertEqual(set(self.kaog.grafo_otimo.edges), set(otimo.edges))
+                for componente in self.kaog.componentes:
+                    self.assertEqual(self.kaog.grafo_otimo.obter_k_de_componente(componente),
+                                     otimo.obter_k_de_componente(componente))
+
+    def test_motor_vetorizado(self):
+        kaog = KAOG(self.data, motor='vetorizado')
+        self.assertEqual(np.int64, kaog.componentes_vetorizados.rotulos.dtype)
+        self.assertEqual(set(self.kaog.grafo_otimo.edges), set(kaog.grafo_otimo.edges))
+        self.assertEqual(sorted(self.kaog.grafos_associados), sorted(kaog.grafos_associados))
+        for componente in self.kaog.componentes:
+            with self.subTest(componente=componente):
+                self.assertEqual(self.kaog.grafo_otimo.obter_k_de_componente(componente),
+                                 kaog.grafo_otimo.obter_k_de_componente(componente))
+                self.assertEqual(self.kaog.grafo_otimo.pureza(componente), kaog.grafo_otimo.pureza(componente))
+        self.assertEqual(list(self.kaog.grafos_associados[1].grafo.edges), list(kaog.grafos_associados[1].grafo.edges))
+
 
 if __name__ == '__main__':
     unittest.main()
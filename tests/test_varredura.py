@@ -0,0 +1,102 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from kaog import KAOG
+from kaog.prototipos import SelecaoPrototipos
+from kaog.reducao import ReducaoDimensionalidade
+from kaog.varredura import varrer_configuracoes
+
+
+class VarreduraTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        x = [
+            (-1, -1),
+            (-2, -1),
+            (-3, -2),
+            (1, 1),
+            (2, 1),
+            (3, 2),
+            (0, -1),
+            (1, -3),
+            (2, -2),
+        ]
+        self.data = pd.DataFrame(x, columns=['a', 'b'])
+        self.data['classe'] = [0, 0, 0, 1, 1, 1, 0, 0, 0]
+
+    def test_varrer_configuracoes(self):
+        configuracoes = [
+            {'coluna_y': 'classe'},
+            {'coluna_y': 'classe', 'metrica': 'manhattan'},
+            {'coluna_y': 'classe', 'n_jobs': 2},
+            {'coluna_y': 'classe', 'metrica': 'chebyshev', 'modo_enxuto': True},
+        ]
+        resultados = varrer_configuracoes(self.data, configuracoes, max_workers=4)
+
+        self.assertEqual(len(configuracoes), len(resultados))
+        for configuracao, kaog in zip(configuracoes, resultados):
+            with self.subTest(configuracao=configuracao):
+                esperado = KAOG(self.data.copy(), **configuracao)
+                self.assertEqual(set(esperado.grafo_otimo.edges), set(kaog.grafo_otimo.edges))
+                self.assertEqual(esperado.distancias_e_vizinhos.metrica, kaog.distancias_e_vizinhos.metrica)
+
+        # Mesma métrica e mesmos atributos compartilham as distâncias
+        self.assertIs(resultados[0].distancias_e_vizinhos, resultados[2].grafos_associados[1].distancias)
+        self.assertIsNot(resultados[0].distancias_e_vizinhos, resultados[1].distancias_e_vizinhos)
+
+    def test_varias_colunas_de_classe(self):
+        data = self.data.rename(columns={'classe': 'c1'})
+        data['c2'] = [1, 0, 0, 1, 1, 0, 0, 1, 0]
+        configuracoes = [{'coluna_y': 'c1'}, {'coluna_y': 'c2'}, {'coluna_y': 'c1', 'metrica': 'manhattan'}]
+        resultados = varrer_configuracoes(data, configuracoes, max_workers=2)
+
+        for configuracao, kaog in zip(configuracoes, resultados):
+            with self.subTest(configuracao=configuracao):
+                self.assertEqual(['a', 'b'], list(kaog.x.columns))
+                pd.testing.assert_series_equal(data[configuracao['coluna_y']], kaog.y)
+                esperado = KAOG(data.drop(columns={'c1', 'c2'} - {configuracao['coluna_y']}), **configuracao)
+                self.assertEqual(set(esperado.grafo_otimo.edges), set(kaog.grafo_otimo.edges))
+
+        # As colunas de classe não fazem parte dos atributos, então c1 e c2 compartilham as distâncias
+        self.assertIs(resultados[0].distancias_e_vizinhos, resultados[1].distancias_e_vizinhos)
+        self.assertIsNot(resultados[0].distancias_e_vizinhos, resultados[2].distancias_e_vizinhos)
+
+    def test_parametros_dos_pontos(self):
+        # Configurações que alteram os pontos calculam as próprias distâncias, em vez de usar as dos atributos originais
+        data = pd.concat([self.data, self.data.iloc[:3]], ignore_index=True)
+        vetorizado = {'coluna_y': 'classe', 'motor': 'vetorizado'}
+        configuracoes = {
+            'reducao': lambda: {'coluna_y': 'classe', 'reducao': ReducaoDimensionalidade('pca', 1)},
+            'prototipos': lambda: {'coluna_y': 'classe', 'prototipos': SelecaoPrototipos('amostragem', 0.7, 0)},
+            'comprimir_duplicados': lambda: {**vetorizado, 'comprimir_duplicados': True},
+            'pesos_comprimidos': lambda: {**vetorizado, 'comprimir_duplicados': True,
+                                          'pesos': np.arange(len(data)) % 3 + 1},
+        }
+        resultados = varrer_configuracoes(data, [{'coluna_y': 'classe'}] + [c() for c in configuracoes.values()])
+        for (nome, configuracao), kaog in zip(configuracoes.items(), resultados[1:]):
+            with self.subTest(nome):
+                esperado = KAOG(data.copy(), **configuracao())
+                self.assertEqual(set(esperado.grafo_otimo.edges), set(kaog.grafo_otimo.edges))
+                np.testing.assert_allclose(esperado.distancias_e_vizinhos.distancias,
+                                           kaog.distancias_e_vizinhos.distancias)
+                self.assertIsNot(resultados[0].distancias_e_vizinhos, kaog.distancias_e_vizinhos)
+
+    def test_pesos_compartilham_distancias(self):
+        # Os pesos não alteram os pontos, então as distâncias continuam compartilhadas
+        configuracao = {'coluna_y': 'classe', 'motor': 'vetorizado', 'pesos': np.arange(len(self.data)) % 3 + 1}
+        resultados = varrer_configuracoes(self.data, [{'coluna_y': 'classe'}, configuracao])
+        esperado = KAOG(self.data.copy(), **configuracao)
+        np.testing.assert_allclose(esperado.historico.taxas, resultados[1].historico.taxas)
+        self.assertIs(resultados[0].distancias_e_vizinhos, resultados[1].distancias_e_vizinhos)
+
+    def test_coluna_y_por_instancia(self):
+        data = self.data.rename(columns={'classe': 'outra'})
+        kaog = KAOG(data, coluna_y='outra')
+        pd.testing.assert_series_equal(data['outra'], kaog.y)
+        self.assertNotIn('outra', kaog.x.columns)
+
+
+if __name__ == '__main__':
+    unittest.main()